@@ -0,0 +1,56 @@
+'''Compares the binary tree format with pickle and JSON.
+
+    python -m benchmarks.ast_format [statements]
+
+Reports the encoded size and the best of three times to encode, to decode
+everything, and to pull a single statement out of the middle of the module.
+'''
+import json
+import pickle
+import sys
+import time
+
+from benchmarks.corpus import generate
+from src import ast
+from src.ast import binary
+from src.lexer import iter_tokens
+from src.parser import parse_ast
+
+def best(func, runs=3):
+    result = elapsed = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        took = time.perf_counter() - start
+        elapsed = took if elapsed is None else min(elapsed, took)
+        pass
+    return result, elapsed
+
+def middle(node):
+    return node.body[len(node.body) // 2]
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 20000
+    tree = parse_ast(iter_tokens(generate(count)), True)
+    lst = ast.to_list(tree)
+    formats = [
+        ('pickle', lambda: pickle.dumps(tree, pickle.HIGHEST_PROTOCOL), pickle.loads,
+         lambda data: middle(pickle.loads(data))),
+        ('json', lambda: json.dumps(lst).encode(), json.loads,
+         lambda data: json.loads(data)[1][len(lst[1]) // 2]),
+        ('binary', lambda: binary.dumps(tree), binary.loads,
+         lambda data: middle(binary.Reader(data).lazy()).node()),
+    ]
+    print("{0} statements".format(count))
+    print("{0:<7} {1:>10} {2:>9} {3:>9} {4:>9}".format('format', 'bytes', 'dump s', 'load s', 'one s'))
+    for name, dumps, loads, one in formats:
+        data, dump_time = best(dumps)
+        _, load_time = best(lambda: loads(data))
+        _, one_time = best(lambda: one(data))
+        print("{0:<7} {1:>10} {2:9.4f} {3:9.4f} {4:9.4f}".format(
+            name, len(data), dump_time, load_time, one_time))
+        pass
+    pass
+
+if __name__ == '__main__':
+    main(sys.argv)
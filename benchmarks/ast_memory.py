@@ -0,0 +1,37 @@
+'''Compares the memory held by a parsed tree in node form and list form.
+
+    python -m benchmarks.ast_memory [statements]
+'''
+import gc
+import sys
+import tracemalloc
+
+from benchmarks.corpus import generate
+from src import ast
+from src.parser import get_parser, parse_ast
+
+def retained(build):
+    '''Returns the result of build and the memory it still holds'''
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 20000
+    source = generate(count)
+    get_parser()
+    tree, node_size = retained(lambda: parse_ast(source, True))
+    del tree
+    lst, list_size = retained(lambda: ast.to_list(parse_ast(source, True)))
+    print("{0} statements, {1} bytes of source".format(count, len(source)))
+    print("nodes  {0:10.1f} KiB".format(node_size / 1024.0))
+    print("lists  {0:10.1f} KiB".format(list_size / 1024.0))
+    print("ratio  {0:10.2f}x".format(list_size / float(node_size)))
+    pass
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,186 @@
+'''Generates synthetic Arbor source for the benchmarks.'''
+import random
+
+TEMPLATES = [
+    "let {a} = {n};",
+    "const {b} = {a} + {n} * {m};",
+    "{a} = ({b} - {n}) / {m};",
+    "{a} > {b} && {b} != {n};",
+    "let {f} = ({a}, {b}:int, {c} = {n}) ->\n    return {a} + {b};\ndone;",
+    "if ({a} >= {n}) ->\n    {f}({a}, {n});\ndone;",
+]
+
+def statements(count, seed=0):
+    '''Yields count top level statements'''
+    rnd = random.Random(seed)
+    names = ['v{0}'.format(ndx) for ndx in range(64)]
+    for ndx in range(count):
+        yield TEMPLATES[ndx % len(TEMPLATES)].format(
+            a=rnd.choice(names), b=rnd.choice(names), c=rnd.choice(names),
+            f='fn{0}'.format(rnd.randrange(16)),
+            n=rnd.randrange(1, 1000), m=rnd.randrange(1, 100))
+        pass
+    pass
+
+def generate(count, seed=0):
+    '''Returns a program with count top level statements'''
+    return "\n".join(statements(count, seed)) + "\n"
+
+OPERATORS = ['+', '-', '*', '/', '<', '>', '==', '!=', '<=', '>=', '&&', '||']
+
+def expression(rnd, depth):
+    '''Returns a random expression nested up to depth levels'''
+    if depth == 0 or rnd.random() < 0.2:
+        return rnd.choice(['a', 'b', 'c', str(rnd.randrange(1, 100)), '1.5', 'f(a, 2)'])
+    left = expression(rnd, depth - 1)
+    right = expression(rnd, depth - 1)
+    if rnd.random() < 0.2:
+        return "({0} {1} {2})".format(left, rnd.choice(OPERATORS), right)
+    if rnd.random() < 0.1:
+        return "!{0}".format(left)
+    return "{0} {1} {2}".format(left, rnd.choice(OPERATORS), right)
+
+def expressions(count, depth=5, seed=0):
+    '''Returns a program of count expression-heavy statements'''
+    rnd = random.Random(seed)
+    return "\n".join("x = {0};".format(expression(rnd, depth)) for _ in range(count)) + "\n"
+
+# The richer generator below exercises every construct of the grammar:
+# constants of every kind, declarations, calls, all the operators,
+# functions with typed and default parameters, nested if/else if/else
+# chains and both kinds of comment.
+
+NAMES = ['count', 'total', 'left', 'right', 'index', 'value', 'ratio', 'flag',
+         'name', 'items', 'limit', 'acc']
+TYPES = ['int', 'float', 'char', 'function']
+WORDS = ['alpha', 'beta', 'gamma', 'delta', 'note', 'todo', 'fixme', 'see above']
+
+def constant(rnd):
+    '''Returns a random literal of any kind'''
+    kind = rnd.randrange(6)
+    if kind == 0:
+        return str(rnd.randrange(1, 100000))
+    if kind == 1:
+        return hex(rnd.randrange(1, 1 << 16))
+    if kind == 2:
+        return oct(rnd.randrange(8, 1 << 12)).replace('0o', '0')
+    if kind == 3:
+        return "{0}.{1}".format(rnd.randrange(0, 1000), rnd.randrange(1, 100))
+    if kind == 4:
+        return "'{0}'".format(rnd.choice('abcxyz019_+'))
+    return '"{0}{1}"'.format(rnd.choice(WORDS), rnd.choice(['', '\\n', ' \\"q\\"', '\\t!']))
+
+def operand(rnd):
+    '''Returns a name, a literal or a call'''
+    kind = rnd.random()
+    if kind < 0.45:
+        return rnd.choice(NAMES)
+    if kind < 0.8:
+        return constant(rnd)
+    return call(rnd)
+
+def call(rnd):
+    '''Returns a call whose arguments are names, literals or left out'''
+    args = []
+    for _ in range(rnd.randrange(4)):
+        arg = rnd.random()
+        args.append(rnd.choice(NAMES) if arg < 0.5 else constant(rnd) if arg < 0.9 else '')
+        pass
+    return "{0}({1})".format(rnd.choice(NAMES), ", ".join(args))
+
+def operation(rnd, depth):
+    '''Returns an expression using every operator, with parentheses and !'''
+    if depth == 0 or rnd.random() < 0.25:
+        return operand(rnd)
+    left = operation(rnd, depth - 1)
+    right = operation(rnd, depth - 1)
+    kind = rnd.random()
+    if kind < 0.15:
+        return "({0} {1} {2})".format(left, rnd.choice(OPERATORS), right)
+    if kind < 0.25:
+        return "!{0}".format(left)
+    return "{0} {1} {2}".format(left, rnd.choice(OPERATORS), right)
+
+def params(rnd):
+    '''Returns a parameter list mixing plain, typed and default parameters'''
+    count = rnd.randrange(5)
+    if count == 1:
+        # (a) alone would be a parenthesised expression
+        count = 2
+        pass
+    names = rnd.sample(NAMES, count)
+    out = []
+    for ndx, name in enumerate(names):
+        kind = rnd.randrange(4)
+        if kind == 1:
+            name = "{0}:{1}".format(name, rnd.choice(TYPES))
+        elif kind == 2:
+            name = "{0} = {1}".format(name, constant(rnd))
+        elif kind == 3:
+            name = "{0}:{1} = {2}".format(name, rnd.choice(TYPES), constant(rnd))
+            pass
+        out.append(name)
+        pass
+    return "({0})".format(", ".join(out))
+
+def block(rnd, depth, indent):
+    '''Returns the statements of a function or branch body'''
+    lines = [statement(rnd, depth - 1, indent) for _ in range(rnd.randrange(1, 4))]
+    return "\n".join(lines)
+
+def if_statement(rnd, depth, indent):
+    '''Returns an if with any mix of else if and else branches'''
+    pad = "    " * indent
+    parts = ["{0}if ({1}) ->\n{2}".format(pad, operation(rnd, 2), block(rnd, depth, indent + 1))]
+    for _ in range(rnd.randrange(3)):
+        parts.append("{0}else if ({1}) ->\n{2}".format(
+            pad, operation(rnd, 2), block(rnd, depth, indent + 1)))
+        pass
+    if len(parts) > 1 and rnd.random() < 0.7 or rnd.random() < 0.3:
+        parts.append("{0}else ->\n{1}".format(pad, block(rnd, depth, indent + 1)))
+        pass
+    parts.append(pad + "done;")
+    return "\n".join(parts)
+
+def function(rnd, depth, indent):
+    pad = "    " * indent
+    body = block(rnd, depth, indent + 1)
+    ret = "{0}    return {1};".format(pad, operation(rnd, 2))
+    return "{0} ->\n{1}\n{2}\n{3}done".format(params(rnd), body, ret, pad)
+
+def statement(rnd, depth=3, indent=0):
+    '''Returns one statement, nesting blocks up to depth deep'''
+    pad = "    " * indent
+    kind = rnd.random()
+    if depth > 0 and kind < 0.15:
+        text = if_statement(rnd, depth, indent)
+    elif depth > 0 and kind < 0.3:
+        text = "{0}{1} {2} = {3};".format(
+            pad, rnd.choice(['let', 'const']), rnd.choice(NAMES), function(rnd, depth, indent))
+    elif kind < 0.45:
+        text = "{0}let {1} = {2};".format(pad, rnd.choice(NAMES), operation(rnd, 3))
+    elif kind < 0.55:
+        text = "{0}const {1} = {2};".format(pad, rnd.choice(NAMES), constant(rnd))
+    elif kind < 0.65:
+        text = "{0}let {1};".format(pad, rnd.choice(NAMES))
+    elif kind < 0.8:
+        text = "{0}{1} = {2};".format(pad, rnd.choice(NAMES), operation(rnd, 3))
+    elif kind < 0.9:
+        text = "{0}{1};".format(pad, call(rnd))
+    else:
+        text = "{0}{1};".format(pad, operation(rnd, 4))
+        pass
+    comment = rnd.random()
+    if comment < 0.08:
+        text = "{0}// {1}\n{2}".format(pad, rnd.choice(WORDS), text)
+    elif comment < 0.12:
+        text = "{0}/* {1}\n{0}   {2} */\n{3}".format(pad, rnd.choice(WORDS), rnd.choice(WORDS), text)
+    elif comment < 0.16:
+        text = "{0} /* {1} */".format(text, rnd.choice(WORDS))
+        pass
+    return text
+
+def program(count, seed=0, depth=3):
+    '''Returns a realistic program with count top level statements'''
+    rnd = random.Random(seed)
+    return "\n".join(statement(rnd, depth) for _ in range(count)) + "\n"
@@ -0,0 +1,86 @@
+'''Compares cold arbor runs with round trips to the compile daemon.
+
+    python -m benchmarks.daemon [runs] [statements]
+
+Reports the median latency to compile one generated file with a fresh
+`arbor` process, with a fresh `arbor --socket` thin client, and with a
+request over an open connection to `arbor serve`. The cache is off
+throughout, so every run really lexes and parses.
+'''
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate
+from src.cli.client import Client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARBOR = os.path.join(ROOT, 'arbor')
+
+def median(func, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        pass
+    return statistics.median(times)
+
+def wait_for(path, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return Client(path)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+            pass
+        pass
+    pass
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 20
+    count = int(argv[2]) if len(argv) > 2 else 200
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'arbor.sock')
+    source = os.path.join(directory, 'bench.ab')
+    with open(source, 'w') as fo:
+        fo.write(generate(count))
+        pass
+    daemon = subprocess.Popen([sys.executable, ARBOR, 'serve', '--socket', path,
+                               '--no-cache', '-j', '1'], cwd=ROOT)
+    try:
+        client = wait_for(path)
+        cases = [
+            ('cold arbor', lambda: subprocess.check_call(
+                [sys.executable, ARBOR, '--no-cache', '-j', '1', source], cwd=ROOT)),
+            ('arbor --socket', lambda: subprocess.check_call(
+                [sys.executable, ARBOR, '--socket', path, source], cwd=ROOT)),
+            ('round trip', lambda: client.compile([source])),
+        ]
+        print("{0} statements, median of {1} runs".format(count, runs))
+        cold = None
+        for name, func in cases:
+            elapsed = median(func, runs)
+            cold = cold or elapsed
+            print("{0:<15} {1:8.2f} ms {2:7.1f}x".format(name, elapsed * 1000, cold / elapsed))
+            pass
+        client.shutdown()
+        client.close()
+        daemon.wait(10)
+    finally:
+        if daemon.poll() is None:
+            daemon.terminate()
+            daemon.wait()
+            pass
+        shutil.rmtree(directory)
+        pass
+    pass
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,37 @@
+'''Reports tokens per second for each lexer backend.
+
+    python -m benchmarks.lexers [statements]
+'''
+import sys
+import time
+
+from benchmarks.corpus import generate
+from src.lexer import iter_tokens
+
+BACKENDS = ('ply', 'fast')
+
+def throughput(source, backend, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        count = sum(1 for _ in iter_tokens(source, backend=backend))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        pass
+    return count, best
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 20000
+    source = generate(count)
+    results = {}
+    for backend in BACKENDS:
+        toks, elapsed = throughput(source, backend)
+        results[backend] = toks / elapsed
+        print("{0:<5} {1} tokens {2:8.3f} s {3:12.0f} tokens/s".format(
+            backend, toks, elapsed, results[backend]))
+        pass
+    print("speedup {0:.2f}x".format(results['fast'] / results['ply']))
+    pass
+
+if __name__ == '__main__':
+    main(sys.argv)
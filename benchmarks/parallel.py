@@ -0,0 +1,61 @@
+'''Reports how compiling a generated corpus of files scales with -j.
+
+    python -m benchmarks.parallel [files] [statements per file]
+
+Runs the arbor command line on the corpus once for every worker count from
+1 up to the number of cores, and prints the wall time and speedup.
+'''
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def write_corpus(directory, files, count):
+    for ndx in range(files):
+        with open(os.path.join(directory, 'f{0:05}.ab'.format(ndx)), 'w') as fo:
+            fo.write(generate(count, seed=ndx))
+            pass
+        pass
+    pass
+
+def timed(directory, jobs, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, os.path.join(ROOT, 'arbor'),
+                               '-j', str(jobs), directory], cwd=ROOT)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        pass
+    return best
+
+def main(argv):
+    files = int(argv[1]) if len(argv) > 1 else 400
+    count = int(argv[2]) if len(argv) > 2 else 200
+    cores = os.cpu_count() or 1
+    directory = tempfile.mkdtemp()
+    try:
+        write_corpus(directory, files, count)
+        serial = None
+        jobs = 1
+        while True:
+            elapsed = timed(directory, jobs)
+            serial = serial or elapsed
+            print("-j {0:<3} {1:8.3f} s {2:6.2f}x".format(jobs, elapsed, serial / elapsed))
+            if jobs >= cores:
+                break
+            jobs = min(jobs * 2, cores)
+            pass
+    finally:
+        shutil.rmtree(directory)
+        pass
+    pass
+
+if __name__ == '__main__':
+    main(sys.argv)
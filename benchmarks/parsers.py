@@ -0,0 +1,45 @@
+'''Compares the throughput of the PLY and recursive descent parser backends.
+
+Both parse the same pre-lexed tokens, so only parsing is timed.
+
+    python -m benchmarks.parsers [statements]
+'''
+import sys
+import time
+
+from benchmarks.corpus import expressions, generate
+from src.lexer import lex
+from src.parser import parse_ast
+
+BACKENDS = ('ply', 'pratt')
+
+def best(source, backend, runs=3):
+    toks = lex(source, 'fast')
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        parse_ast(toks, True, backend)
+        timings.append(time.perf_counter() - start)
+        pass
+    return len(toks), min(timings)
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 5000
+    corpora = [
+        ('expressions', expressions(count)),
+        ('mixed', generate(count)),
+    ]
+    for name, source in corpora:
+        results = {}
+        for backend in BACKENDS:
+            toks, elapsed = best(source, backend)
+            results[backend] = elapsed
+            print("{0:<12} {1:<6} {2} tokens {3:8.3f} s {4:10.0f} tokens/s".format(
+                name, backend, toks, elapsed, toks / elapsed))
+            pass
+        print("{0:<12} speedup {1:.2f}x".format(name, results['ply'] / results['pratt']))
+        pass
+    pass
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,61 @@
+'''Compares looking up (line, column) positions by scanning the source with
+looking them up in a LineIndex.
+
+    python -m benchmarks.positions [statements] [lookups]
+
+The positions are the starts of AST nodes from a generated program, in a
+random order, as a tool reporting many diagnostics would ask for them. The
+scan counts the newlines before every offset and searches back for the
+last one; the index is built once and answers with a binary search.
+'''
+import random
+import sys
+import time
+
+from benchmarks.corpus import program
+from src.lexer.lines import LineIndex
+from src.parser import parse_ast
+
+def scan(source, offsets):
+    return [(source.count('\n', 0, offset) + 1, offset - source.rfind('\n', 0, offset))
+            for offset in offsets]
+
+def indexed(source, offsets):
+    index = LineIndex(source)
+    return [index.position(offset) for offset in offsets]
+
+def offsets_of(tree):
+    offsets = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        offsets.append(node.lexpos)
+        stack.extend(node.children())
+        pass
+    return offsets
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 5000
+    lookups = int(argv[2]) if len(argv) > 2 else 5000
+    source = program(count)
+    offsets = offsets_of(parse_ast(source, True))
+    rng = random.Random(0)
+    offsets = [rng.choice(offsets) for _ in range(lookups)]
+    print("{0} lookups in {1} lines, {2} bytes".format(
+        lookups, source.count('\n') + 1, len(source)))
+    results = []
+    for name, func in (('scan', scan), ('LineIndex', indexed)):
+        start = time.perf_counter()
+        results.append(func(source, offsets))
+        elapsed = time.perf_counter() - start
+        print("{0:<10} {1:10.4f} s {2:8.2f} us/lookup".format(
+            name, elapsed, elapsed / lookups * 1e6))
+        pass
+    assert results[0] == results[1]
+    start = time.perf_counter()
+    LineIndex(source)
+    print("index build {0:9.4f} s".format(time.perf_counter() - start))
+    pass
+
+if __name__ == '__main__':
+    main(sys.argv)
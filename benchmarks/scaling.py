@@ -0,0 +1,45 @@
+'''Checks that parse time grows linearly with the number of statements.
+
+Parses generated programs from 1k up to 1M statements, prints the time per
+statement at each size and exits non-zero if the largest size is more than
+MAX_SLOWDOWN times slower per statement than the smallest.
+
+    python -m benchmarks.scaling [max statements]
+'''
+import sys
+import time
+
+from benchmarks.corpus import generate
+from src.parser import get_parser, parse_ast
+
+MAX_SLOWDOWN = 2.0
+
+def sizes(largest):
+    size = 1000
+    while size <= largest:
+        yield size
+        size *= 10
+        pass
+    pass
+
+def time_parse(source):
+    start = time.perf_counter()
+    parse_ast(source, True)
+    return time.perf_counter() - start
+
+def main(argv):
+    largest = int(argv[1]) if len(argv) > 1 else 1000000
+    get_parser()
+    per_statement = []
+    for size in sizes(largest):
+        elapsed = time_parse(generate(size))
+        per_statement.append(elapsed / size)
+        print("{0:>9} statements {1:9.3f} s {2:8.2f} us/statement".format(
+            size, elapsed, per_statement[-1] * 1e6))
+        pass
+    slowdown = per_statement[-1] / per_statement[0]
+    print("slowdown per statement: {0:.2f}x".format(slowdown))
+    return 0 if slowdown <= MAX_SLOWDOWN else 1
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,53 @@
+'''Measures the cold import time of the compiler front end.
+
+Every sample runs in a fresh interpreter so nothing is cached in memory. The
+"import" case only imports the package, which builds nothing. The "tables"
+case builds the lexer and parser, loading the LALR tables from parsetab.py;
+the "rebuild" case forces PLY to run the full grammar analysis for
+comparison.
+
+    python -m benchmarks.startup [runs]
+'''
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    'import': 'import src',
+    'tables': 'import src.parser\nsrc.parser.get_parser()\nsrc.parser.get_lexer()',
+    'rebuild': (
+        'import src.parser, ply.yacc as yacc\n'
+        'yacc.yacc(module=src.parser, tabmodule="_arbor_no_tables",\n'
+        '          write_tables=False, errorlog=yacc.NullLogger())'
+    ),
+}
+
+def sample(code):
+    start = time.perf_counter()
+    subprocess.check_call([sys.executable, '-c', code], cwd=ROOT)
+    return time.perf_counter() - start
+
+def run(runs=10):
+    baseline = min(sample('pass') for _ in range(runs))
+    results = {}
+    for name, code in CASES.items():
+        times = [sample(code) - baseline for _ in range(runs)]
+        results[name] = {
+            'min': min(times),
+            'median': statistics.median(times),
+        }
+    return results
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 10
+    for name, res in run(runs).items():
+        print("{0:<10} min {1:8.2f} ms   median {2:8.2f} ms".format(
+            name, res['min'] * 1000, res['median'] * 1000))
+    pass
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,166 @@
+'''Runs the benchmark suite and compares it against a stored baseline.
+
+    python -m benchmarks.suite [--sizes 100,1000,5000] [--output FILE]
+                               [--baseline FILE] [--save-baseline]
+                               [--tolerance 0.35]
+
+For every size it generates a program with benchmarks.corpus.program and
+measures, best of --runs:
+
+    lex_s        lexing the source with the PLY lexer
+    lex_fast_s   lexing it with src.lexer.fast
+    parse_s      parsing the already lexed tokens
+    total_s      lexing and parsing the source
+    tokens_per_s tokens over lex_s
+    peak_mb      peak memory allocated while lexing and parsing
+
+The results are printed and written as JSON to --output. With a baseline,
+every time and peak_mb is compared against it and the run fails when one
+is more than --tolerance worse. Times are divided by a short calibration
+loop first, so a baseline taken on a faster or slower machine still
+compares fairly.
+'''
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.corpus import program
+from src.lexer import iter_tokens
+from src.parser import get_parser, parse_ast
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+TIMES = ('lex_s', 'lex_fast_s', 'parse_s', 'total_s')
+COMPARED = TIMES + ('peak_mb',)
+
+def best(func, runs):
+    elapsed = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        took = time.perf_counter() - start
+        elapsed = took if elapsed is None else min(elapsed, took)
+        pass
+    return elapsed
+
+def calibrate(runs=10):
+    '''Times a fixed pure Python workload, to normalize times by'''
+    def work():
+        total = 0
+        table = {}
+        for ndx in range(200000):
+            table[ndx & 1023] = total
+            total += ndx % 7
+            pass
+        return total
+    return best(work, runs)
+
+def peak(func):
+    '''Returns the peak memory func allocates, in MB'''
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0)
+    finally:
+        tracemalloc.stop()
+        pass
+    pass
+
+def measure(size, runs, seed=0):
+    source = program(size, seed)
+    toks = list(iter_tokens(source))
+    lex_s = best(lambda: sum(1 for _ in iter_tokens(source, 'ply')), runs)
+    return {
+        'size': size,
+        'bytes': len(source),
+        'tokens': len(toks),
+        'lex_s': lex_s,
+        'lex_fast_s': best(lambda: sum(1 for _ in iter_tokens(source, 'fast')), runs),
+        'parse_s': best(lambda: parse_ast(toks, True, 'ply'), runs),
+        'total_s': best(lambda: parse_ast(iter_tokens(source, 'ply'), True, 'ply'), runs),
+        'tokens_per_s': len(toks) / lex_s,
+        'peak_mb': peak(lambda: parse_ast(iter_tokens(source, 'ply'), True, 'ply')),
+    }
+
+def run(sizes, runs):
+    get_parser()
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'calibration_s': calibrate(),
+        'results': [measure(size, runs) for size in sizes],
+    }
+
+def compare(report, baseline, tolerance):
+    '''Returns a line per compared metric and whether any regressed'''
+    scale = baseline['calibration_s'] / report['calibration_s']
+    old = dict((entry['size'], entry) for entry in baseline['results'])
+    lines = []
+    regressed = False
+    for entry in report['results']:
+        base = old.get(entry['size'])
+        if base is None:
+            continue
+        for metric in COMPARED:
+            if metric not in base:
+                continue
+            value = entry[metric] * (scale if metric in TIMES else 1)
+            ratio = value / base[metric] if base[metric] else 1.0
+            bad = ratio > 1 + tolerance
+            regressed = regressed or bad
+            lines.append("{0:>7} {1:<12} {2:6.2f}x{3}".format(
+                entry['size'], metric, ratio, '  REGRESSION' if bad else ''))
+            pass
+        pass
+    return lines, regressed
+
+def arguments():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+    parser.add_argument('--sizes', default='100,1000,5000',
+                        help='comma separated statement counts')
+    parser.add_argument('--runs', type=int, default=5, help='take the best of this many runs')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', default=BASELINE, help='JSON results to compare against')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.35,
+                        help='how much worse than the baseline counts as a regression')
+    return parser
+
+def main(argv):
+    args = arguments().parse_args(argv[1:])
+    sizes = [int(size) for size in args.sizes.split(',')]
+    report = run(sizes, args.runs)
+    print("{0:>7} {1:>8} {2:>9} {3:>9} {4:>9} {5:>9} {6:>10} {7:>8}".format(
+        'size', 'tokens', 'lex s', 'fast s', 'parse s', 'total s', 'tokens/s', 'peak MB'))
+    for entry in report['results']:
+        print("{size:>7} {tokens:>8} {lex_s:9.4f} {lex_fast_s:9.4f} {parse_s:9.4f} "
+              "{total_s:9.4f} {tokens_per_s:10.0f} {peak_mb:8.2f}".format(**entry))
+        pass
+    if args.output:
+        with open(args.output, 'w') as fo:
+            json.dump(report, fo, indent=2, sort_keys=True)
+            pass
+        pass
+    if args.save_baseline:
+        with open(args.baseline, 'w') as fo:
+            json.dump(report, fo, indent=2, sort_keys=True)
+            pass
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline) as fi:
+        baseline = json.load(fi)
+        pass
+    lines, regressed = compare(report, baseline, args.tolerance)
+    print("against {0}".format(args.baseline))
+    for line in lines:
+        print(line)
+        pass
+    return 1 if regressed else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,81 @@
+'''Measures what interning names in a SymbolTable saves.
+
+    python -m benchmarks.symbols [statements]
+
+Parses an identifier heavy generated program with and without interning
+and reports the memory its tree holds, then times comparing every name in
+the tree with a name equal to it, as a resolver looking names up does: as
+separate equal strings, as the interned strings and as symbol ids.
+'''
+import sys
+import time
+import tracemalloc
+
+from benchmarks.corpus import program
+from src.parser import Parser
+
+FIELDS = ('name', 'param')
+
+def names(tree):
+    found = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        name = getattr(node, 'name', None)
+        if isinstance(name, str):
+            found.append(name)
+            pass
+        stack.extend(node.children())
+        pass
+    return found
+
+def parse(source, intern):
+    session = Parser()
+    session.lexer.intern = intern
+    tracemalloc.start()
+    tree = session.parse_ast(source, True)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tree, size, session.symbols
+
+def best(func, runs=5):
+    elapsed = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        took = time.perf_counter() - start
+        elapsed = took if elapsed is None else min(elapsed, took)
+        pass
+    return elapsed
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 5000
+    source = program(count)
+    plain, plain_size, _ = parse(source, False)
+    interned, interned_size, symbols = parse(source, True)
+    plain_names = names(plain)
+    interned_names = names(interned)
+    print("{0} names, {1} distinct".format(len(plain_names), len(symbols)))
+    print("tree without interning {0:10.1f} KiB".format(plain_size / 1024.0))
+    print("tree with interning    {0:10.1f} KiB  {1:5.1f}% smaller".format(
+        interned_size / 1024.0, 100.0 * (plain_size - interned_size) / plain_size))
+    print("distinct name objects  {0:>10} -> {1}".format(
+        len(set(map(id, plain_names))), len(set(map(id, interned_names)))))
+    # the names a lookup compares against, each its own string object
+    probes = [''.join(name) for name in plain_names]
+    interned_probes = [symbols.symbol(name) for name in probes]
+    ids = [symbols.id(name) for name in interned_names]
+    id_probes = [symbols.id(name) for name in probes]
+    cases = (
+        ('equal strings', lambda: sum(1 for a, b in zip(plain_names, probes) if a == b)),
+        ('interned strings', lambda: sum(1 for a, b in zip(interned_names, interned_probes)
+                                         if a == b)),
+        ('symbol ids', lambda: sum(1 for a, b in zip(ids, id_probes) if a == b)),
+    )
+    for name, func in cases:
+        print("{0:<22} {1:10.2f} ms".format(name, best(func) * 1000))
+        pass
+    pass
+
+if __name__ == '__main__':
+    main(sys.argv)
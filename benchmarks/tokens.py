@@ -0,0 +1,31 @@
+'''Compares the memory held by a list of LexTokens with a TokenBuffer.
+
+    python -m benchmarks.tokens [statements]
+'''
+import sys
+import tracemalloc
+
+from benchmarks.corpus import generate
+from src.lexer import lex
+from src.lexer.buffer import TokenBuffer
+
+def measure(build, source):
+    tracemalloc.start()
+    result = build(source)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 20000
+    source = generate(count)
+    toks, list_size = measure(lex, source)
+    buf, buf_size = measure(TokenBuffer.from_source, source)
+    print("{0} tokens from {1} statements".format(len(toks), count))
+    print("LexToken list  {0:10.1f} KiB".format(list_size / 1024.0))
+    print("TokenBuffer    {0:10.1f} KiB  ({1} strings)".format(buf_size / 1024.0, len(buf.strings)))
+    print("ratio          {0:10.1f}x".format(list_size / float(buf_size)))
+    pass
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,82 @@
+'''Micro-benchmarks of the bytecode VM.
+
+    python -m benchmarks.vm [runs]
+
+Runs an arithmetic loop, written as recursion since Arbor has no loops,
+and a doubly recursive fib, plain and memoized, each next to the same
+function in Python, and reports the best time of runs and how much slower
+than Python the VM is.
+'''
+import sys
+import time
+
+from src.vm import VM
+from src.vm.compiler import compile_source
+
+LOOP = '''
+let loop = (i, acc) ->
+    if (i == 1) ->
+        return acc;
+    done;
+    let j = i - 1;
+    let t = acc + i * i - i / 2;
+    return loop(j, t);
+done;
+return loop({0}, 1);
+'''
+
+FIB = '''
+let fib = (n:int) ->
+    if (n < 2) ->
+        return n;
+    done;
+    let a = n - 1;
+    let b = n - 2;
+    return fib(a) + fib(b);
+done;
+return fib({0});
+'''
+
+def py_loop(i, acc):
+    while i != 1:
+        acc = acc + i * i - i // 2
+        i -= 1
+        pass
+    return acc
+
+def py_fib(n):
+    if n < 2:
+        return n
+    return py_fib(n - 1) + py_fib(n - 2)
+
+CASES = (
+    ('arithmetic loop', LOOP, 50000, lambda n: py_loop(n, 1), {}),
+    ('recursive fib', FIB, 22, py_fib, {}),
+    ('memoized fib', FIB, 22, py_fib, {'memoize': True}),
+)
+
+def best(func, runs):
+    elapsed = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        took = time.perf_counter() - start
+        elapsed = took if elapsed is None else min(elapsed, took)
+        pass
+    return elapsed, result
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 3
+    print("{0:<16} {1:>10} {2:>10} {3:>8}".format('case', 'vm ms', 'python ms', 'ratio'))
+    for name, source, size, native, options in CASES:
+        code = compile_source(source.format(size))
+        vm_s, result = best(lambda: VM(**options).run(code), runs)
+        py_s, expected = best(lambda: native(size), runs)
+        assert result == expected, (result, expected)
+        print("{0:<16} {1:10.2f} {2:10.2f} {3:7.1f}x".format(
+            name, vm_s * 1000, py_s * 1000, vm_s / py_s))
+        pass
+    pass
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,390 @@
+'''Typed syntax tree nodes for Arbor.
+
+Every node class uses __slots__ and carries the lineno and lexpos of the
+token it starts at; span() turns the lexpos into a (line, column) through a
+src.lexer.lines.LineIndex. to_list() converts a tree to the nested list form
+that src.parser.parse returns, e.g. BinOp -> ['binop', left, op, right].
+'''
+
+class Node(object):
+    __slots__ = ('lineno', 'lexpos')
+    # the fields holding the node's data, in list form order
+    _fields = ()
+    # the tag of the node in list form
+    tag = None
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, ", ".join(
+            repr(getattr(self, field)) for field in self._fields))
+
+    def span(self, index):
+        '''Returns the 1-based (line, column) the node starts at, looked up
+        in a src.lexer.lines.LineIndex of its source'''
+        return index.position(self.lexpos)
+
+    def children(self):
+        '''Yields the child nodes, skipping strings and Nones'''
+        for field in self._fields:
+            value = getattr(self, field)
+            if isinstance(value, Node):
+                yield value
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, Node):
+                        yield item
+                        pass
+                    pass
+                pass
+            pass
+        pass
+
+class Statements(Node):
+    __slots__ = ('body',)
+    _fields = ('body',)
+    tag = 'statements'
+
+    def __init__(self, body, lineno=1, lexpos=0):
+        self.body = body
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class Constant(Node):
+    '''Base class of the literal nodes, value is the token text'''
+    __slots__ = ('value',)
+    _fields = ('value',)
+
+    def __init__(self, value, lineno=0, lexpos=0):
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class Int(Constant):
+    __slots__ = ()
+    tag = 'int'
+
+class Float(Constant):
+    __slots__ = ()
+    tag = 'float'
+
+class Char(Constant):
+    __slots__ = ()
+    tag = 'char'
+
+class String(Constant):
+    __slots__ = ()
+    tag = 'array[char]'
+
+class Boolean(Constant):
+    '''A boolean, 'true' or 'false'. The parser makes none, src.optimize
+    folds comparisons and logical operators into them.'''
+    __slots__ = ()
+    tag = 'boolean'
+
+class Usage(Node):
+    __slots__ = ('name',)
+    _fields = ('name',)
+    tag = 'usage'
+
+    def __init__(self, name, lineno=0, lexpos=0):
+        self.name = name
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class FuncUse(Node):
+    '''A call, args holds Usage nodes, constants and None for empty slots'''
+    __slots__ = ('name', 'args')
+    _fields = ('name', 'args')
+    tag = 'func use'
+
+    def __init__(self, name, args, lineno=0, lexpos=0):
+        self.name = name
+        self.args = args
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class Ref(Usage):
+    '''A Usage that src.resolver resolved to the variable in slot of the
+    frame depth functions out, or to a builtin when depth is None'''
+    __slots__ = ('depth', 'slot')
+
+    def __init__(self, name, depth, slot, lineno=0, lexpos=0):
+        Usage.__init__(self, name, lineno, lexpos)
+        self.depth = depth
+        self.slot = slot
+        pass
+
+class FuncRef(FuncUse):
+    '''A FuncUse with its callee resolved like a Ref'''
+    __slots__ = ('depth', 'slot')
+
+    def __init__(self, name, args, depth, slot, lineno=0, lexpos=0):
+        FuncUse.__init__(self, name, args, lineno, lexpos)
+        self.depth = depth
+        self.slot = slot
+        pass
+
+class Decl(Node):
+    '''A let declaration. slot is the frame slot src.resolver gives it.'''
+    __slots__ = ('name', 'slot')
+    _fields = ('name',)
+    tag = 'decl'
+
+    def __init__(self, name, lineno=0, lexpos=0):
+        self.name = name
+        self.slot = None
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class DeclConst(Decl):
+    __slots__ = ()
+    tag = 'declConst'
+
+class Assign(Node):
+    __slots__ = ('target', 'value')
+    _fields = ('target', 'value')
+    tag = 'assign'
+
+    def __init__(self, target, value, lineno=0, lexpos=0):
+        self.target = target
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class BinOp(Node):
+    __slots__ = ('left', 'op', 'right')
+    _fields = ('left', 'op', 'right')
+    tag = 'binop'
+
+    def __init__(self, left, op, right, lineno=0, lexpos=0):
+        self.left = left
+        self.op = op
+        self.right = right
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class Comps(BinOp):
+    __slots__ = ()
+    tag = 'comps'
+
+class Bool(BinOp):
+    __slots__ = ()
+    tag = 'bool'
+
+class Not(Node):
+    __slots__ = ('operand',)
+    _fields = ('operand',)
+    tag = 'not'
+
+    def __init__(self, operand, lineno=0, lexpos=0):
+        self.operand = operand
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class Return(Node):
+    __slots__ = ('value',)
+    _fields = ('value',)
+    tag = 'return'
+
+    def __init__(self, value, lineno=0, lexpos=0):
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class Param(Node):
+    __slots__ = ('name',)
+    _fields = ('name',)
+    tag = 'param'
+
+    def __init__(self, name, lineno=0, lexpos=0):
+        self.name = name
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class ParamType(Node):
+    __slots__ = ('name', 'type')
+    _fields = ('name', 'type')
+    tag = 'paramtype'
+
+    def __init__(self, name, type, lineno=0, lexpos=0):
+        self.name = name
+        self.type = type
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class Default(Node):
+    '''A parameter with a default, param is a Param or ParamType'''
+    __slots__ = ('param', 'value')
+    _fields = ('param', 'value')
+    tag = 'default'
+
+    def __init__(self, param, value, lineno=0, lexpos=0):
+        self.param = param
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class Params(Node):
+    __slots__ = ('params',)
+    _fields = ('params',)
+    tag = 'params'
+
+    def __init__(self, params, lineno=0, lexpos=0):
+        self.params = params
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class Block(Node):
+    __slots__ = ('body',)
+    _fields = ('body',)
+    tag = 'block'
+
+    def __init__(self, body, lineno=0, lexpos=0):
+        self.body = body
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class Func(Node):
+    '''A function, params is a Params node or None'''
+    __slots__ = ('params', 'body')
+    _fields = ('params', 'body')
+    tag = 'func'
+
+    def __init__(self, params, body, lineno=0, lexpos=0):
+        self.params = params
+        self.body = body
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class If(Node):
+    __slots__ = ('cond', 'body')
+    _fields = ('cond', 'body')
+    tag = 'if'
+
+    def __init__(self, cond, body, lineno=0, lexpos=0):
+        self.cond = cond
+        self.body = body
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class IfElse(Node):
+    '''An if followed by an ElseIf or Else in orelse'''
+    __slots__ = ('cond', 'body', 'orelse')
+    _fields = ('cond', 'body', 'orelse')
+    tag = 'ifelse'
+
+    def __init__(self, cond, body, orelse, lineno=0, lexpos=0):
+        self.cond = cond
+        self.body = body
+        self.orelse = orelse
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class ElseIf(IfElse):
+    '''An else if, orelse is the next ElseIf/Else or None'''
+    __slots__ = ()
+    tag = 'elseif'
+
+    def __init__(self, cond, body, orelse=None, lineno=0, lexpos=0):
+        IfElse.__init__(self, cond, body, orelse, lineno, lexpos)
+        pass
+
+class Else(Node):
+    __slots__ = ('body',)
+    _fields = ('body',)
+    tag = 'else'
+
+    def __init__(self, body, lineno=0, lexpos=0):
+        self.body = body
+        self.lineno = lineno
+        self.lexpos = lexpos
+        pass
+
+class NodeVisitor(object):
+    '''Walks a tree calling visit_<ClassName> for every node.
+
+    Methods are looked up once per node type and cached on the visitor
+    class, so dispatch is a single dict lookup. Nodes without a method go
+    to generic_visit, which visits their children.'''
+    _dispatch = None
+
+    def visit(self, node):
+        cls = type(self)
+        table = cls.__dict__.get('_dispatch')
+        if table is None:
+            table = cls._dispatch = {}
+            pass
+        name = table.get(type(node))
+        if name is None:
+            name = table[type(node)] = self._method_name(type(node))
+            pass
+        return getattr(self, name)(node)
+
+    def _method_name(self, typ):
+        for klass in typ.__mro__:
+            name = 'visit_' + klass.__name__
+            if hasattr(self, name):
+                return name
+            pass
+        return 'generic_visit'
+
+    def generic_visit(self, node):
+        for child in node.children():
+            self.visit(child)
+            pass
+        pass
+
+def _convert(value):
+    if isinstance(value, Node):
+        return to_list(value)
+    if isinstance(value, list):
+        return [_convert(item) for item in value]
+    return value
+
+def _name_or_list(value):
+    if isinstance(value, (Usage, Param)):
+        return value.name
+    return _convert(value)
+
+def _func_use(node):
+    return [node.tag, node.name, [_name_or_list(arg) for arg in node.args]]
+
+def _default(node):
+    return [node.tag, _name_or_list(node.param), _convert(node.value)]
+
+def _else_if(node):
+    res = [node.tag, _convert(node.cond), _convert(node.body)]
+    if node.orelse is not None:
+        res.extend(to_list(node.orelse))
+        pass
+    return res
+
+_SPECIAL = {
+    FuncUse: _func_use,
+    FuncRef: _func_use,
+    Default: _default,
+    ElseIf: _else_if,
+}
+
+def to_list(node):
+    '''Converts a tree to the nested list form'''
+    special = _SPECIAL.get(type(node))
+    if special is not None:
+        return special(node)
+    return [node.tag] + [_convert(getattr(node, field)) for field in node._fields]
@@ -0,0 +1,392 @@
+'''A compact binary format for syntax trees.
+
+    header   magic, format version, node and string counts, section offsets
+    offsets  uint32 per node, where its record starts in the node section
+    strings  uint32 per string plus one, where it starts in the string data,
+             followed by the utf-8 data
+    nodes    one record per node in pre-order, so the root is node 0
+
+A node record is varints: the kind, the number of nodes in its subtree,
+lineno and lexpos, then one value per field. A value is 0 for None, or
+(n << 2) | tag where tag 1 is string n, 2 is the node n places after this
+one and 3 is a list of n values that follow. Lists hold no lists. Child
+nodes usually follow their parent closely, so most values fit in a byte.
+
+A Reader works on any buffer, bytes, an mmap or a memoryview, without
+copying it. The offset tables are cast to uint32 memoryviews, so finding a
+node or a string is one index, and nothing is decoded until it is asked
+for: node(i) decodes one subtree and lazy(i) hands out LazyNodes that
+decode their fields on access.
+'''
+import mmap
+import struct
+import sys
+
+from src import ast
+
+MAGIC = b'ARBT'
+FORMAT = 1
+
+# kind id -> node class. Append only, bump FORMAT on any other change.
+KINDS = (
+    ast.Statements, ast.Int, ast.Float, ast.Char, ast.String,
+    ast.Usage, ast.FuncUse, ast.Decl, ast.DeclConst, ast.Assign,
+    ast.BinOp, ast.Comps, ast.Bool, ast.Not, ast.Return,
+    ast.Param, ast.ParamType, ast.Default, ast.Params, ast.Block, ast.Func,
+    ast.If, ast.IfElse, ast.ElseIf, ast.Else, ast.Boolean,
+)
+KIND_IDS = dict((cls, ndx) for ndx, cls in enumerate(KINDS))
+FIELD_COUNTS = tuple(len(cls._fields) for cls in KINDS)
+
+# magic, format, node count, string count, offsets, strings, nodes
+HEADER = struct.Struct('<4sBxxxIIIII')
+
+NONE, STRING, NODE, LIST = 0, 1, 2, 3
+
+class FormatError(Exception):
+    pass
+
+def _varint(out, value):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+        pass
+    out.append(value)
+    pass
+
+def _decode(data):
+    '''Returns every varint in the bytes data'''
+    values = []
+    append = values.append
+    result = shift = 0
+    for byte in data:
+        if byte < 0x80:
+            append(result | byte << shift)
+            result = shift = 0
+        else:
+            result |= (byte & 0x7f) << shift
+            shift += 7
+            pass
+        pass
+    return values
+
+def _uint32s(values):
+    data = struct.pack('<{0}I'.format(len(values)), *values)
+    return data
+
+def dumps(tree):
+    '''Returns the binary form of tree'''
+    # number the nodes in pre-order without recursing
+    order = []
+    index = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        index[id(node)] = len(order)
+        order.append(node)
+        stack.extend(reversed(list(node.children())))
+        pass
+
+    # subtree sizes, children are numbered after their parents
+    sizes = [1] * len(order)
+    for ndx in range(len(order) - 1, -1, -1):
+        for child in order[ndx].children():
+            sizes[ndx] += sizes[index[id(child)]]
+            pass
+        pass
+
+    strings = {}
+    records = bytearray()
+    offsets = []
+
+    def value(out, item, parent, nested=False):
+        if item is None:
+            out.append(NONE)
+        elif isinstance(item, str):
+            ndx = strings.get(item)
+            if ndx is None:
+                ndx = strings[item] = len(strings)
+                pass
+            _varint(out, ndx << 2 | STRING)
+        elif isinstance(item, list):
+            if nested:
+                raise ValueError("lists of lists are not supported")
+            _varint(out, len(item) << 2 | LIST)
+            for sub in item:
+                value(out, sub, parent, True)
+                pass
+        else:
+            _varint(out, (index[id(item)] - parent) << 2 | NODE)
+            pass
+        pass
+
+    for ndx, node in enumerate(order):
+        offsets.append(len(records))
+        _varint(records, KIND_IDS[type(node)])
+        _varint(records, sizes[ndx])
+        _varint(records, node.lineno)
+        _varint(records, node.lexpos)
+        for field in node._fields:
+            value(records, getattr(node, field), ndx)
+            pass
+        pass
+
+    data = [string.encode('utf-8', 'surrogatepass') for string in strings]
+    starts = [0]
+    for item in data:
+        starts.append(starts[-1] + len(item))
+        pass
+    offset_table = _uint32s(offsets)
+    string_table = _uint32s(starts) + b''.join(data)
+    # keep the uint32 tables 4 byte aligned so they can be cast in place
+    offsets_at = HEADER.size
+    strings_at = offsets_at + len(offset_table)
+    nodes_at = strings_at + len(string_table)
+    nodes_at += -nodes_at % 4
+    header = HEADER.pack(MAGIC, FORMAT, len(order), len(data), offsets_at, strings_at, nodes_at)
+    padding = b'\0' * (nodes_at - strings_at - len(string_table))
+    return b''.join([header, offset_table, string_table, padding, bytes(records)])
+
+def dump(tree, path):
+    with open(path, 'wb') as fo:
+        fo.write(dumps(tree))
+        pass
+    pass
+
+class Reader(object):
+    '''Decodes nodes out of the binary form in buffer on demand'''
+    __slots__ = ('buffer', 'count', 'offsets', 'starts', 'text', 'records', 'strings', '_mmap')
+
+    def __init__(self, buffer):
+        self._mmap = None
+        view = memoryview(buffer)
+        if len(view) < HEADER.size:
+            raise FormatError("truncated header")
+        magic, version, count, nstrings, offsets_at, strings_at, nodes_at = \
+            HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise FormatError("not an arbor syntax tree")
+        if version != FORMAT:
+            raise FormatError("format {0}, expected {1}".format(version, FORMAT))
+        if sys.byteorder == 'little':
+            self.offsets = view[offsets_at:offsets_at + 4 * count].cast('I')
+            self.starts = view[strings_at:strings_at + 4 * (nstrings + 1)].cast('I')
+        else:
+            self.offsets = struct.unpack_from('<{0}I'.format(count), view, offsets_at)
+            self.starts = struct.unpack_from('<{0}I'.format(nstrings + 1), view, strings_at)
+            pass
+        text_at = strings_at + 4 * (nstrings + 1)
+        self.buffer = buffer
+        self.count = count
+        self.text = view[text_at:text_at + self.starts[nstrings]]
+        self.records = view[nodes_at:]
+        self.strings = [None] * nstrings
+        pass
+
+    def __len__(self):
+        return self.count
+
+    def string(self, ndx):
+        string = self.strings[ndx]
+        if string is None:
+            string = self.strings[ndx] = str(
+                self.text[self.starts[ndx]:self.starts[ndx + 1]], 'utf-8', 'surrogatepass')
+            pass
+        return string
+
+    def _range(self, ndx, end):
+        '''Returns every varint in the records of nodes ndx up to end'''
+        start = self.offsets[ndx]
+        stop = self.offsets[end] if end < self.count else len(self.records)
+        # iterating bytes is much faster than iterating a memoryview
+        return _decode(bytes(self.records[start:stop]))
+
+    def _value(self, raw, ndx, wrap):
+        tag = raw & 3
+        if tag == NODE:
+            return wrap(ndx + (raw >> 2))
+        if tag == STRING:
+            return self.string(raw >> 2)
+        return None
+
+    def record(self, ndx, wrap=None):
+        '''Returns (cls, lineno, lexpos, fields) of node ndx. A field holds
+        a string or None, a Ref for a child node, or a list of those; wrap
+        replaces Ref to turn child indices into something else.'''
+        values = self._range(ndx, ndx + 1)
+        cls = KINDS[values[0]]
+        wrap = wrap or Ref
+        fields = []
+        pos = 4
+        for _ in cls._fields:
+            raw = values[pos]
+            pos += 1
+            if raw & 3 == LIST:
+                count = raw >> 2
+                fields.append([self._value(item, ndx, wrap) for item in values[pos:pos + count]])
+                pos += count
+            else:
+                fields.append(self._value(raw, ndx, wrap))
+                pass
+            pass
+        return cls, values[2], values[3], fields
+
+    def size(self, ndx):
+        '''Returns the number of nodes in the subtree of node ndx'''
+        return self._range(ndx, ndx + 1)[1]
+
+    def node(self, ndx=0):
+        '''Decodes the whole subtree rooted at node ndx into src.ast nodes'''
+        # nodes are in pre-order, so the subtree's records are contiguous
+        # and can be decoded in one go
+        end = ndx + (self.size(ndx) if ndx else self.count)
+        values = self._range(ndx, end)
+        starts = []
+        pos = 0
+        for _ in range(end - ndx):
+            starts.append(pos)
+            fields = FIELD_COUNTS[values[pos]]
+            pos += 4
+            for _ in range(fields):
+                raw = values[pos]
+                pos += 1
+                if raw & 3 == LIST:
+                    pos += raw >> 2
+                    pass
+                pass
+            pass
+        # children come after their parents, so build from the back
+        built = [None] * (end - ndx)
+        string = self.string
+        for offset in range(end - ndx - 1, -1, -1):
+            pos = starts[offset]
+            cls = KINDS[values[pos]]
+            args = []
+            field = pos + 4
+            for _ in cls._fields:
+                raw = values[field]
+                field += 1
+                tag = raw & 3
+                if tag == NODE:
+                    args.append(built[offset + (raw >> 2)])
+                elif tag == STRING:
+                    args.append(string(raw >> 2))
+                elif tag == LIST:
+                    items = []
+                    for item in values[field:field + (raw >> 2)]:
+                        tag = item & 3
+                        if tag == NODE:
+                            items.append(built[offset + (item >> 2)])
+                        elif tag == STRING:
+                            items.append(string(item >> 2))
+                        else:
+                            items.append(None)
+                            pass
+                        pass
+                    field += raw >> 2
+                    args.append(items)
+                else:
+                    args.append(None)
+                    pass
+                pass
+            built[offset] = cls(*args, lineno=values[pos + 2], lexpos=values[pos + 3])
+            pass
+        return built[0]
+
+    def lazy(self, ndx=0):
+        '''Returns node ndx as a LazyNode'''
+        return LazyNode(self, ndx)
+
+    def close(self):
+        for view in (self.offsets, self.starts, self.text, self.records):
+            if isinstance(view, memoryview):
+                view.release()
+                pass
+            pass
+        if self._mmap is not None:
+            self._mmap.close()
+            pass
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        pass
+
+class Ref(int):
+    '''The index of a child node in a record'''
+    __slots__ = ()
+
+class LazyNode(object):
+    '''A node that decodes its record when first touched and its children
+    only when their fields are read'''
+    __slots__ = ('reader', 'index', '_record')
+
+    def __init__(self, reader, index):
+        self.reader = reader
+        self.index = index
+        self._record = None
+        pass
+
+    def _load(self):
+        if self._record is None:
+            self._record = self.reader.record(self.index)
+            pass
+        return self._record
+
+    @property
+    def cls(self):
+        return self._load()[0]
+
+    @property
+    def lineno(self):
+        return self._load()[1]
+
+    @property
+    def lexpos(self):
+        return self._load()[2]
+
+    @property
+    def _fields(self):
+        return self.cls._fields
+
+    def span(self, index):
+        return index.position(self.lexpos)
+
+    def __getattr__(self, name):
+        cls, lineno, lexpos, fields = self._load()
+        try:
+            ndx = cls._fields.index(name)
+        except ValueError:
+            raise AttributeError(name)
+        return self._wrap(fields[ndx])
+
+    def _wrap(self, value):
+        if isinstance(value, Ref):
+            return LazyNode(self.reader, value)
+        if isinstance(value, list):
+            return [self._wrap(item) for item in value]
+        return value
+
+    def node(self):
+        '''Decodes this subtree into src.ast nodes'''
+        return self.reader.node(self.index)
+
+    def __repr__(self):
+        return "LazyNode({0}, {1})".format(self.cls.__name__, self.index)
+
+def loads(data):
+    '''Decodes a whole tree from its binary form'''
+    return Reader(data).node()
+
+def load(path):
+    '''Maps the file at path into memory and returns a Reader over it.
+    Close the reader, or use it as a context manager, to unmap it.'''
+    with open(path, 'rb') as fi:
+        mapped = mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ)
+        pass
+    reader = Reader(mapped)
+    reader._mmap = mapped
+    return reader
@@ -0,0 +1,185 @@
+'''A content addressed on-disk cache of parsed syntax trees.
+
+An entry is keyed by the sha256 of the source bytes and of the front end
+itself (the lexer, parser, parser tables and node classes), so editing the
+grammar invalidates every entry without any bookkeeping. Trees are stored
+in the src.ast.binary format, written to a temporary file and renamed into
+place, which keeps readers in other processes from ever seeing half an
+entry. A hit touches the entry's mtime, and contains() answers whether
+there is one without decoding it; prune() evicts the least recently
+used entries once the cache grows past its size limit.
+'''
+import hashlib
+import os
+import tempfile
+
+from src.ast import binary
+
+DEFAULT_SIZE = 256 * 1024 * 1024
+SUFFIX = '.ast'
+
+# the modules whose source decides what tree a given input parses to
+FRONT_END = (
+    ('lexer', '__init__.py'),
+    ('lexer', 'fast.py'),
+    ('parser', '__init__.py'),
+    ('parser', 'pratt.py'),
+    ('parser', 'parsetab.py'),
+    ('ast', '__init__.py'),
+    ('ast', 'binary.py'),
+)
+
+_version = None
+
+def version():
+    '''Returns a digest of the front end source, computed once per process'''
+    global _version
+    if _version is None:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        digest = hashlib.sha256()
+        for parts in FRONT_END:
+            with open(os.path.join(root, *parts), 'rb') as fi:
+                digest.update(fi.read())
+                pass
+            pass
+        _version = digest.digest()
+        pass
+    return _version
+
+def default_directory():
+    '''ARBOR_CACHE_DIR, or arbor under the user's cache directory'''
+    directory = os.environ.get('ARBOR_CACHE_DIR')
+    if directory:
+        return directory
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'arbor')
+
+class Cache(object):
+    '''Stores parsed trees under directory, keeping it under max_size bytes
+    when pruned. hits, misses, writes and evictions count what this
+    instance has done.'''
+
+    def __init__(self, directory=None, max_size=DEFAULT_SIZE):
+        self.directory = directory or default_directory()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        pass
+
+    def key(self, data):
+        '''Returns the key of source bytes data'''
+        digest = hashlib.sha256(version())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + SUFFIX)
+
+    def get(self, key):
+        '''Returns the tree stored under key, or None'''
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as fi:
+                tree = binary.loads(fi.read())
+                pass
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # a corrupt entry can fail to decode in many ways; drop it
+            self.discard(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return tree
+
+    def contains(self, key):
+        '''Returns whether a tree is stored under key, counting and touching
+        it like get() does but without reading it. Entries are renamed into
+        place whole, so one that exists is complete.'''
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key, tree):
+        '''Stores tree under key. Concurrent writers of the same key each
+        rename a complete file into place, so the last one wins.'''
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fo:
+                fo.write(binary.dumps(tree))
+                pass
+            os.replace(tmp, path)
+        except BaseException:
+            self.discard(tmp)
+            raise
+        self.writes += 1
+        pass
+
+    def discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        pass
+
+    def entries(self):
+        '''Returns (mtime, size, path) of every entry'''
+        found = []
+        if not os.path.isdir(self.directory):
+            return found
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if not entry.name.endswith(SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                found.append((stat.st_mtime, stat.st_size, entry.path))
+                pass
+            pass
+        return found
+
+    def size(self):
+        return sum(size for mtime, size, path in self.entries())
+
+    def prune(self, max_size=None):
+        '''Evicts the least recently used entries until the cache holds at
+        most max_size bytes, and returns how many were evicted'''
+        limit = self.max_size if max_size is None else max_size
+        entries = self.entries()
+        total = sum(size for mtime, size, path in entries)
+        evicted = 0
+        for mtime, size, path in sorted(entries):
+            if total <= limit:
+                break
+            self.discard(path)
+            total -= size
+            evicted += 1
+            pass
+        self.evictions += evicted
+        return evicted
+
+    def clear(self):
+        return self.prune(0)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'writes': self.writes, 'evictions': self.evictions}
+    pass
@@ -0,0 +1,266 @@
+'''The arbor command line.
+
+    arbor [-j JOBS] [--socket PATH] PATH [PATH ...]
+    arbor serve ...
+    arbor run FILE
+
+Every PATH is a source file, a directory searched recursively for .ab files,
+or a glob. Files are lexed and parsed across a pool of processes that load
+the prebuilt parser tables once each. Diagnostics are printed in the order
+the files were given, whatever order the workers finish in. Trees of files
+that parse are kept in a src.cache.Cache, so unchanged files are not lexed
+or parsed again on the next run.
+
+The parser recovers from syntax errors (src.parser.recovery), so every
+error in a file is reported in one run, up to --max-errors of them.
+
+With --socket, or ARBOR_SOCKET set, the files are handed to the daemon that
+`arbor serve` (src.server) runs on that socket, and compiled locally if
+there is none or it fails. The daemon's own -j and cache settings apply then.
+
+--stats profiles every file in this process (see src.profiler) and prints
+the time and memory of each phase, token counts and per rule reduction
+counts and times.
+'''
+import argparse
+import contextlib
+import functools
+import glob
+import io
+import os
+import sys
+
+EXTENSION = '.ab'
+
+class Result(object):
+    '''The outcome of compiling one file'''
+    __slots__ = ('path', 'ok', 'diagnostics', 'cached')
+
+    def __init__(self, path, ok, diagnostics, cached=False):
+        self.path = path
+        self.ok = ok
+        self.diagnostics = diagnostics
+        self.cached = cached
+        pass
+    pass
+
+def _walk(directory):
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(EXTENSION):
+                found.append(os.path.join(root, name))
+                pass
+            pass
+        pass
+    return found
+
+def collect(paths):
+    '''Expands files, directories and globs into a list of source files.
+    Directories and globs are expanded in sorted order and a file named
+    more than once is only compiled once.'''
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(_walk(path))
+        elif glob.has_magic(path):
+            for match in sorted(glob.glob(path, recursive=True)):
+                files.extend(_walk(match) if os.path.isdir(match) else [match])
+                pass
+        else:
+            files.append(path)
+            pass
+        pass
+    seen = set()
+    unique = []
+    for path in files:
+        key = os.path.normpath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+            pass
+        pass
+    return unique
+
+def warm():
+    '''Builds the lexer and loads the parser tables in this process'''
+    from src.lexer import get_lexer
+    from src.parser import get_parser
+    get_lexer()
+    get_parser()
+    pass
+
+def compile_file(path, cache=None, name=None, profiler=None, max_errors=None):
+    '''Lexes and parses path, returning a Result with every error the lexer
+    and parser found, up to max_errors, each prefixed with name, which
+    defaults to the path. With a cache, a file whose tree is cached is not
+    lexed or parsed at all. With a src.profiler.Profiler, the file is
+    parsed through it, reporting the same errors.'''
+    name = name or path
+    from src.diagnostics import MAX_ERRORS
+    from src.lexer import LexerError
+    from src.parser import parse_recover, ParserError
+    out = io.StringIO()
+    ok = True
+    with contextlib.redirect_stdout(out):
+        try:
+            with open(path, 'rb') as fi:
+                data = fi.read()
+                pass
+            if cache is not None:
+                key = cache.key(data)
+                if cache.contains(key):
+                    return Result(name, True, [], cached=True)
+                pass
+            if profiler is not None:
+                tree, errors = profiler.parse_recover(data, max_errors or MAX_ERRORS)
+            else:
+                tree, errors = parse_recover(str(data, 'utf-8'), max_errors or MAX_ERRORS)
+                pass
+            for error in errors:
+                print(error)
+                pass
+            ok = not errors
+            if ok and cache is not None:
+                try:
+                    cache.put(key, tree)
+                except OSError:
+                    # a cache that cannot be written to only costs time
+                    pass
+                pass
+        except (LexerError, ParserError):
+            # the lexer and parser have already printed what went wrong
+            ok = False
+        except (OSError, ValueError) as e:
+            print(e)
+            ok = False
+            pass
+        pass
+    diagnostics = ['{0}: {1}'.format(name, line) for line in out.getvalue().splitlines()]
+    return Result(name, ok, diagnostics)
+
+def compile_files(files, jobs=None, cache=None, max_errors=None):
+    '''Compiles files with up to jobs worker processes and returns their
+    Results in the order of files'''
+    jobs = jobs or os.cpu_count() or 1
+    jobs = min(jobs, len(files))
+    # build before starting the pool so forked workers inherit the tables
+    warm()
+    if jobs <= 1:
+        return [compile_file(path, cache, max_errors=max_errors) for path in files]
+    from concurrent.futures import ProcessPoolExecutor
+    chunksize = max(1, len(files) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=warm) as pool:
+        work = functools.partial(compile_file, cache=cache, max_errors=max_errors)
+        return list(pool.map(work, files, chunksize=chunksize))
+
+def arguments():
+    parser = argparse.ArgumentParser(prog='arbor', description='Compiles Arbor source files.')
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help='source files, directories or globs')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of worker processes (default: one per core)')
+    parser.add_argument('--cache-dir', default=None,
+                        help='where to cache parsed files (default: $ARBOR_CACHE_DIR or ~/.cache/arbor)')
+    parser.add_argument('--cache-size', type=int, default=None, metavar='MB',
+                        help='evict least recently used entries past this size')
+    parser.add_argument('--no-cache', action='store_true', help='parse every file')
+    parser.add_argument('--cache-stats', action='store_true',
+                        help='report cache hits and misses on stderr')
+    parser.add_argument('--max-errors', type=int, default=None, metavar='N',
+                        help='stop reporting errors in a file after N (default: 100)')
+    parser.add_argument('--stats', action='store_true',
+                        help='profile lexing and parsing in this process, without the cache,'
+                        ' and report on stderr')
+    parser.add_argument('--stats-json', metavar='FILE', default=None,
+                        help='also write the profile as JSON to FILE, - for stdout')
+    parser.add_argument('--socket', default=os.environ.get('ARBOR_SOCKET'),
+                        help='compile with the daemon on this socket (default: $ARBOR_SOCKET)')
+    return parser
+
+def remote(path, files):
+    '''Compiles files with the daemon on the socket at path and returns
+    their Results, or None when no daemon answers there or it fails'''
+    from src.cli.client import Client, ServerError
+    try:
+        with Client(path) as client:
+            replies = client.compile([(os.path.abspath(name), name) for name in files])
+            pass
+        return [Result(reply['path'], reply['ok'], reply['diagnostics'], reply['cached'])
+                for reply in replies]
+    except OSError as e:
+        print('arbor: no daemon on {0} ({1}), compiling here'.format(path, e), file=sys.stderr)
+    except (ServerError, ValueError, KeyError, TypeError) as e:
+        # an error reply, or one that is not what the protocol promises
+        print('arbor: the daemon on {0} failed ({1}), compiling here'.format(path, e),
+              file=sys.stderr)
+        pass
+    return None
+
+def main(argv=None):
+    '''Runs the command line, returning the exit status'''
+    if argv is None:
+        argv = sys.argv[1:]
+        pass
+    if argv[:1] == ['serve']:
+        from src import server
+        return server.main(argv[1:])
+    if argv[:1] == ['run']:
+        from src import vm
+        return vm.main(argv[1:])
+    args = arguments().parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        arguments().error('--jobs must be at least 1')
+        pass
+    files = collect(args.paths)
+    if not files:
+        print('arbor: no source files found', file=sys.stderr)
+        return 2
+    cache = results = profiler = None
+    if args.stats or args.stats_json:
+        from src.profiler import Profiler
+        profiler = Profiler()
+        results = [compile_file(path, profiler=profiler, max_errors=args.max_errors)
+                   for path in files]
+        pass
+    if results is None and args.socket:
+        results = remote(args.socket, files)
+        pass
+    if results is None and not args.no_cache:
+        from src.cache import Cache, DEFAULT_SIZE
+        size = DEFAULT_SIZE if args.cache_size is None else args.cache_size * 1024 * 1024
+        cache = Cache(args.cache_dir, size)
+        pass
+    if results is None:
+        results = compile_files(files, args.jobs, cache, args.max_errors)
+        pass
+    failed = 0
+    for result in results:
+        for line in result.diagnostics:
+            print(line)
+            pass
+        if not result.ok:
+            failed += 1
+            pass
+        pass
+    if profiler is not None:
+        print(profiler.stats.format(), file=sys.stderr)
+        if args.stats_json == '-':
+            print(profiler.stats.to_json(indent=2))
+        elif args.stats_json:
+            with open(args.stats_json, 'w') as fo:
+                fo.write(profiler.stats.to_json(indent=2))
+                pass
+            pass
+        pass
+    evicted = cache.prune() if cache is not None else 0
+    if args.cache_stats:
+        hits = sum(1 for result in results if result.cached)
+        print('arbor: cache {0} hits, {1} misses, {2} evicted'.format(
+            hits, len(results) - hits, evicted), file=sys.stderr)
+        pass
+    if failed:
+        print('arbor: {0} of {1} files failed'.format(failed, len(files)), file=sys.stderr)
+        return 1
+    return 0
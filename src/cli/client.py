@@ -0,0 +1,82 @@
+'''A blocking client for the arbor compile daemon.
+
+It only needs the standard library, so `arbor --socket` starts quickly and
+leaves lexing and parsing to the daemon. See src.server for the protocol.
+'''
+import json
+import os
+import socket
+
+def default_socket():
+    '''ARBOR_SOCKET, or arbor.sock in the runtime or temp directory'''
+    path = os.environ.get('ARBOR_SOCKET')
+    if path:
+        return path
+    directory = os.environ.get('XDG_RUNTIME_DIR')
+    if directory:
+        return os.path.join(directory, 'arbor.sock')
+    return os.path.join('/tmp', 'arbor-{0}.sock'.format(os.getuid()))
+
+class ServerError(Exception):
+    '''The daemon answered a request with an error'''
+    pass
+
+class Client(object):
+    '''A connection to the daemon on the socket at path'''
+
+    def __init__(self, path=None, timeout=None):
+        self.path = path or default_socket()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(self.path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.stream = self.sock.makefile('rwb')
+        self.ident = 0
+        pass
+
+    def request(self, method, **params):
+        '''Sends a request and returns its result, raising ServerError'''
+        self.ident += 1
+        line = json.dumps({'id': self.ident, 'method': method, 'params': params})
+        self.stream.write(line.encode() + b'\n')
+        self.stream.flush()
+        reply = self.stream.readline()
+        if not reply:
+            raise ConnectionError("the daemon closed the connection")
+        reply = json.loads(reply)
+        if 'error' in reply:
+            raise ServerError(reply['error'])
+        return reply['result']
+
+    def ping(self):
+        return self.request('ping')
+
+    def compile(self, files):
+        '''Compiles files, a list of paths or of (path, name) pairs'''
+        pairs = [list(item) if isinstance(item, (list, tuple)) else [item, item]
+                 for item in files]
+        return self.request('compile', files=pairs)
+
+    def parse(self, source):
+        return self.request('parse', source=source)
+
+    def stats(self):
+        return self.request('stats')
+
+    def shutdown(self):
+        return self.request('shutdown')
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        pass
@@ -0,0 +1,35 @@
+'''Structured diagnostics for the lexer, parser and resolver.
+
+When asked to recover from errors, the lexer and parser record a Diagnostic
+for each problem rather than printing it and raising. str() of a Diagnostic
+is the same message they print otherwise.
+'''
+
+# the most errors a recovering parse reports before it gives up
+MAX_ERRORS = 100
+
+class Diagnostic(object):
+    '''An error at the 1-based (line, column) span of a source. phase is
+    'lex', 'parse' or 'resolve' and text is the offending input, None at
+    the end of the input.'''
+    __slots__ = ('phase', 'message', 'span', 'lexpos', 'text')
+
+    def __init__(self, phase, message, span=None, lexpos=None, text=None):
+        self.phase = phase
+        self.message = message
+        self.span = span
+        self.lexpos = lexpos
+        self.text = text
+        pass
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return "Diagnostic({0!r}, {1!r}, {2!r})".format(self.phase, self.message, self.span)
+
+    def to_dict(self):
+        return {'phase': self.phase, 'message': self.message,
+                'span': list(self.span) if self.span is not None else None,
+                'lexpos': self.lexpos, 'text': self.text}
+    pass
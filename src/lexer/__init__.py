@@ -1,6 +1,16 @@
-import ply.lex as lex
+import mmap
+import re
+import os
+import sys
+import threading
 
-class LexerError(Exception): pass
+class LexerError(Exception):
+    '''Raised on input the lexer cannot read. span is the 1-based (line,
+    column) of the offending text.'''
+    def __init__(self, span=None):
+        Exception.__init__(self, *(span or ()))
+        self.span = span
+        pass
 
 reserved = {
    'if' : 'IF',
@@ -70,14 +80,36 @@ t_NOT = r'\!'
 
 t_ignore = ' \t'
 
+ESCAPES = {
+    'n': '\n',
+    't': '\t',
+    'r': '\r',
+    '0': '\0',
+    '\\': '\\',
+    '"': '"',
+    "'": "'",
+}
+
+def _escape(match):
+    char = match.group(1)
+    return ESCAPES.get(char, char)
+
+def unescape(text):
+    '''Replaces the backslash escapes in a string literal'''
+    if '\\' not in text:
+        return text
+    return re.sub(r'\\(.)', _escape, text)
+
 def t_HEX(t):
     r'\b0x[0-9a-fA-F]+\b'
-    t.value = str(int(t.value, 16))
+    symbols = t.lexer.symbols
+    t.value = symbols.convert(t.value, 16) if symbols is not None else str(int(t.value, 16))
     return t
 
 def t_OCT(t):
     r'\b0[0-9]+\b'
-    t.value = str(int(t.value, 8))
+    symbols = t.lexer.symbols
+    t.value = symbols.convert(t.value, 8) if symbols is not None else str(int(t.value, 8))
     return t
 
 def t_CHAR(t):
@@ -85,22 +117,44 @@ def t_CHAR(t):
      t.value = t.value[1]
      return t
 
+# Strings end at the first unescaped quote and may not span lines. The
+# pattern is unrolled so it never backtracks more than one character.
 def t_STRING(t):
-     r'".*"'
-     t.value = t.value[1:-1]
+     r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+     t.value = unescape(t.value[1:-1])
      return t
 
 def t_NAME(t):
     r'\b[a-zA-Z_]+([a-zA-Z0-9_])*\b'
     t.type = reserved.get(t.value, "NAME")
+    if t.type == "NAME" and t.lexer.symbols is not None:
+        t.value = t.lexer.symbols.symbol(t.value)
+        pass
     return t
 
 def t_NEWLINE(t):
     r'\n+'
     t.lexer.lineno += len(t.value)
+    t.lexer.linestart = t.lexpos + len(t.value)
 
+# Block comments end at the first */. Only the opening /* goes through the
+# regex, the end is found with str.find so scanning is linear even when the
+# comment is never closed.
 def t_BLOCKCOMMNET(t):
-    r'/\*(.|\n)*\*/'
+    r'/\*'
+    data = t.lexer.lexdata
+    end = data.find('*/', t.lexpos + 2)
+    if end < 0:
+        span = (t.lexer.lineno, t.lexpos - t.lexer.linestart + 1)
+        report(t.lexer.diagnostics, "Unterminated comment at %d:%d" % span, span, t.lexpos, '/*')
+        # recovering, the rest of the input is taken as the comment
+        end = len(data) - 2
+    newlines = data.count('\n', t.lexpos, end)
+    if newlines:
+        t.lexer.lineno += newlines
+        t.lexer.linestart = data.rfind('\n', t.lexpos, end) + 1
+        pass
+    t.lexer.lexpos = end + 2
     pass
 
 def t_COMMENT(t):
@@ -108,20 +162,133 @@ def t_COMMENT(t):
     pass
 
 def t_error(t):
-    print("Illegal character '%s'" % t.value[0])
-    raise LexerError()
-
-lexer = lex.lex()
-
-def lex(data):
-    lexer.input(data)
-    # Tokenize
-    tokens = []
-    while True:
-        tok = lexer.token()
-        if not tok: 
-            break      # No more input
-        tokens.append(tok)
+    span = (t.lexer.lineno, t.lexpos - t.lexer.linestart + 1)
+    report(t.lexer.diagnostics, "Illegal character '%s' at %d:%d" % ((t.value[0],) + span),
+           span, t.lexpos, t.value[0])
+    t.lexer.skip(1)
+
+def report(diagnostics, message, span, lexpos, text):
+    '''Prints message and raises LexerError, or when diagnostics is a list
+    records a src.diagnostics.Diagnostic in it so lexing can go on'''
+    if diagnostics is None:
+        print(message)
+        raise LexerError(span)
+    from src.diagnostics import Diagnostic
+    diagnostics.append(Diagnostic('lex', message, span, lexpos, text))
+    pass
+
+_lexer = None
+_lock = threading.Lock()
+
+def build():
+    '''Builds the PLY lexer from the rules in this module'''
+    import ply.lex
+    lexer = ply.lex.lex(module=sys.modules[__name__])
+    lexer.linestart = 0
+    lexer.diagnostics = None
+    lexer.symbols = None
+    return lexer
+
+def get_lexer():
+    '''Returns the shared lexer, building it on first use. Lex with a Lexer
+    session rather than with this object, which every caller shares.'''
+    global _lexer
+    if _lexer is None:
+        with _lock:
+            if _lexer is None:
+                _lexer = build()
+                pass
+            pass
+        pass
+    return _lexer
+
+def __getattr__(name):
+    if name == 'lexer':
+        return get_lexer()
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+# The lexer implementation lex() and iter_tokens() use by default, either
+# 'ply' or 'fast' (src.lexer.fast). Both produce the same tokens.
+BACKEND = os.environ.get('ARBOR_LEXER', 'ply')
+
+class Lexer(object):
+    '''A lexing session.
+
+    Every session lexes with its own clone of the shared lexer, which copies
+    a few attributes and shares the compiled rules, so sessions are cheap
+    and can run in different threads at once. Each input starts again at
+    line 1. A session lexes one input at a time.
+
+    Every input gets a new src.lexer.symbols.SymbolTable, left in symbols,
+    that its names are interned in. Pass intern=False to skip that.'''
+
+    def __init__(self, backend=None, intern=True):
+        self.backend = backend or BACKEND
+        self.intern = intern
+        self.symbols = None
+        self.lexer = None
+        if self.backend != 'fast':
+            self.lexer = get_lexer().clone()
+            pass
         pass
-    return tokens
 
+    def tokens(self, source, diagnostics=None):
+        '''Yields the tokens of source, each with a 1-based column. When
+        diagnostics is a list, errors are recorded in it and skipped rather
+        than raised.'''
+        symbols = None
+        if self.intern:
+            from src.lexer.symbols import SymbolTable
+            symbols = SymbolTable()
+            pass
+        self.symbols = symbols
+        if self.lexer is None:
+            from src.lexer import fast
+            yield from fast.iter_tokens(read_source(source), diagnostics, symbols)
+            return
+        lexer = self.lexer
+        lexer.lineno = 1
+        lexer.linestart = 0
+        lexer.diagnostics = diagnostics
+        lexer.symbols = symbols
+        lexer.input(read_source(source))
+        while True:
+            tok = lexer.token()
+            if not tok:
+                break
+            tok.column = tok.lexpos - lexer.linestart + 1
+            yield tok
+            pass
+        pass
+
+    def lex(self, source, diagnostics=None):
+        '''Returns the tokens of source as a list'''
+        return list(self.tokens(source, diagnostics))
+
+def lex(data, backend=None):
+    return Lexer(backend).lex(data)
+
+
+def read_source(source):
+    '''Returns the text of source, which may be a str of Arbor code, a path,
+    a file object, or a bytes-like object such as an mmap'''
+    if isinstance(source, str):
+        return source
+    if isinstance(source, os.PathLike):
+        with open(source, 'rb') as fi:
+            if os.fstat(fi.fileno()).st_size == 0:
+                return ''
+            with mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return read_source(mm)
+    if hasattr(source, 'read') and not isinstance(source, mmap.mmap):
+        source = source.read()
+    if isinstance(source, str):
+        return source
+    return str(source, 'utf-8')
+
+def iter_tokens(source, backend=None):
+    '''Yields the tokens of source one at a time instead of building a list.
+
+    Every token gets a 1-based column next to its lineno. Each call lexes with
+    its own Lexer session, so line numbers always start at 1.'''
+    yield from Lexer(backend).tokens(source)
@@ -0,0 +1,123 @@
+'''A compact struct-of-arrays store for token streams.
+
+A TokenBuffer keeps one small int per token for its kind and the line,
+column and offset in array columns. Token values go into an interned string
+table, so a name used a thousand times is stored once.
+'''
+from array import array
+
+from src.lexer import tokens, iter_tokens
+
+# kind id -> token type, in the order of src.lexer.tokens
+KINDS = tuple(tokens)
+KIND_IDS = dict((name, ndx) for ndx, name in enumerate(KINDS))
+
+class StringTable(object):
+    '''Interns strings and hands out a small int id for each distinct one'''
+    __slots__ = ('strings', 'ids')
+
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+        pass
+
+    def intern(self, string):
+        ndx = self.ids.get(string)
+        if ndx is None:
+            ndx = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+            pass
+        return ndx
+
+    def __getitem__(self, ndx):
+        return self.strings[ndx]
+
+    def __len__(self):
+        return len(self.strings)
+
+class TokenView(object):
+    '''Read only, index based access to a TokenBuffer.
+
+    The columns are memoryviews over the buffer's arrays, so indexing them
+    yields plain ints and never builds a token object.'''
+    __slots__ = ('kinds', 'values', 'linenos', 'columns', 'lexposes', 'strings')
+
+    def __init__(self, buf):
+        self.kinds = memoryview(buf.kinds)
+        self.values = memoryview(buf.values)
+        self.linenos = memoryview(buf.linenos)
+        self.columns = memoryview(buf.columns)
+        self.lexposes = memoryview(buf.lexposes)
+        self.strings = buf.strings.strings
+        pass
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def type(self, ndx):
+        return KINDS[self.kinds[ndx]]
+
+    def value(self, ndx):
+        return self.strings[self.values[ndx]]
+
+    def release(self):
+        '''Releases the memoryviews so the buffer can grow again'''
+        for column in (self.kinds, self.values, self.linenos, self.columns, self.lexposes):
+            column.release()
+            pass
+        pass
+
+class TokenBuffer(object):
+    '''Stores a token stream column by column'''
+    __slots__ = ('kinds', 'values', 'linenos', 'columns', 'lexposes', 'strings')
+
+    def __init__(self, strings=None):
+        self.kinds = array('B')
+        self.values = array('I')
+        self.linenos = array('I')
+        self.columns = array('I')
+        self.lexposes = array('I')
+        self.strings = strings if strings is not None else StringTable()
+        pass
+
+    @classmethod
+    def from_source(cls, source, strings=None):
+        '''Lexes source straight into a new buffer without a token list'''
+        buf = cls(strings)
+        for tok in iter_tokens(source):
+            buf.append(tok.type, tok.value, tok.lineno, tok.column, tok.lexpos)
+            pass
+        return buf
+
+    def append(self, type, value, lineno, column, lexpos):
+        self.kinds.append(KIND_IDS[type])
+        self.values.append(self.strings.intern(value))
+        self.linenos.append(lineno)
+        self.columns.append(column)
+        self.lexposes.append(lexpos)
+        pass
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def view(self):
+        return TokenView(self)
+
+    def token(self, ndx):
+        '''Builds a LexToken for a single entry'''
+        from ply.lex import LexToken
+        tok = LexToken()
+        tok.type = KINDS[self.kinds[ndx]]
+        tok.value = self.strings[self.values[ndx]]
+        tok.lineno = self.linenos[ndx]
+        tok.column = self.columns[ndx]
+        tok.lexpos = self.lexposes[ndx]
+        return tok
+
+    def __iter__(self):
+        '''Yields LexTokens one at a time, so src.parser.parse can consume a
+        buffer directly'''
+        for ndx in range(len(self.kinds)):
+            yield self.token(ndx)
+            pass
+        pass
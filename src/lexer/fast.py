@@ -0,0 +1,189 @@
+'''A hand written lexer backend that produces the same tokens as PLY.
+
+The rules of src.lexer are combined into precompiled patterns with a named
+group per rule, ordered the way PLY orders them: function rules by line
+number, then string rules by decreasing pattern length. Instead of trying
+every rule at every position, the first character picks a pattern holding
+only the rules that can start with it. The token actions are inlined into a
+single loop and keywords come from a lookup table built from
+src.lexer.reserved, so no Python function is called per token.
+
+Select it with backend='fast' on src.lexer.lex()/iter_tokens() or by setting
+ARBOR_LEXER=fast.
+'''
+import re
+
+from ply.lex import LexToken
+
+import src.lexer as rules
+from src.lexer import report, reserved, unescape
+
+DIGITS = '0123456789'
+LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_'
+
+# The characters each rule can start with. Rules missing here are tried at
+# every position, the differential tests keep this table honest.
+FIRST = {
+    't_HEX': '0',
+    't_OCT': '0',
+    't_CHAR': "'",
+    't_STRING': '"',
+    't_NAME': LETTERS,
+    't_NEWLINE': '\n',
+    't_BLOCKCOMMNET': '/',
+    't_COMMENT': '/',
+    't_INT': '-' + DIGITS,
+    't_FLOAT': '-.' + DIGITS,
+    't_PLUS': '+',
+    't_MULTI': '*',
+    't_DIV': '/',
+    't_SUB': '-',
+    't_LPAREN': '(',
+    't_RPAREN': ')',
+    't_COLON': ':',
+    't_COMMA': ',',
+    't_SEMICOLON': ';',
+    't_ARROW': '-',
+    't_EQ': '=',
+    't_EQCOMP': '=',
+    't_NEQ': '!',
+    't_LT': '<',
+    't_GT': '>',
+    't_LTE': '<',
+    't_GTE': '>',
+    't_AND': '&',
+    't_OR': '|',
+    't_NOT': '!',
+}
+
+def _ordered():
+    '''Returns (name, regex) for every rule, in PLY's match order'''
+    funcs = []
+    strings = []
+    for name, rule in vars(rules).items():
+        if not name.startswith('t_') or name in ('t_error', 't_ignore'):
+            continue
+        if callable(rule):
+            funcs.append((rule.__code__.co_firstlineno, name, rule.__doc__))
+            pass
+        else:
+            strings.append((name, rule))
+            pass
+        pass
+    funcs.sort()
+    strings.sort(key=lambda rule: len(rule[1]), reverse=True)
+    return [(name, regex) for _, name, regex in funcs] + strings
+
+def _combine(ordered):
+    return re.compile('|'.join(
+        '(?P<{0}>{1})'.format(name, regex) for name, regex in ordered), re.VERBOSE)
+
+def _dispatch():
+    '''Returns a map of first character -> combined pattern of the rules that
+    can start with it, and the pattern for every other character'''
+    ordered = _ordered()
+    anywhere = [rule for rule in ordered if rule[0] not in FIRST]
+    chars = set(''.join(FIRST.values()))
+    table = {}
+    for char in chars:
+        table[char] = _combine([rule for rule in ordered
+                                if rule[0] not in FIRST or char in FIRST[rule[0]]])
+        pass
+    return table, _combine(anywhere) if anywhere else None
+
+DISPATCH, OTHER = _dispatch()
+KEYWORDS = dict(reserved)
+
+# actions for the rules that do more than emit their text
+NAME, HEX, OCT, CHAR, STRING, NEWLINE, BLOCK, COMMENT = range(8)
+ACTIONS = {
+    't_NAME': NAME,
+    't_HEX': HEX,
+    't_OCT': OCT,
+    't_CHAR': CHAR,
+    't_STRING': STRING,
+    't_NEWLINE': NEWLINE,
+    't_BLOCKCOMMNET': BLOCK,
+    't_COMMENT': COMMENT,
+}
+
+def iter_tokens(data, diagnostics=None, symbols=None):
+    '''Yields LexTokens for data, with lineno, lexpos and column set. When
+    diagnostics is a list, errors are recorded in it and skipped. Names are
+    interned in symbols, a src.lexer.symbols.SymbolTable, if given.'''
+    dispatch = DISPATCH
+    other = OTHER
+    ignore = rules.t_ignore
+    actions = ACTIONS
+    keywords = KEYWORDS
+    pos = 0
+    end = len(data)
+    lineno = 1
+    linestart = 0
+    while pos < end:
+        char = data[pos]
+        if char in ignore:
+            pos += 1
+            continue
+        pattern = dispatch.get(char, other)
+        m = pattern.match(data, pos) if pattern is not None else None
+        if m is None:
+            span = (lineno, pos - linestart + 1)
+            report(diagnostics, "Illegal character '%s' at %d:%d" % ((char,) + span),
+                   span, pos, char)
+            pos += 1
+            continue
+        rule = m.lastgroup
+        value = m.group()
+        nxt = m.end()
+        action = actions.get(rule)
+        if action is None:
+            typ = rule[2:]
+        elif action == NAME:
+            typ = keywords.get(value, 'NAME')
+            if typ == 'NAME' and symbols is not None:
+                value = symbols.symbol(value)
+                pass
+        elif action == NEWLINE:
+            lineno += nxt - pos
+            linestart = pos = nxt
+            continue
+        elif action == COMMENT:
+            pos = nxt
+            continue
+        elif action == BLOCK:
+            close = data.find('*/', pos + 2)
+            if close < 0:
+                span = (lineno, pos - linestart + 1)
+                report(diagnostics, "Unterminated comment at %d:%d" % span, span, pos, '/*')
+                close = end - 2
+            newlines = data.count('\n', pos, close)
+            if newlines:
+                lineno += newlines
+                linestart = data.rfind('\n', pos, close) + 1
+                pass
+            pos = close + 2
+            continue
+        elif action == STRING:
+            typ = 'STRING'
+            value = unescape(value[1:-1])
+        elif action == CHAR:
+            typ = 'CHAR'
+            value = value[1]
+        elif action == HEX:
+            typ = 'HEX'
+            value = symbols.convert(value, 16) if symbols is not None else str(int(value, 16))
+        else:
+            typ = 'OCT'
+            value = symbols.convert(value, 8) if symbols is not None else str(int(value, 8))
+            pass
+        tok = LexToken()
+        tok.type = typ
+        tok.value = value
+        tok.lineno = lineno
+        tok.lexpos = pos
+        tok.column = pos - linestart + 1
+        yield tok
+        pos = nxt
+        pass
+    pass
@@ -0,0 +1,56 @@
+'''Maps offsets in a source to 1-based (line, column) positions.
+
+A LineIndex holds the offset every line starts at, found in one pass over
+the source, so turning an offset into a position is a binary search instead
+of a scan back to the previous newline. Build one per source and reuse it
+for every node, token and diagnostic that needs a position.
+'''
+import bisect
+import re
+from array import array
+
+_NEWLINE = re.compile('\n')
+
+class LineIndex(object):
+    '''The line start offsets of one source'''
+    __slots__ = ('starts', 'length')
+
+    def __init__(self, source):
+        self.starts = array('q', [0])
+        self.starts.extend(m.end() for m in _NEWLINE.finditer(source))
+        self.length = len(source)
+        pass
+
+    def __len__(self):
+        '''The number of lines, counting the one after a trailing newline'''
+        return len(self.starts)
+
+    def line(self, offset):
+        '''Returns the 1-based line offset is on'''
+        return bisect.bisect_right(self.starts, offset)
+
+    def column(self, offset):
+        '''Returns the 1-based column of offset'''
+        return offset - self.starts[bisect.bisect_right(self.starts, offset) - 1] + 1
+
+    def position(self, offset):
+        '''Returns the (line, column) of offset, both 1-based'''
+        line = bisect.bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+    def offset(self, line, column=1):
+        '''Returns the offset of a 1-based (line, column)'''
+        if not 1 <= line <= len(self.starts):
+            raise IndexError("line {0} out of range".format(line))
+        return self.starts[line - 1] + column - 1
+
+    def line_range(self, line):
+        '''Returns the (start, end) offsets of a line, without its newline'''
+        start = self.offset(line)
+        end = self.starts[line] - 1 if line < len(self.starts) else self.length
+        return start, end
+
+    def span(self, node):
+        '''Returns the (line, column) of a node or token'''
+        return self.position(node.lexpos)
+    pass
@@ -0,0 +1,64 @@
+'''The symbol table of one compilation.
+
+A Lexer session interns every identifier it reads in a SymbolTable, so a
+name used a thousand times is one string object shared by all its tokens
+and tree nodes. Equal names are then the same object, which makes comparing
+and hashing them cheap, and every distinct name has a small int id that
+later stages can index arrays with.
+
+The table also keeps the native value of every numeric literal, parsed the
+first time it is asked for or, for hex and octal literals, when the lexer
+converts them to decimal. Tokens and tree nodes keep the literal text, the
+form src.parser.parse returns.
+'''
+from src.lexer.buffer import StringTable
+
+# literal token types and node tags -> how to read the decimal text
+NUMBERS = {
+    'INT': int,
+    'HEX': int,
+    'OCT': int,
+    'FLOAT': float,
+    'int': int,
+    'float': float,
+}
+
+class SymbolTable(StringTable):
+    '''Interns names, handing out an id for each, and caches literal values.
+    intern() returns the id of a name and table[id] the name.'''
+    __slots__ = ('numbers',)
+
+    def __init__(self):
+        StringTable.__init__(self)
+        self.numbers = {}
+        pass
+
+    def symbol(self, name):
+        '''Returns the one string object the table keeps for name'''
+        ndx = self.ids.get(name)
+        if ndx is None:
+            ndx = self.intern(name)
+            pass
+        return self.strings[ndx]
+
+    def id(self, name):
+        '''Returns the id of name, None when it was never interned'''
+        return self.ids.get(name)
+
+    def convert(self, text, base):
+        '''Returns the decimal text of an integer literal in base, keeping
+        its value so it is not parsed again'''
+        value = int(text, base)
+        text = str(value)
+        self.numbers[text] = value
+        return text
+
+    def number(self, text, kind='INT'):
+        '''Returns the int or float value of a literal's text, kind being its
+        token type or node tag'''
+        value = self.numbers.get(text)
+        if value is None:
+            value = self.numbers[text] = NUMBERS[kind](text)
+            pass
+        return value
+    pass
@@ -0,0 +1,353 @@
+'''Optimization passes over src.ast trees.
+
+Optimizer folds constant expressions, applies algebraic identities and
+prunes branches that can never run, rewriting a tree from src.parser in
+place:
+
+    2 + 4 * 8           -> 34         ints, floats, chars, hex and octal
+    'a' + 1             -> 98         chars compute with their code point
+    1 < 2 && 3 > 4      -> false      comparisons and && || ! give booleans
+    x * 1, x + 0, x / 1 -> x          and 1 * x, 0 + x, x - 0, x a number
+    if (1 > 2) -> ... done;           dropped, as are else ifs never taken
+
+Folding computes what src.vm computes, so `7 / 2` folds to 3 and an
+expression that would fail at run time, such as a division by zero, is
+left for the program to fail on. An identity is only applied when the
+other operand is known to be a number, since a char, boolean or string
+plus 0 is an int or an error; x + 0 and 0 + x also need an int, as
+-0.0 + 0 is 0.0. Numeric literals and arithmetic on known numbers are
+known numbers, and so is a variable whose name the program declares only
+once, with let or const, and never assigns again, when it is declared
+with a known number. Parameters are not, whatever type they are given,
+since src.vm does not check it. A branch whose condition is always true keeps its body, moved into the
+enclosing block unless it declares variables.
+
+A Report counts the nodes in the tree before and after and what was done.
+'''
+import collections
+import math
+import operator
+
+from src import ast
+from src.lexer.symbols import SymbolTable
+from src.vm import Char as CharValue, divide
+
+ARITHMETIC = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': divide}
+COMPARE = {'==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le,
+           '>': operator.gt, '>=': operator.ge}
+
+# the nodes whose value is always a boolean
+BOOLEAN = (ast.Comps, ast.Bool, ast.Not, ast.Boolean)
+
+MISSING = object()
+
+def count(node):
+    '''Returns the number of nodes in the tree under node'''
+    total = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        total += 1
+        stack.extend(node.children())
+        pass
+    return total
+
+def bindings(tree):
+    '''Returns the names tree declares exactly once, counting parameters,
+    and never assigns to after declaring them'''
+    declared = collections.Counter()
+    assigned = set()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Decl, ast.Param, ast.ParamType)):
+            declared[node.name] += 1
+        elif type(node) is ast.Assign and not isinstance(node.target, ast.Decl):
+            assigned.add(node.target.name)
+            pass
+        stack.extend(node.children())
+        pass
+    return set(name for name, times in declared.items() if times == 1) - assigned
+
+def declares(body):
+    '''Whether a list of statements declares a variable itself'''
+    for statement in body:
+        if isinstance(statement, ast.Assign):
+            statement = statement.target
+            pass
+        if isinstance(statement, ast.Decl):
+            return True
+        pass
+    return False
+
+class Report(object):
+    '''What one optimization run did'''
+    __slots__ = ('before', 'after', 'folded', 'simplified', 'pruned')
+
+    def __init__(self):
+        self.before = 0
+        self.after = 0
+        self.folded = 0
+        self.simplified = 0
+        self.pruned = 0
+        pass
+
+    @property
+    def eliminated(self):
+        return self.before - self.after
+
+    def __str__(self):
+        return ("eliminated {0} of {1} nodes: {2} folded, {3} simplified,"
+                " {4} branches pruned".format(self.eliminated, self.before, self.folded,
+                                              self.simplified, self.pruned))
+
+    def to_dict(self):
+        return {'before': self.before, 'after': self.after, 'eliminated': self.eliminated,
+                'folded': self.folded, 'simplified': self.simplified, 'pruned': self.pruned}
+    pass
+
+class Optimizer(ast.NodeVisitor):
+    '''Optimizes trees, adding what it does to report. Literal values are
+    read through symbols, a src.lexer.symbols.SymbolTable.'''
+
+    def __init__(self, symbols=None):
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.report = Report()
+        # the variables of the tree being optimized that are bound once, and
+        # int or float for those bound to a known number
+        self.single = set()
+        self.numbers = {}
+        pass
+
+    def optimize(self, tree):
+        '''Optimizes a Statements tree in place and returns it'''
+        report = self.report
+        report.before += count(tree)
+        self.single = bindings(tree)
+        self.numbers = {}
+        tree.body = self.block(tree.body)
+        report.after += count(tree)
+        return tree
+
+    def number(self, node):
+        '''Returns int or float when node is known to compute one, None when
+        its type is not known'''
+        typ = type(node)
+        if typ is ast.Int:
+            return int
+        if typ is ast.Float:
+            return float
+        if typ is ast.Usage:
+            return self.numbers.get(node.name)
+        if typ is ast.BinOp:
+            left, right = self.number(node.left), self.number(node.right)
+            if left is None or right is None:
+                return None
+            return float if float in (left, right) else int
+        return None
+
+    def value(self, node):
+        '''Returns the value of a constant node as src.vm computes with it,
+        MISSING for anything else'''
+        typ = type(node)
+        if typ is ast.Int:
+            return self.symbols.number(node.value, 'int')
+        if typ is ast.Float:
+            return self.symbols.number(node.value, 'float')
+        if typ is ast.Char:
+            return CharValue(ord(node.value))
+        if typ is ast.Boolean:
+            return node.value == 'true'
+        return MISSING
+
+    def constant(self, value, node):
+        '''Returns a constant node for value at the position of node, None
+        when no literal can hold it'''
+        if type(value) is bool:
+            return ast.Boolean('true' if value else 'false', node.lineno, node.lexpos)
+        if type(value) is int:
+            return ast.Int(str(value), node.lineno, node.lexpos)
+        if type(value) is float and math.isfinite(value):
+            return ast.Float(repr(value), node.lineno, node.lexpos)
+        return None
+
+    def fold(self, func, left, right, node):
+        try:
+            result = self.constant(func(left, right), node)
+        except (ArithmeticError, TypeError, ValueError):
+            return node
+        if result is None:
+            return node
+        self.report.folded += 1
+        return result
+
+    def block(self, body):
+        '''Returns the optimized list of statements body'''
+        result = []
+        for statement in body:
+            if statement is None:
+                result.append(statement)
+                continue
+            statement = self.visit(statement)
+            if isinstance(statement, list):
+                result.extend(statement)
+            else:
+                result.append(statement)
+                pass
+            pass
+        return result
+
+    def inline(self, body, node):
+        '''Returns the statements that replace a branch always taken'''
+        if declares(body):
+            # keep the block the declarations are scoped to
+            return [ast.If(ast.Boolean('true', node.lineno, node.lexpos), body,
+                           node.lineno, node.lexpos)]
+        return body
+
+    def generic_visit(self, node):
+        for field in node._fields:
+            value = getattr(node, field)
+            if isinstance(value, ast.Node):
+                setattr(node, field, self.visit(value))
+            elif isinstance(value, list):
+                setattr(node, field, [self.visit(item) if isinstance(item, ast.Node) else item
+                                      for item in value])
+                pass
+            pass
+        return node
+
+    def visit_Block(self, node):
+        node.body = self.block(node.body)
+        return node
+
+    def visit_Assign(self, node):
+        node = self.generic_visit(node)
+        target = node.target
+        if isinstance(target, ast.Decl) and target.name in self.single:
+            kind = self.number(node.value)
+            if kind is not None:
+                self.numbers[target.name] = kind
+                pass
+            pass
+        return node
+
+    def visit_BinOp(self, node):
+        left = node.left = self.visit(node.left)
+        right = node.right = self.visit(node.right)
+        lvalue, rvalue = self.value(left), self.value(right)
+        if lvalue is not MISSING and rvalue is not MISSING:
+            return self.fold(ARITHMETIC[node.op], lvalue, rvalue, node)
+        op = node.op
+        # an int identity on one side leaves the other when that is known
+        # to be a number, an int for + 0
+        if type(rvalue) is int:
+            kind = self.number(left)
+            if kind is None:
+                return node
+            if (rvalue == 0 and (op == '-' or (op == '+' and kind is int))
+                    or (rvalue == 1 and op in '*/')):
+                self.report.simplified += 1
+                return left
+        elif type(lvalue) is int:
+            kind = self.number(right)
+            if kind is None:
+                return node
+            if (lvalue == 0 and op == '+' and kind is int) or (lvalue == 1 and op == '*'):
+                self.report.simplified += 1
+                return right
+            pass
+        return node
+
+    def visit_Comps(self, node):
+        left = node.left = self.visit(node.left)
+        right = node.right = self.visit(node.right)
+        lvalue, rvalue = self.value(left), self.value(right)
+        if lvalue is not MISSING and rvalue is not MISSING:
+            return self.fold(COMPARE[node.op], lvalue, rvalue, node)
+        return node
+
+    def visit_Bool(self, node):
+        left = node.left = self.visit(node.left)
+        right = node.right = self.visit(node.right)
+        lvalue = self.value(left)
+        if lvalue is MISSING:
+            return node
+        # && is decided by a false left side, || by a true one
+        if bool(lvalue) != (node.op == '&&'):
+            return self.fold(lambda a, b: bool(a), lvalue, None, node)
+        rvalue = self.value(right)
+        if rvalue is not MISSING:
+            return self.fold(lambda a, b: bool(b), lvalue, rvalue, node)
+        if isinstance(right, BOOLEAN):
+            self.report.simplified += 1
+            return right
+        return node
+
+    def visit_Not(self, node):
+        operand = node.operand = self.visit(node.operand)
+        value = self.value(operand)
+        if value is not MISSING:
+            return self.fold(lambda a, b: not a, value, None, node)
+        if isinstance(operand, ast.Not) and isinstance(operand.operand, BOOLEAN):
+            self.report.simplified += 1
+            return operand.operand
+        return node
+
+    def visit_If(self, node):
+        node.cond = self.visit(node.cond)
+        node.body = self.block(node.body)
+        value = self.value(node.cond)
+        if value is MISSING:
+            return node
+        if value:
+            return self.inline(node.body, node)
+        self.report.pruned += 1
+        return []
+
+    def visit_IfElse(self, node):
+        branches = []
+        orelse = node
+        while isinstance(orelse, ast.IfElse):
+            orelse.cond = self.visit(orelse.cond)
+            orelse.body = self.block(orelse.body)
+            branches.append(orelse)
+            orelse = orelse.orelse
+            pass
+        if orelse is not None:
+            orelse.body = self.block(orelse.body)
+            pass
+        kept = []
+        decided = False
+        for ndx, branch in enumerate(branches):
+            value = self.value(branch.cond)
+            if value is MISSING:
+                kept.append(branch)
+                continue
+            decided = True
+            if value:
+                # the branch becomes the else, the ones after never run
+                self.report.pruned += len(branches) - ndx - 1 + (orelse is not None)
+                orelse = ast.Else(branch.body, branch.lineno, branch.lexpos)
+                break
+            self.report.pruned += 1
+            pass
+        if not decided:
+            return node
+        if not kept:
+            return [] if orelse is None else self.inline(orelse.body, orelse)
+        if len(kept) == 1 and orelse is None:
+            first = kept[0]
+            return ast.If(first.cond, first.body, first.lineno, first.lexpos)
+        for ndx in range(len(kept) - 1, -1, -1):
+            branch = kept[ndx]
+            cls = ast.IfElse if ndx == 0 else ast.ElseIf
+            orelse = cls(branch.cond, branch.body, orelse, branch.lineno, branch.lexpos)
+            pass
+        return orelse
+    pass
+
+def optimize(tree, symbols=None):
+    '''Optimizes a Statements tree in place, returning it and a Report'''
+    optimizer = Optimizer(symbols)
+    return optimizer.optimize(tree), optimizer.report
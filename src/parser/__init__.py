@@ -1,17 +1,60 @@
-import ply.yacc as yacc
-
-from src.lexer import tokens
+import contextlib
+import copy
+import os
+import threading
+
+from src import ast
+from src.lexer import tokens, get_lexer, Lexer
+from src.diagnostics import MAX_ERRORS
+from src.lexer.lines import LineIndex
+
+# The LALR tables live in the versioned parsetab.py next to this file. They
+# are only regenerated when the grammar signature no longer matches; set
+# ARBOR_DEBUG to also write the parser.out report.
+TABMODULE = 'src.parser.parsetab'
+OUTPUTDIR = os.path.dirname(os.path.abspath(__file__))
+DEBUG = bool(os.environ.get('ARBOR_DEBUG'))
 
 start = 's'
 
+# Binary operators from loosest to tightest binding. All of them are left
+# associative, so 8 - 4 - 2 is (8 - 4) - 2 and 2 * 3 + 1 is (2 * 3) + 1. NOT
+# binds tighter than every binary operator. The recursive descent backend in
+# src.parser.pratt reads its binding powers from this table too.
+precedence = (
+    ('left', 'OR'),
+    ('left', 'AND'),
+    ('left', 'EQCOMP', 'NEQ', 'LT', 'LTE', 'GT', 'GTE'),
+    ('left', 'PLUS', 'SUB'),
+    ('left', 'MULTI', 'DIV'),
+    ('right', 'NOT'),
+)
+
 class ParserError(Exception):
-    def __init__(self, p):
+    '''Raised on a syntax error at token p, None at the end of input. span
+    is the 1-based (line, column) of the error once it is reported.'''
+    def __init__(self, p, span=None):
         self.p = p
+        self.span = span
         pass
 
+def _pos(p, n):
+    '''Returns the (lineno, lexpos) of symbol n, taken from the token itself
+    or from the node a nonterminal reduced to'''
+    sym = p.slice[n]
+    if hasattr(sym, 'lexpos'):
+        return sym.lineno, sym.lexpos
+    return sym.value.lineno, sym.value.lexpos
+
+def _mark(p, n):
+    '''Gives the result symbol the position of token n, so rules whose value
+    is not a node can still be located'''
+    p.slice[0].lineno = p.lineno(n)
+    p.slice[0].lexpos = p.lexpos(n)
+
 def p_start(p):
     '''s : statements'''
-    p[0] = ['statements', p[1]]
+    p[0] = ast.Statements(p[1])
     pass
 
 def p_empty(p):
@@ -22,7 +65,8 @@ def p_statements(p):
     '''statements : statements statement
                    | empty'''
     if (p[1] is not None):
-        p[0] = p[1] + [p[2], ]
+        p[1].append(p[2])
+        p[0] = p[1]
         pass
     elif (len(p) >= 3):
         p[0] = [p[2], ]
@@ -39,34 +83,34 @@ def p_statement(p):
 def p_booleanOps(p):
     '''expression : expression AND expression
                   | expression OR expression'''
-    p[0] = ["bool", p[1], p[2], p[3]]
+    p[0] = ast.Bool(p[1], p[2], p[3], *_pos(p, 1))
     pass
 
 def p_not(p):
     '''expression : NOT expression'''
-    p[0] = ["not", p[2]]
+    p[0] = ast.Not(p[2], *_pos(p, 1))
     pass
 
 def p_int(p):
     '''constant : INT
                 | HEX
                 | OCT'''
-    p[0] = ['int', p[1]]
+    p[0] = ast.Int(p[1], *_pos(p, 1))
     pass
 
 def p_char(p):
     '''constant : CHAR'''
-    p[0] = ["char", p[1]]
+    p[0] = ast.Char(p[1], *_pos(p, 1))
     pass
 
 def p_float(p):
     '''constant : FLOAT'''
-    p[0] = ['float', p[1]]
+    p[0] = ast.Float(p[1], *_pos(p, 1))
     pass
 
 def p_string(p):
     '''constant : STRING'''
-    p[0] = ["array[char]", p[1]]
+    p[0] = ast.String(p[1], *_pos(p, 1))
     pass
 
 def p_constant(p):
@@ -76,12 +120,12 @@ def p_constant(p):
 
 def p_use(p):
     '''usage : NAME'''
-    p[0] = ["usage", p[1]]
+    p[0] = ast.Usage(p[1], *_pos(p, 1))
     pass
 
 def p_funcUsage(p):
     '''usage : NAME LPAREN commas_param RPAREN'''
-    p[0] = ["func use", p[1], p[3]]
+    p[0] = ast.FuncUse(p[1], p[3], *_pos(p, 1))
     pass
 
 def p_usage(p):
@@ -96,7 +140,7 @@ def p_declaration(p):
 
 def p_return(p):
     '''expression : RETURN expression'''
-    p[0] = ["return", p[2]]
+    p[0] = ast.Return(p[2], *_pos(p, 1))
     pass
 
 def p_bin_op(p):
@@ -104,28 +148,29 @@ def p_bin_op(p):
                   | expression SUB expression
                   | expression MULTI expression
                   | expression DIV expression'''
-    p[0] = ['binop', p[1], p[2], p[3]]
+    p[0] = ast.BinOp(p[1], p[2], p[3], *_pos(p, 1))
 
 def p_assignment(p):
     '''expression : usage EQ expression
                   | decl EQ expression'''
-    p[0] = ["assign", p[1], p[3]]
+    p[0] = ast.Assign(p[1], p[3], *_pos(p, 1))
     
 def p_decl(p):
     '''decl : LET NAME'''
-    p[0] = ["decl", p[2]]
+    p[0] = ast.Decl(p[2], *_pos(p, 1))
     pass
 
 def p_constDecl(p):
     '''decl : CONST NAME'''
-    p[0] = ["declConst", p[2]]
+    p[0] = ast.DeclConst(p[2], *_pos(p, 1))
     pass
 
 def p_commaList(p):
     '''commas : param
-              | param COMMA commas'''
+              | commas COMMA param'''
     if (len(p) >= 4):
-        p[0] = p[3] + [p[1], ]
+        p[1].append(p[3])
+        p[0] = p[1]
         pass
     else:
         p[0] = [p[1], ]
@@ -133,21 +178,26 @@ def p_commaList(p):
 
 def p_param(p):
     '''param : NAME'''
-    p[0] = ['param', p[1]]
+    p[0] = ast.Param(p[1], *_pos(p, 1))
     pass
 
 def p_paramUse(p):
     '''paramuse : NAME
                 | constant
                 | empty'''
-    p[0] = p[1]
-    pass
+    if p.slice[1].type == 'NAME':
+        p[0] = ast.Usage(p[1], *_pos(p, 1))
+        pass
+    else:
+        p[0] = p[1]
+        pass
 
 def p_paramList(p):
     '''commas_param : paramuse
-                    | paramuse COMMA commas_param'''
+                    | commas_param COMMA paramuse'''
     if (len(p) >= 4):
-        p[0] = p[3] + [p[1], ]
+        p[1].append(p[3])
+        p[0] = p[1]
         pass
     else:
         p[0] = [p[1], ]
@@ -169,7 +219,7 @@ def p_type(p):
 
 def p_paramTypeDef(p):
     '''paramtype : NAME COLON type'''
-    p[0] = ['paramtype', p[1], p[3]]
+    p[0] = ast.ParamType(p[1], p[3], *_pos(p, 1))
 
 def p_paramType(p):
     '''param : paramtype'''
@@ -179,14 +229,19 @@ def p_paramType(p):
 def p_defaultParam(p):
     '''param : NAME EQ constant
              | paramtype EQ constant'''
-    p[0] = ["default", p[1], p[3]]
+    param = p[1]
+    if isinstance(param, str):
+        param = ast.Param(param, *_pos(p, 1))
+        pass
+    p[0] = ast.Default(param, p[3], *_pos(p, 1))
     pass
 
 def p_list(p):
     '''paramlist : LPAREN commas RPAREN
                  | LPAREN RPAREN'''
+    _mark(p, 1)
     if (p[2] != ')'):
-        p[0] = ["params", p[2], ]
+        p[0] = ast.Params(p[2], *_pos(p, 1))
         pass
     else:
         p[0] = None
@@ -194,7 +249,7 @@ def p_list(p):
 
 def p_block(p):
     '''func_block : blockEnter statements DONE'''
-    p[0] = ["block", p[2]]
+    p[0] = ast.Block(p[2], *_pos(p, 1))
     pass
 
 def p_comps(p):
@@ -204,16 +259,17 @@ def p_comps(p):
                   | expression GT expression
                   | expression GTE expression
                   | expression NEQ expression''' 
-    p[0] = ["comps", p[1], p[2], p[3]]
+    p[0] = ast.Comps(p[1], p[2], p[3], *_pos(p, 1))
     pass
 
 def p_blockEnter(p):
     '''blockEnter : ARROW'''
+    _mark(p, 1)
     pass
 
 def p_functionDef(p):
     '''function : paramlist func_block'''
-    p[0] = ["func", p[1], p[2]]
+    p[0] = ast.Func(p[1], p[2], *_pos(p, 1))
     pass
 
 def p_expressionToFunction(p):
@@ -223,28 +279,28 @@ def p_expressionToFunction(p):
 
 def p_if(p):
     '''statement : IF LPAREN expression RPAREN ifblock'''
-    p[0] = ["if", p[3], p[5]]
+    p[0] = ast.If(p[3], p[5], *_pos(p, 1))
     pass
 
 def p_if_else(p):
     '''statement : IF LPAREN expression RPAREN ifenter statements elseif'''
-    p[0] = ["ifelse", p[3], p[6], p[7]]
+    p[0] = ast.IfElse(p[3], p[6], p[7], *_pos(p, 1))
     pass
 
 
 def p_elseif(p):
     '''elseif : ELSE IF LPAREN expression RPAREN ifblock'''
-    p[0] = ["elseif", p[4], p[6]]
+    p[0] = ast.ElseIf(p[4], p[6], None, *_pos(p, 1))
     pass
 
 def p_elseifelse(p):
     '''elseif : ELSE ifblock'''
-    p[0] = ["else", p[2]]
+    p[0] = ast.Else(p[2], *_pos(p, 1))
     pass
 
 def p_elseifelseif(p):
     '''elseif : ELSE IF LPAREN expression RPAREN ifenter statements elseif'''
-    p[0] = ["elseif", p[4], p[7]] + p[8]
+    p[0] = ast.ElseIf(p[4], p[7], p[8], *_pos(p, 1))
     pass
 
 
@@ -260,24 +316,212 @@ def p_ifenter(p):
 def p_error(p):
     raise ParserError(p)
 
-parser = yacc.yacc(debug = True)
+_parser = None
+_lock = threading.Lock()
+
+def build(debug=DEBUG):
+    '''Builds the parser from the cached tables, rebuilding them if stale'''
+    import ply.yacc as yacc
+    return yacc.yacc(debug=debug, tabmodule=TABMODULE, outputdir=OUTPUTDIR)
+
+def get_parser():
+    '''Returns the shared parser, building it on first use. Its tables are
+    shared by every Parser session; parse with a session, not with this.'''
+    global _parser
+    if _parser is None:
+        with _lock:
+            if _parser is None:
+                _parser = build()
+                pass
+            pass
+        pass
+    return _parser
+
+def __getattr__(name):
+    if name == 'parser':
+        return get_parser()
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+# The parser implementation parse() and parse_ast() use by default, either
+# 'ply' or 'pratt' (src.parser.pratt). Both build the same trees.
+BACKEND = os.environ.get('ARBOR_PARSER', 'ply')
+
+class Parser(object):
+    '''A parsing session.
+
+    PLY keeps the state of a parse on the parser object, so every session
+    has its own shallow copy of the shared parser. The copy shares the
+    action, goto and production tables and costs a few attributes. Each
+    session also has its own Lexer, so sessions can parse in different
+    threads at once. A session parses one input at a time; ParserPool hands
+    out idle ones.'''
+
+    def __init__(self, backend=None, lexer_backend=None):
+        self.backend = backend or BACKEND
+        self.lexer = Lexer(lexer_backend)
+        self.parser = None
+        if self.backend != 'pratt':
+            self.parser = copy.copy(get_parser())
+            pass
+        pass
 
-def parse(data, reraise=False):
-    try:
-        ast = parser.parse(data)
-        return ast      
-    except ParserError as p:
-        if p.p is None:
-            print("Syntax error: EOF")
+    @property
+    def symbols(self):
+        '''The src.lexer.symbols.SymbolTable of the last source this session
+        lexed, holding the names of its tree'''
+        return self.lexer.symbols
+
+    def parse(self, data, reraise=False):
+        '''Parses data into the nested list form of the syntax tree'''
+        tree = self.parse_ast(data, reraise)
+        if tree is None:
+            return None
+        return ast.to_list(tree)
+
+    def parse_ast(self, data, reraise=False):
+        '''Parses data into a tree of src.ast nodes. data is either Arbor
+        source text or an iterable of tokens such as src.lexer.iter_tokens()
+        produces'''
+        stream = self.lexer.tokens(data) if isinstance(data, str) else iter(data)
+        try:
+            return self._parse(stream)
+        except ParserError as p:
+            message, p.span = syntax_error(p.p, data)
+            print(message)
+            if reraise:
+                raise
+            pass
+        pass
+
+    def parse_recover(self, data, max_errors=MAX_ERRORS, source=None, diagnostics=None):
+        '''Parses data, going on past errors, and returns the Statements of
+        the statements that parsed along with a list of every lexer and
+        parser error as a src.diagnostics.Diagnostic. Nothing is printed.
+        When data is tokens, source is the text they were lexed from and
+        diagnostics the errors lexing it. See src.parser.recovery.'''
+        from src.parser.recovery import recover
+        if diagnostics is None:
+            diagnostics = []
+            pass
+        if isinstance(data, str):
+            source = data
+            tokens = self.lexer.lex(data, diagnostics)
         else:
-            print("Syntax error", "{0}:{1}:".format(p.p.lineno, find_column(data, p.p)), p.p.value)
-        if reraise:
-            raise
+            tokens = list(data)
+            pass
+        del diagnostics[max_errors:]
+        return recover(self._parse, tokens, source, diagnostics, max_errors)
+
+    def _parse(self, stream):
+        '''Parses an iterator of tokens, raising ParserError without
+        reporting it'''
+        if self.parser is None:
+            from src.parser import pratt
+            return pratt.parse_tokens(stream)
+        # the lexer is only handed to the productions, tokens come from the
+        # stream
+        return self.parser.parse(lexer=self.lexer.lexer or get_lexer(),
+                                 tokenfunc=lambda: next(stream, None))
+
+class ParserPool(object):
+    '''Hands out idle Parser sessions, creating new ones when none are idle
+    and keeping up to size of them for reuse'''
+
+    def __init__(self, size=16, backend=None, lexer_backend=None):
+        self.size = size
+        self.backend = backend
+        self.lexer_backend = lexer_backend
+        self._idle = []
+        self._lock = threading.Lock()
+        pass
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            pass
+        return Parser(self.backend, self.lexer_backend)
+
+    def release(self, parser):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(parser)
+                pass
+            pass
+        pass
+
+    @contextlib.contextmanager
+    def session(self):
+        '''Lends out a Parser for the duration of a with block'''
+        parser = self.acquire()
+        try:
+            yield parser
+        finally:
+            self.release(parser)
+            pass
+        pass
+
+    def parse(self, data, reraise=False):
+        with self.session() as parser:
+            return parser.parse(data, reraise)
+
+    def parse_ast(self, data, reraise=False):
+        with self.session() as parser:
+            return parser.parse_ast(data, reraise)
+
+    def parse_recover(self, data, max_errors=MAX_ERRORS):
+        with self.session() as parser:
+            return parser.parse_recover(data, max_errors)
+    pass
+
+# the pools parse() and parse_ast() take their sessions from, by backend
+_pools = {}
+
+def get_pool(backend=None):
+    '''Returns the shared ParserPool for backend'''
+    backend = backend or BACKEND
+    pool = _pools.get(backend)
+    if pool is None:
+        pool = _pools.setdefault(backend, ParserPool(backend=backend))
         pass
+    return pool
+
+def parse(data, reraise=False, backend=None):
+    '''Parses data into the nested list form of the syntax tree'''
+    return get_pool(backend).parse(data, reraise)
+
+def parse_ast(data, reraise=False, backend=None):
+    '''Parses data into a tree of src.ast nodes. data is either Arbor source
+    text or an iterable of tokens such as src.lexer.iter_tokens() produces.
+    Safe to call from several threads at once.'''
+    return get_pool(backend).parse_ast(data, reraise)
+
+def error_span(token, data):
+    '''Returns the (line, column) of a syntax error at token, or at the end
+    of data when token is None. Lexed tokens carry their column; other
+    positions are looked up in a LineIndex of data when it is the source.'''
+    column = getattr(token, 'column', None)
+    if column is not None:
+        return token.lineno, column
+    if not isinstance(data, str):
+        return None if token is None else (token.lineno, None)
+    index = LineIndex(data)
+    return index.position(len(data) if token is None else token.lexpos)
+
+def syntax_error(token, data):
+    '''Returns the message and span reporting a syntax error at token'''
+    span = error_span(token, data)
+    if span is None:
+        return "Syntax error: EOF", span
+    where = ":".join(str(n) for n in span if n is not None)
+    return "Syntax error {0}: {1}".format(where, "EOF" if token is None else token.value), span
+
+def parse_recover(data, max_errors=MAX_ERRORS, backend=None):
+    '''Parses data past any errors and returns (tree, diagnostics), the
+    Statements of what parsed and every error as a Diagnostic'''
+    return get_pool(backend).parse_recover(data, max_errors)
 
 def find_column(input, token):
-    last_cr = input.rfind('\n',0,token.lexpos)
-    if last_cr < 0:
-        last_cr = 0
-    column = (token.lexpos - last_cr)
-    return column
\ No newline at end of file
+    '''Returns the 1-based column of token in input. Build a
+    src.lexer.lines.LineIndex to look up more than one position.'''
+    return token.lexpos - input.rfind('\n', 0, token.lexpos)
\ No newline at end of file
@@ -0,0 +1,184 @@
+'''Incremental re-parsing for editors and watch workflows.
+
+Top level Arbor statements end with a `;` outside any `->` block, so an edit
+only changes the statements it touches. A Document keeps the tokens and tree
+of a source along with the index of the token ending every top level
+statement. On an edit it re-lexes and re-parses just the affected statements
+and splices them in. The other statement nodes are reused as they are;
+those after the edit only get their positions shifted.
+'''
+from bisect import bisect_right
+
+from src import ast
+from src.lexer import iter_tokens, LexerError
+from src.lexer.lines import LineIndex
+from src.parser import parse_ast
+
+def statement_ends(tokens):
+    '''Returns the indices of the tokens ending each top level statement.
+
+    ARROW opens a block and DONE closes it. ELSE closes the block of the
+    branch before it, and the ARROW after it opens the next one.'''
+    ends = []
+    depth = 0
+    for ndx, tok in enumerate(tokens):
+        typ = tok.type
+        if typ == 'SEMICOLON':
+            if depth == 0:
+                ends.append(ndx)
+                pass
+        elif typ == 'ARROW':
+            depth += 1
+        elif typ == 'DONE' or typ == 'ELSE':
+            depth -= 1
+            pass
+        pass
+    return ends
+
+def _shift_tree(nodes, delta, lines):
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        node.lexpos += delta
+        node.lineno += lines
+        stack.extend(node.children())
+        pass
+    pass
+
+def _line_start(source, pos):
+    return source.rfind('\n', 0, pos) + 1
+
+class Document(object):
+    '''A parsed source that can be edited and re-parsed incrementally'''
+
+    def __init__(self, source, tokens=None, tree=None, backend=None):
+        self.backend = backend
+        self.source = source
+        self.tokens = tokens if tokens is not None else list(iter_tokens(source))
+        self.tree = tree if tree is not None else self._parse(self.tokens)
+        self.ends = statement_ends(self.tokens)
+        # how many statements the last edit re-parsed
+        self.reparsed = len(self.tree.body)
+        self._lines = None
+        pass
+
+    @property
+    def lines(self):
+        '''A LineIndex of the current source, built on first use after an
+        edit'''
+        if self._lines is None:
+            self._lines = LineIndex(self.source)
+            pass
+        return self._lines
+
+    def _parse(self, tokens):
+        return parse_ast(tokens, True, self.backend)
+
+    def _full(self, source):
+        '''Re-lexes and re-parses the whole source'''
+        tokens = list(iter_tokens(source))
+        tree = self._parse(tokens)
+        self.source, self.tokens, self.tree = source, tokens, tree
+        self.ends = statement_ends(tokens)
+        self.reparsed = len(tree.body)
+        self._lines = None
+        pass
+
+    def _lex(self, source, start, end):
+        '''Lexes source[start:end] with positions relative to all of source'''
+        lines = source.count('\n', 0, start)
+        indent = start - _line_start(source, start)
+        try:
+            toks = list(iter_tokens(source[start:end]))
+        except LexerError as e:
+            if e.span is not None:
+                line, column = e.span
+                e.span = (line + lines, column + indent if line == 1 else column)
+                pass
+            raise
+        for tok in toks:
+            if tok.lineno == 1:
+                tok.column += indent
+                pass
+            tok.lineno += lines
+            tok.lexpos += start
+            pass
+        return toks
+
+    def edit(self, start, end, text):
+        '''Replaces source[start:end] with text and updates tokens and tree.
+
+        Raises LexerError or ParserError, leaving the document untouched,
+        when the edited source no longer lexes or parses.'''
+        old = self.source
+        source = old[:start] + text + old[end:]
+        delta = len(text) - (end - start)
+        tokens, ends, body = self.tokens, self.ends, self.tree.body
+        if len(ends) != len(body) or (ends and ends[-1] != len(tokens) - 1):
+            self._full(source)
+            return
+        bounds = [tokens[ndx].lexpos + 1 for ndx in ends]
+        # the statements touching the edit, hi may be len(ends) for the
+        # text after the last statement
+        lo = bisect_right(bounds, start - 1)
+        hi = bisect_right(bounds, end)
+        region_start = bounds[lo - 1] if lo > 0 else 0
+        while True:
+            region_end = bounds[hi] if hi < len(bounds) else len(old)
+            try:
+                toks = self._lex(source, region_start, region_end + delta)
+            except LexerError:
+                # a token may now run past the region, e.g. an opened comment
+                if hi >= len(bounds):
+                    raise
+                hi += 1
+                continue
+            new_ends = statement_ends(toks)
+            if hi >= len(bounds):
+                break
+            if new_ends and new_ends[-1] == len(toks) - 1 and \
+               toks[-1].lexpos + 1 == region_end + delta:
+                break
+            hi += 1
+            pass
+        tree = self._parse(toks)
+
+        first = ends[lo - 1] + 1 if lo > 0 else 0
+        last = ends[hi] + 1 if hi < len(ends) else len(tokens)
+        after = tokens[last:]
+        lines = source.count('\n', region_start, region_end + delta) - \
+            old.count('\n', region_start, region_end)
+        # tokens on the line the region ends on move sideways too
+        columns = (region_end + delta - _line_start(source, region_end + delta)) - \
+            (region_end - _line_start(old, region_end))
+        if after and (delta or lines or columns):
+            row = None
+            if old.find('\n', region_end, after[0].lexpos) < 0:
+                row = after[0].lineno
+                pass
+            for tok in after:
+                if tok.lineno == row:
+                    tok.column += columns
+                    pass
+                tok.lexpos += delta
+                tok.lineno += lines
+                pass
+            _shift_tree(body[hi + 1:], delta, lines)
+            pass
+        moved = len(toks) - (last - first)
+        self.tokens = tokens[:first] + toks + after
+        self.ends = ends[:lo] + [first + ndx for ndx in new_ends] + \
+            [ndx + moved for ndx in ends[hi + 1:]]
+        self.tree = ast.Statements(body[:lo] + tree.body + body[hi + 1:])
+        self.source = source
+        self.reparsed = len(tree.body)
+        self._lines = None
+        pass
+
+def reparse(source, tokens, tree, start, end, text, backend=None):
+    '''Applies an edit to a parsed source and returns the new
+    (source, tokens, tree). The tokens and nodes that are reused may have
+    their positions updated in place.'''
+    doc = Document(source, tokens, tree, backend)
+    doc.edit(start, end, text)
+    return doc.source, doc.tokens, doc.tree
@@ -0,0 +1,94 @@
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'sleftORleftANDleftEQCOMPNEQLTLTEGTGTEleftPLUSSUBleftMULTIDIVrightNOTINT FLOAT PLUS MULTI DIV SUB NAME LPAREN RPAREN COLON COMMA SEMICOLON ARROW EQ OCT HEX GT LT GTE LTE CHAR STRING EQCOMP NEQ AND OR NOT IF ELSE DONE RETURN CONST LET INTTYPE FLOATTYPE CHARTYPE FUNCTIONTYPEs : statementsempty : statements : statements statement\n                   | emptystatement : expression SEMICOLON\n                 | emptyexpression : expression AND expression\n                  | expression OR expressionexpression : NOT expressionconstant : INT\n                | HEX\n                | OCTconstant : CHARconstant : FLOATconstant : STRINGexpression : constantusage : NAMEusage : NAME LPAREN commas_param RPARENexpression : usageexpression : declexpression : RETURN expressionexpression : expression PLUS expression\n                  | expression SUB expression\n                  | expression MULTI expression\n                  | expression DIV expressionexpression : usage EQ expression\n                  | decl EQ expressiondecl : LET NAMEdecl : CONST NAMEcommas : param\n              | commas COMMA paramparam : NAMEparamuse : NAME\n                | constant\n                | emptycommas_param : paramuse\n                    | commas_param COMMA paramuseexpression : LPAREN expression RPARENtype : INTTYPE\n            | FLOATTYPE\n            | CHARTYPE\n            | FUNCTIONTYPEparamtype : NAME COLON typeparam : paramtypeparam : NAME EQ constant\n             | paramtype EQ constantparamlist : LPAREN commas RPAREN\n                 | LPAREN RPARENfunc_block : blockEnter statements DONEexpression : expression EQCOMP expression\n                  | expression LT expression\n                  | expression LTE expression\n                  | expression GT expression\n                  | expression GTE expression\n                  | expression NEQ expressionblockEnter : ARROWfunction : paramlist func_blockexpression : functionstatement : IF LPAREN expression RPAREN ifblockstatement : IF LPAREN expression RPAREN ifenter statements elseifelseif : ELSE IF LPAREN expression RPAREN ifblockelseif : ELSE ifblockelseif : ELSE IF LPAREN expression RPAREN ifenter statements elseififblock : ifenter statements DONE SEMICOLONifenter : ARROW'
+    
+_lr_action_items = {'IF':([0,2,3,4,6,25,53,54,81,95,96,97,99,100,102,103,105,106,108,111,112,113,114,],[-2,7,-4,-3,-6,-5,-2,-56,7,-59,-2,-65,7,-60,104,-64,-62,-2,7,-61,-2,7,-63,]),'NOT':([0,2,3,4,6,8,9,13,25,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,53,54,81,95,96,97,99,100,103,105,106,107,108,111,112,113,114,],[-2,9,-4,-3,-6,9,9,9,-5,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,-2,-56,9,-59,-2,-65,9,-60,-64,-62,-2,9,9,-61,-2,9,-63,]),'RETURN':([0,2,3,4,6,8,9,13,25,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,53,54,81,95,96,97,99,100,103,105,106,107,108,111,112,113,114,],[-2,13,-4,-3,-6,13,13,13,-5,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,-2,-56,13,-59,-2,-65,13,-60,-64,-62,-2,13,13,-61,-2,13,-63,]),'LPAREN':([0,2,3,4,6,7,8,9,13,21,25,26,27,28,29,30,31,32,33,34,35,36,37,38,43,46,47,53,54,81,95,96,97,99,100,103,104,105,106,107,108,111,112,113,114,],[-2,8,-4,-3,-6,38,8,8,8,49,-5,8,8,8,8,8,8,8,8,8,8,8,8,8,49,8,8,-2,-56,8,-59,-2,-65,8,-60,-64,107,-62,-2,8,8,-61,-2,8,-63,]),'INT':([0,2,3,4,6,8,9,13,25,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,49,53,54,71,73,81,93,95,96,97,99,100,103,105,106,107,108,111,112,113,114,],[-2,15,-4,-3,-6,15,15,15,-5,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,-2,-56,15,15,15,15,-59,-2,-65,15,-60,-64,-62,-2,15,15,-61,-2,15,-63,]),'HEX':([0,2,3,4,6,8,9,13,25,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,49,53,54,71,73,81,93,95,96,97,99,100,103,105,106,107,108,111,112,113,114,],[-2,16,-4,-3,-6,16,16,16,-5,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,-2,-56,16,16,16,16,-59,-2,-65,16,-60,-64,-62,-2,16,16,-61,-2,16,-63,]),'OCT':([0,2,3,4,6,8,9,13,25,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,49,53,54,71,73,81,93,95,96,97,99,100,103,105,106,107,108,111,112,113,114,],[-2,17,-4,-3,-6,17,17,17,-5,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,-2,-56,17,17,17,17,-59,-2,-65,17,-60,-64,-62,-2,17,17,-61,-2,17,-63,]),'CHAR':([0,2,3,4,6,8,9,13,25,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,49,53,54,71,73,81,93,95,96,97,99,100,103,105,106,107,108,111,112,113,114,],[-2,18,-4,-3,-6,18,18,18,-5,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,-2,-56,18,18,18,18,-59,-2,-65,18,-60,-64,-62,-2,18,18,-61,-2,18,-63,]),'FLOAT':([0,2,3,4,6,8,9,13,25,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,49,53,54,71,73,81,93,95,96,97,99,100,103,105,106,107,108,111,112,113,114,],[-2,19,-4,-3,-6,19,19,19,-5,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,-2,-56,19,19,19,19,-59,-2,-65,19,-60,-64,-62,-2,19,19,-61,-2,19,-63,]),'STRING':([0,2,3,4,6,8,9,13,25,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,49,53,54,71,73,81,93,95,96,97,99,100,103,105,106,107,108,111,112,113,114,],[-2,20,-4,-3,-6,20,20,20,-5,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,-2,-56,20,20,20,20,-59,-2,-65,20,-60,-64,-62,-2,20,20,-61,-2,20,-63,]),'NAME':([0,2,3,4,6,8,9,13,22,23,25,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,49,53,54,70,81,93,95,96,97,99,100,103,105,106,107,108,111,112,113,114,],[-2,21,-4,-3,-6,43,21,21,50,51,-5,21,21,21,21,21,21,21,21,21,21,21,21,21,21,21,76,-2,-56,84,21,76,-59,-2,-65,21,-60,-64,-62,-2,21,21,-61,-2,21,-63,]),'LET':([0,2,3,4,6,8,9,13,25,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,53,54,81,95,96,97,99,100,103,105,106,107,108,111,112,113,114,],[-2,22,-4,-3,-6,22,22,22,-5,22,22,22,22,22,22,22,22,22,22,22,22,22,22,22,-2,-56,22,-59,-2,-65,22,-60,-64,-62,-2,22,22,-61,-2,22,-63,]),'CONST':([0,2,3,4,6,8,9,13,25,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,53,54,81,95,96,97,99,100,103,105,106,107,108,111,112,113,114,],[-2,23,-4,-3,-6,23,23,23,-5,23,23,23,23,23,23,23,23,23,23,23,23,23,23,23,-2,-56,23,-59,-2,-65,23,-60,-64,-62,-2,23,23,-61,-2,23,-63,]),'$end':([0,1,2,3,4,6,25,95,100,103,105,111,114,],[-2,0,-1,-4,-3,-6,-5,-59,-60,-64,-62,-61,-63,]),'DONE':([3,4,6,25,53,54,81,95,96,97,99,100,103,105,106,108,111,112,113,114,],[-4,-3,-6,-5,-2,-56,94,-59,-2,-65,101,-60,-64,-62,-2,101,-61,-2,101,-63,]),'ELSE':([3,4,6,25,95,96,97,99,100,103,105,111,112,113,114,],[-4,-3,-6,-5,-59,-2,-65,102,-60,-64,-62,-61,-2,102,-63,]),'SEMICOLON':([5,10,11,12,14,15,16,17,18,19,20,21,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,68,74,75,92,94,101,],[25,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,-9,-21,-28,-29,-57,-7,-8,-22,-23,-24,-25,-50,-51,-52,-53,-54,-55,-38,-26,-27,-18,-49,103,]),'AND':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[26,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,26,-17,-9,26,-28,-29,-57,-7,26,-22,-23,-24,-25,-50,-51,-52,-53,-54,-55,26,-38,26,26,-18,-49,26,]),'OR':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[27,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,27,-17,-9,27,-28,-29,-57,-7,-8,-22,-23,-24,-25,-50,-51,-52,-53,-54,-55,27,-38,27,27,-18,-49,27,]),'PLUS':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[28,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,28,-17,-9,28,-28,-29,-57,28,28,-22,-23,-24,-25,28,28,28,28,28,28,28,-38,28,28,-18,-49,28,]),'SUB':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[29,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,29,-17,-9,29,-28,-29,-57,29,29,-22,-23,-24,-25,29,29,29,29,29,29,29,-38,29,29,-18,-49,29,]),'MULTI':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[30,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,30,-17,-9,30,-28,-29,-57,30,30,30,30,-24,-25,30,30,30,30,30,30,30,-38,30,30,-18,-49,30,]),'DIV':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[31,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,31,-17,-9,31,-28,-29,-57,31,31,31,31,-24,-25,31,31,31,31,31,31,31,-38,31,31,-18,-49,31,]),'EQCOMP':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[32,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,32,-17,-9,32,-28,-29,-57,32,32,-22,-23,-24,-25,-50,-51,-52,-53,-54,-55,32,-38,32,32,-18,-49,32,]),'LT':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[33,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,33,-17,-9,33,-28,-29,-57,33,33,-22,-23,-24,-25,-50,-51,-52,-53,-54,-55,33,-38,33,33,-18,-49,33,]),'LTE':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[34,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,34,-17,-9,34,-28,-29,-57,34,34,-22,-23,-24,-25,-50,-51,-52,-53,-54,-55,34,-38,34,34,-18,-49,34,]),'GT':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[35,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,35,-17,-9,35,-28,-29,-57,35,35,-22,-23,-24,-25,-50,-51,-52,-53,-54,-55,35,-38,35,35,-18,-49,35,]),'GTE':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[36,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,36,-17,-9,36,-28,-29,-57,36,36,-22,-23,-24,-25,-50,-51,-52,-53,-54,-55,36,-38,36,36,-18,-49,36,]),'NEQ':([5,10,11,12,14,15,16,17,18,19,20,21,39,43,45,48,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,92,94,109,],[37,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,37,-17,-9,37,-28,-29,-57,37,37,-22,-23,-24,-25,-50,-51,-52,-53,-54,-55,37,-38,37,37,-18,-49,37,]),'RPAREN':([8,10,11,12,14,15,16,17,18,19,20,21,39,41,42,43,44,45,48,49,50,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,74,75,76,77,78,79,80,83,84,85,86,87,88,89,90,91,92,93,94,98,109,],[40,-16,-19,-20,-58,-10,-11,-12,-13,-14,-15,-17,68,69,-30,-17,-44,-9,-21,-2,-28,-29,-57,-7,-8,-22,-23,-24,-25,-50,-51,-52,-53,-54,-55,82,-38,-26,-27,-33,92,-36,-34,-35,-31,-32,-45,-43,-39,-40,-41,-42,-46,-18,-2,-49,-37,110,]),'EQ':([11,12,21,43,44,50,51,84,86,87,88,89,90,92,],[46,47,-17,71,73,-28,-29,71,-43,-39,-40,-41,-42,-18,]),'COMMA':([15,16,17,18,19,20,41,42,43,44,49,76,77,78,79,80,83,84,85,86,87,88,89,90,91,93,98,],[-10,-11,-12,-13,-14,-15,70,-30,-32,-44,-2,-33,93,-36,-34,-35,-31,-32,-45,-43,-39,-40,-41,-42,-46,-2,-37,]),'ARROW':([24,40,69,82,102,110,],[54,-48,-47,97,97,97,]),'COLON':([43,84,],[72,72,]),'INTTYPE':([72,],[87,]),'FLOATTYPE':([72,],[88,]),'CHARTYPE':([72,],[89,]),'FUNCTIONTYPE':([72,],[90,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'s':([0,],[1,]),'statements':([0,53,96,106,112,],[2,81,99,108,113,]),'empty':([0,2,49,53,81,93,96,99,106,108,112,113,],[3,6,80,3,6,80,3,6,3,6,3,6,]),'statement':([2,81,99,108,113,],[4,4,4,4,4,]),'expression':([2,8,9,13,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,81,99,107,108,113,],[5,39,45,48,55,56,57,58,59,60,61,62,63,64,65,66,67,74,75,5,5,109,5,5,]),'constant':([2,8,9,13,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,49,71,73,81,93,99,107,108,113,],[10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,79,85,91,10,79,10,10,10,10,]),'usage':([2,8,9,13,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,81,99,107,108,113,],[11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,]),'decl':([2,8,9,13,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,81,99,107,108,113,],[12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,]),'function':([2,8,9,13,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,81,99,107,108,113,],[14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,]),'paramlist':([2,8,9,13,26,27,28,29,30,31,32,33,34,35,36,37,38,46,47,81,99,107,108,113,],[24,24,24,24,24,24,24,24,24,24,24,24,24,24,24,24,24,24,24,24,24,24,24,24,]),'commas':([8,],[41,]),'param':([8,70,],[42,83,]),'paramtype':([8,70,],[44,44,]),'func_block':([24,],[52,]),'blockEnter':([24,],[53,]),'commas_param':([49,],[77,]),'paramuse':([49,93,],[78,98,]),'type':([72,],[86,]),'ifblock':([82,102,110,],[95,105,111,]),'ifenter':([82,102,110,],[96,106,112,]),'elseif':([99,113,],[100,114,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> s","S'",1,None,None,None),
+  ('s -> statements','s',1,'p_start','__init__.py',48),
+  ('empty -> <empty>','empty',0,'p_empty','__init__.py',53),
+  ('statements -> statements statement','statements',2,'p_statements','__init__.py',57),
+  ('statements -> empty','statements',1,'p_statements','__init__.py',58),
+  ('statement -> expression SEMICOLON','statement',2,'p_statement','__init__.py',70),
+  ('statement -> empty','statement',1,'p_statement','__init__.py',71),
+  ('expression -> expression AND expression','expression',3,'p_booleanOps','__init__.py',76),
+  ('expression -> expression OR expression','expression',3,'p_booleanOps','__init__.py',77),
+  ('expression -> NOT expression','expression',2,'p_not','__init__.py',82),
+  ('constant -> INT','constant',1,'p_int','__init__.py',87),
+  ('constant -> HEX','constant',1,'p_int','__init__.py',88),
+  ('constant -> OCT','constant',1,'p_int','__init__.py',89),
+  ('constant -> CHAR','constant',1,'p_char','__init__.py',94),
+  ('constant -> FLOAT','constant',1,'p_float','__init__.py',99),
+  ('constant -> STRING','constant',1,'p_string','__init__.py',104),
+  ('expression -> constant','expression',1,'p_constant','__init__.py',109),
+  ('usage -> NAME','usage',1,'p_use','__init__.py',114),
+  ('usage -> NAME LPAREN commas_param RPAREN','usage',4,'p_funcUsage','__init__.py',119),
+  ('expression -> usage','expression',1,'p_usage','__init__.py',124),
+  ('expression -> decl','expression',1,'p_declaration','__init__.py',129),
+  ('expression -> RETURN expression','expression',2,'p_return','__init__.py',134),
+  ('expression -> expression PLUS expression','expression',3,'p_bin_op','__init__.py',139),
+  ('expression -> expression SUB expression','expression',3,'p_bin_op','__init__.py',140),
+  ('expression -> expression MULTI expression','expression',3,'p_bin_op','__init__.py',141),
+  ('expression -> expression DIV expression','expression',3,'p_bin_op','__init__.py',142),
+  ('expression -> usage EQ expression','expression',3,'p_assignment','__init__.py',146),
+  ('expression -> decl EQ expression','expression',3,'p_assignment','__init__.py',147),
+  ('decl -> LET NAME','decl',2,'p_decl','__init__.py',151),
+  ('decl -> CONST NAME','decl',2,'p_constDecl','__init__.py',156),
+  ('commas -> param','commas',1,'p_commaList','__init__.py',161),
+  ('commas -> commas COMMA param','commas',3,'p_commaList','__init__.py',162),
+  ('param -> NAME','param',1,'p_param','__init__.py',172),
+  ('paramuse -> NAME','paramuse',1,'p_paramUse','__init__.py',177),
+  ('paramuse -> constant','paramuse',1,'p_paramUse','__init__.py',178),
+  ('paramuse -> empty','paramuse',1,'p_paramUse','__init__.py',179),
+  ('commas_param -> paramuse','commas_param',1,'p_paramList','__init__.py',188),
+  ('commas_param -> commas_param COMMA paramuse','commas_param',3,'p_paramList','__init__.py',189),
+  ('expression -> LPAREN expression RPAREN','expression',3,'p_expressionParenth','__init__.py',200),
+  ('type -> INTTYPE','type',1,'p_type','__init__.py',205),
+  ('type -> FLOATTYPE','type',1,'p_type','__init__.py',206),
+  ('type -> CHARTYPE','type',1,'p_type','__init__.py',207),
+  ('type -> FUNCTIONTYPE','type',1,'p_type','__init__.py',208),
+  ('paramtype -> NAME COLON type','paramtype',3,'p_paramTypeDef','__init__.py',213),
+  ('param -> paramtype','param',1,'p_paramType','__init__.py',217),
+  ('param -> NAME EQ constant','param',3,'p_defaultParam','__init__.py',222),
+  ('param -> paramtype EQ constant','param',3,'p_defaultParam','__init__.py',223),
+  ('paramlist -> LPAREN commas RPAREN','paramlist',3,'p_list','__init__.py',232),
+  ('paramlist -> LPAREN RPAREN','paramlist',2,'p_list','__init__.py',233),
+  ('func_block -> blockEnter statements DONE','func_block',3,'p_block','__init__.py',243),
+  ('expression -> expression EQCOMP expression','expression',3,'p_comps','__init__.py',248),
+  ('expression -> expression LT expression','expression',3,'p_comps','__init__.py',249),
+  ('expression -> expression LTE expression','expression',3,'p_comps','__init__.py',250),
+  ('expression -> expression GT expression','expression',3,'p_comps','__init__.py',251),
+  ('expression -> expression GTE expression','expression',3,'p_comps','__init__.py',252),
+  ('expression -> expression NEQ expression','expression',3,'p_comps','__init__.py',253),
+  ('blockEnter -> ARROW','blockEnter',1,'p_blockEnter','__init__.py',258),
+  ('function -> paramlist func_block','function',2,'p_functionDef','__init__.py',263),
+  ('expression -> function','expression',1,'p_expressionToFunction','__init__.py',268),
+  ('statement -> IF LPAREN expression RPAREN ifblock','statement',5,'p_if','__init__.py',273),
+  ('statement -> IF LPAREN expression RPAREN ifenter statements elseif','statement',7,'p_if_else','__init__.py',278),
+  ('elseif -> ELSE IF LPAREN expression RPAREN ifblock','elseif',6,'p_elseif','__init__.py',284),
+  ('elseif -> ELSE ifblock','elseif',2,'p_elseifelse','__init__.py',289),
+  ('elseif -> ELSE IF LPAREN expression RPAREN ifenter statements elseif','elseif',8,'p_elseifelseif','__init__.py',294),
+  ('ifblock -> ifenter statements DONE SEMICOLON','ifblock',4,'p_ifblock','__init__.py',300),
+  ('ifenter -> ARROW','ifenter',1,'p_ifenter','__init__.py',305),
+]
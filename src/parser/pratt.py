@@ -0,0 +1,268 @@
+'''A hand written recursive descent parser that builds the same trees as the
+PLY grammar in src.parser.
+
+Statements are parsed by recursive descent and expressions by precedence
+climbing, using the binding powers of src.parser.precedence. Wrapper rules
+such as `expression : constant` or `expression : usage` cost nothing here,
+the primary is returned directly.
+
+Select it with backend='pratt' on src.parser.parse()/parse_ast() or by
+setting ARBOR_PARSER=pratt.
+'''
+from src import ast
+from src.lexer import iter_tokens
+from src.parser import ParserError, precedence
+
+# binary operator token -> (level, node class)
+BINARY = {}
+for _level, (_assoc, *_ops) in enumerate(precedence, 1):
+    for _op in _ops:
+        if _op in ('AND', 'OR'):
+            BINARY[_op] = (_level, ast.Bool)
+        elif _op in ('PLUS', 'SUB', 'MULTI', 'DIV'):
+            BINARY[_op] = (_level, ast.BinOp)
+        elif _op != 'NOT':
+            BINARY[_op] = (_level, ast.Comps)
+            pass
+        pass
+    pass
+
+CONSTANTS = {
+    'INT': ast.Int,
+    'HEX': ast.Int,
+    'OCT': ast.Int,
+    'CHAR': ast.Char,
+    'FLOAT': ast.Float,
+    'STRING': ast.String,
+}
+
+TYPES = ('INTTYPE', 'FLOATTYPE', 'CHARTYPE', 'FUNCTIONTYPE')
+
+class Parser(object):
+    '''Parses one token stream, keeping a two token lookahead window'''
+
+    def __init__(self, tokens):
+        self.stream = iter(tokens)
+        self.tok = next(self.stream, None)
+        self.ahead = next(self.stream, None)
+        pass
+
+    def advance(self):
+        tok = self.tok
+        self.tok = self.ahead
+        self.ahead = next(self.stream, None)
+        return tok
+
+    def type(self):
+        return self.tok.type if self.tok is not None else None
+
+    def expect(self, typ):
+        tok = self.tok
+        if tok is None or tok.type != typ:
+            raise ParserError(tok)
+        self.tok = self.ahead
+        self.ahead = next(self.stream, None)
+        return tok
+
+    def parse(self):
+        body = self.statements()
+        if self.tok is not None:
+            raise ParserError(self.tok)
+        return ast.Statements(body)
+
+    def statements(self):
+        '''Parses statements up to DONE, ELSE or the end of input'''
+        body = []
+        while True:
+            typ = self.type()
+            if typ is None or typ == 'DONE' or typ == 'ELSE':
+                return body
+            if typ == 'IF':
+                body.append(self.if_statement())
+                pass
+            else:
+                body.append(self.expression(0))
+                self.expect('SEMICOLON')
+                pass
+            pass
+        pass
+
+    def if_statement(self):
+        start = self.expect('IF')
+        self.expect('LPAREN')
+        cond = self.expression(0)
+        self.expect('RPAREN')
+        self.expect('ARROW')
+        body = self.statements()
+        if self.type() == 'DONE':
+            self.advance()
+            self.expect('SEMICOLON')
+            return ast.If(cond, body, start.lineno, start.lexpos)
+        return ast.IfElse(cond, body, self.else_chain(), start.lineno, start.lexpos)
+
+    def else_chain(self):
+        start = self.expect('ELSE')
+        if self.type() != 'IF':
+            self.expect('ARROW')
+            body = self.statements()
+            self.expect('DONE')
+            self.expect('SEMICOLON')
+            return ast.Else(body, start.lineno, start.lexpos)
+        self.advance()
+        self.expect('LPAREN')
+        cond = self.expression(0)
+        self.expect('RPAREN')
+        self.expect('ARROW')
+        body = self.statements()
+        if self.type() == 'DONE':
+            self.advance()
+            self.expect('SEMICOLON')
+            return ast.ElseIf(cond, body, None, start.lineno, start.lexpos)
+        return ast.ElseIf(cond, body, self.else_chain(), start.lineno, start.lexpos)
+
+    def expression(self, min_level):
+        '''Precedence climbing over the left associative binary operators'''
+        left = self.unary()
+        binary = BINARY
+        while self.tok is not None:
+            op = binary.get(self.tok.type)
+            if op is None or op[0] < min_level:
+                break
+            level, cls = op
+            value = self.advance().value
+            right = self.expression(level + 1)
+            left = cls(left, value, right, left.lineno, left.lexpos)
+            pass
+        return left
+
+    def unary(self):
+        tok = self.tok
+        if tok is None:
+            raise ParserError(tok)
+        typ = tok.type
+        if typ == 'NAME':
+            self.advance()
+            if self.type() == 'LPAREN':
+                self.advance()
+                node = ast.FuncUse(tok.value, self.arguments(), tok.lineno, tok.lexpos)
+                pass
+            else:
+                node = ast.Usage(tok.value, tok.lineno, tok.lexpos)
+                pass
+            return self.assignment(node)
+        cls = CONSTANTS.get(typ)
+        if cls is not None:
+            self.advance()
+            return cls(tok.value, tok.lineno, tok.lexpos)
+        if typ == 'NOT':
+            self.advance()
+            return ast.Not(self.unary(), tok.lineno, tok.lexpos)
+        if typ == 'LPAREN':
+            return self.parenthesis()
+        if typ == 'RETURN':
+            self.advance()
+            return ast.Return(self.expression(0), tok.lineno, tok.lexpos)
+        if typ == 'LET' or typ == 'CONST':
+            self.advance()
+            name = self.expect('NAME').value
+            cls = ast.Decl if typ == 'LET' else ast.DeclConst
+            return self.assignment(cls(name, tok.lineno, tok.lexpos))
+        raise ParserError(tok)
+
+    def assignment(self, target):
+        if self.type() != 'EQ':
+            return target
+        self.advance()
+        return ast.Assign(target, self.expression(0), target.lineno, target.lexpos)
+
+    def arguments(self):
+        '''Parses the arguments of a call after its LPAREN'''
+        args = []
+        while True:
+            tok = self.tok
+            typ = tok.type if tok is not None else None
+            if typ == 'NAME':
+                self.advance()
+                args.append(ast.Usage(tok.value, tok.lineno, tok.lexpos))
+            elif typ in CONSTANTS:
+                self.advance()
+                args.append(CONSTANTS[typ](tok.value, tok.lineno, tok.lexpos))
+            elif typ == 'COMMA' or typ == 'RPAREN':
+                args.append(None)
+            else:
+                raise ParserError(tok)
+            if self.type() != 'COMMA':
+                self.expect('RPAREN')
+                return args
+            self.advance()
+            pass
+        pass
+
+    def parenthesis(self):
+        '''Parses either a function or a parenthesised expression. Like the
+        LALR tables, `(name)` is always an expression.'''
+        start = self.tok
+        following = self.ahead.type if self.ahead is not None else None
+        if following == 'RPAREN':
+            self.advance()
+            self.advance()
+            return self.function(None, start)
+        if following == 'NAME':
+            self.advance()
+            if self.ahead is not None and self.ahead.type in ('COMMA', 'COLON', 'EQ'):
+                return self.function(ast.Params(self.params(), start.lineno, start.lexpos), start)
+            pass
+        else:
+            self.advance()
+            pass
+        node = self.expression(0)
+        self.expect('RPAREN')
+        return node
+
+    def params(self):
+        '''Parses a parameter list after its LPAREN, up to the RPAREN'''
+        params = []
+        while True:
+            tok = self.expect('NAME')
+            param = ast.Param(tok.value, tok.lineno, tok.lexpos)
+            if self.type() == 'COLON':
+                self.advance()
+                if self.type() not in TYPES:
+                    raise ParserError(self.tok)
+                param = ast.ParamType(tok.value, self.advance().value, tok.lineno, tok.lexpos)
+                pass
+            if self.type() == 'EQ':
+                self.advance()
+                const = self.tok
+                cls = CONSTANTS.get(const.type) if const is not None else None
+                if cls is None:
+                    raise ParserError(const)
+                self.advance()
+                param = ast.Default(param, cls(const.value, const.lineno, const.lexpos),
+                                    tok.lineno, tok.lexpos)
+                pass
+            params.append(param)
+            if self.type() != 'COMMA':
+                self.expect('RPAREN')
+                return params
+            self.advance()
+            pass
+        pass
+
+    def function(self, params, start):
+        arrow = self.expect('ARROW')
+        body = self.statements()
+        self.expect('DONE')
+        block = ast.Block(body, arrow.lineno, arrow.lexpos)
+        return ast.Func(params, block, start.lineno, start.lexpos)
+
+def parse_tokens(tokens):
+    '''Parses a token iterable into a tree, raising ParserError'''
+    return Parser(tokens).parse()
+
+def parse_ast(data):
+    '''Parses source text or a token iterable into a tree'''
+    if isinstance(data, str):
+        data = iter_tokens(data)
+        pass
+    return parse_tokens(data)
@@ -0,0 +1,104 @@
+'''Panic mode error recovery, so one pass reports every syntax error.
+
+The tokens are parsed as a whole. When the parser fails at a token, the
+top level statements before the one holding the error still parse, so they
+are parsed again on their own and kept. The tokens from the error on are
+skipped up to the `;` that ends the broken statement, which is the `;` of
+its `done;` when the error is inside a block, and parsing starts over after
+it. A statement that already had a lexer error is skipped without a second
+diagnostic for it.
+
+Every failure costs one extra parse of the statements before it, since the
+last one, so a file is parsed at most about twice however many errors it
+has. Parsing stops once max_errors diagnostics have been reported.
+'''
+from bisect import bisect_left, bisect_right
+
+from src import ast
+from src.diagnostics import Diagnostic, MAX_ERRORS
+from src.parser import ParserError, error_span, syntax_error
+
+def resync(tokens, start, error):
+    '''Returns the index after the `;` that ends the statement starting at
+    tokens[start], which failed at tokens[error]. ARROW opens a block and
+    DONE or ELSE closes one, as in src.parser.incremental.statement_ends.'''
+    depth = 0
+    for ndx in range(start, len(tokens)):
+        typ = tokens[ndx].type
+        if typ == 'SEMICOLON':
+            if depth == 0 and ndx >= error:
+                return ndx + 1
+        elif typ == 'ARROW':
+            depth += 1
+        elif typ == 'DONE' or typ == 'ELSE':
+            depth = max(depth - 1, 0)
+            pass
+        pass
+    return len(tokens)
+
+def statement_start(tokens, pos, error):
+    '''Returns the index of the first token of the top level statement that
+    tokens[error] is in, looking no further back than pos'''
+    start = pos
+    depth = 0
+    for ndx in range(pos, error):
+        typ = tokens[ndx].type
+        if typ == 'SEMICOLON':
+            if depth == 0:
+                start = ndx + 1
+                pass
+        elif typ == 'ARROW':
+            depth += 1
+        elif typ == 'DONE' or typ == 'ELSE':
+            depth = max(depth - 1, 0)
+            pass
+        pass
+    return start
+
+def recover(parse, tokens, source=None, diagnostics=None, max_errors=MAX_ERRORS):
+    '''Parses the list tokens with parse, a function that takes an iterator
+    of tokens and returns a Statements node or raises ParserError. Returns
+    the Statements of every statement that parsed and diagnostics, a list
+    that may already hold the lexer's, with a src.diagnostics.Diagnostic
+    added for each syntax error, in source order. source is the text the tokens came
+    from, used to place an error at the end of the input.'''
+    if diagnostics is None:
+        diagnostics = []
+        pass
+    lexed = sorted(d.lexpos for d in diagnostics if d.lexpos is not None)
+    positions = None
+    body = []
+    pos = 0
+    while pos < len(tokens):
+        if len(diagnostics) >= max_errors:
+            tok = tokens[pos]
+            diagnostics.append(Diagnostic('parse', "Too many errors, giving up",
+                                          error_span(tok, source), tok.lexpos))
+            break
+        try:
+            body.extend(parse(iter(tokens[pos:])).body)
+            break
+        except ParserError as e:
+            if positions is None:
+                positions = [tok.lexpos for tok in tokens]
+                pass
+            tok = e.p
+            error = len(tokens) if tok is None else bisect_left(positions, tok.lexpos, pos)
+            start = statement_start(tokens, pos, error)
+            if start > pos:
+                body.extend(parse(iter(tokens[pos:start])).body)
+                pass
+            pos = resync(tokens, start, error)
+            # a lexer error in the statement is the likelier cause
+            first = tokens[start - 1].lexpos + 1 if start > 0 else 0
+            last = tokens[pos - 1].lexpos if tok is not None else float('inf')
+            if bisect_right(lexed, last) == bisect_left(lexed, first):
+                message, span = syntax_error(tok, source if source is not None else tokens)
+                diagnostics.append(Diagnostic(
+                    'parse', message, span, None if tok is None else tok.lexpos,
+                    None if tok is None else tok.value))
+                pass
+            pass
+        pass
+    diagnostics.sort(key=lambda d: float('inf') if d.lexpos is None else d.lexpos)
+    return ast.Statements(body), diagnostics
@@ -0,0 +1,231 @@
+'''Per-phase profiling of the compiler front end.
+
+A Profiler parses in three phases, read, lex and parse, and times each one.
+While it is tracing memory it also records the bytes each phase allocated
+and its peak. It counts the tokens of every type, and it wraps the
+production functions of its own parser session to count every reduction
+and the time spent in each p_* rule.
+
+Events go to Hooks objects: Stats collects them into a report, and anything
+else with the same methods can be passed to Profiler(hooks=...). to_json()
+and format() render the report.
+
+Times are taken with tracemalloc running when memory=True, which slows
+everything down about as much in every phase.
+'''
+import collections
+import contextlib
+import copy
+import json
+import time
+import tracemalloc
+
+from src.diagnostics import MAX_ERRORS
+
+PHASES = ('read', 'lex', 'parse')
+
+class Hooks(object):
+    '''Receives profiling events; override the ones you need'''
+
+    def phase(self, name, seconds, allocated=None, peak=None):
+        '''A phase of one input took seconds. allocated is the change in
+        traced memory and peak the most it rose above the start, in bytes,
+        or None when memory is not traced.'''
+        pass
+
+    def tokens(self, counts):
+        '''counts maps token types to how many one input had'''
+        pass
+
+    def reduction(self, rule, seconds):
+        '''The parser reduced with the p_* function named rule'''
+        pass
+    pass
+
+class Stats(Hooks):
+    '''Adds up the events of any number of inputs'''
+
+    def __init__(self):
+        self.inputs = 0
+        self.phases = collections.OrderedDict(
+            (name, {'seconds': 0.0, 'allocated': None, 'peak': None}) for name in PHASES)
+        self.token_counts = collections.Counter()
+        self.rules = {}
+        pass
+
+    def phase(self, name, seconds, allocated=None, peak=None):
+        entry = self.phases.setdefault(name, {'seconds': 0.0, 'allocated': None, 'peak': None})
+        entry['seconds'] += seconds
+        if allocated is not None:
+            entry['allocated'] = (entry['allocated'] or 0) + allocated
+            entry['peak'] = max(entry['peak'] or 0, peak)
+            pass
+        if name == 'read':
+            self.inputs += 1
+            pass
+        pass
+
+    def tokens(self, counts):
+        self.token_counts.update(counts)
+        pass
+
+    def reduction(self, rule, seconds):
+        entry = self.rules.get(rule)
+        if entry is None:
+            entry = self.rules[rule] = [0, 0.0]
+            pass
+        entry[0] += 1
+        entry[1] += seconds
+        pass
+
+    def report(self):
+        '''Returns the statistics as a dict of plain values'''
+        rules = sorted(self.rules.items(), key=lambda item: -item[1][1])
+        return {
+            'inputs': self.inputs,
+            'phases': dict((name, dict(entry)) for name, entry in self.phases.items()),
+            'tokens': dict(self.token_counts.most_common()),
+            'token_total': sum(self.token_counts.values()),
+            'rules': collections.OrderedDict(
+                (name, {'count': count, 'seconds': seconds}) for name, (count, seconds) in rules),
+            'reductions': sum(count for count, seconds in self.rules.values()),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.report(), **kwargs)
+
+    def format(self, top=15):
+        '''Returns the report as text tables'''
+        report = self.report()
+        lines = ["{0:<8} {1:>10} {2:>12} {3:>12}".format('phase', 'seconds', 'alloc KB', 'peak KB')]
+        for name, entry in report['phases'].items():
+            alloc = '-' if entry['allocated'] is None else '{0:.1f}'.format(entry['allocated'] / 1024.0)
+            peak = '-' if entry['peak'] is None else '{0:.1f}'.format(entry['peak'] / 1024.0)
+            lines.append("{0:<8} {1:10.4f} {2:>12} {3:>12}".format(name, entry['seconds'], alloc, peak))
+            pass
+        lines.append("{0} tokens in {1} inputs: {2}".format(
+            report['token_total'], report['inputs'], ", ".join(
+                "{0} {1}".format(kind, count) for kind, count in list(report['tokens'].items())[:top])))
+        if report['rules']:
+            lines.append("{0:<24} {1:>9} {2:>10} {3:>9}".format('rule', 'count', 'seconds', 'us/call'))
+            for name, entry in list(report['rules'].items())[:top]:
+                lines.append("{0:<24} {1:>9} {2:10.4f} {3:9.2f}".format(
+                    name, entry['count'], entry['seconds'], entry['seconds'] / entry['count'] * 1e6))
+                pass
+            pass
+        return "\n".join(lines)
+    pass
+
+def _timed(func, hooks):
+    name = func.__name__
+    clock = time.perf_counter
+
+    def reduce(p):
+        start = clock()
+        try:
+            return func(p)
+        finally:
+            elapsed = clock() - start
+            for hook in hooks:
+                hook.reduction(name, elapsed)
+                pass
+            pass
+        pass
+    return reduce
+
+def instrument(session, hooks):
+    '''Makes a src.parser.Parser session report every reduction to hooks.
+    Only the session's own copy of the production list is changed.'''
+    if session.parser is None:
+        # the recursive descent backend has no reductions to count
+        return session
+    productions = []
+    for prod in session.parser.productions:
+        prod = copy.copy(prod)
+        if prod.callable is not None:
+            prod.callable = _timed(prod.callable, hooks)
+            pass
+        productions.append(prod)
+        pass
+    session.parser.productions = productions
+    return session
+
+class Profiler(object):
+    '''Parses inputs phase by phase, reporting to stats and hooks'''
+
+    def __init__(self, hooks=(), memory=True, backend=None, lexer_backend=None):
+        from src.parser import Parser
+        self.stats = Stats()
+        self.hooks = [self.stats] + list(hooks)
+        self.memory = memory
+        self.session = instrument(Parser(backend, lexer_backend), self.hooks)
+        pass
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        '''Times the with block as phase name'''
+        tracing = self.memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+            pass
+        if self.memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            pass
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            allocated = peak = None
+            if self.memory:
+                current, high = tracemalloc.get_traced_memory()
+                allocated, peak = current - before, high - before
+                pass
+            if tracing:
+                tracemalloc.stop()
+                pass
+            for hook in self.hooks:
+                hook.phase(name, elapsed, allocated, peak)
+                pass
+            pass
+        pass
+
+    def parse_ast(self, source, reraise=True):
+        '''Lexes and parses source, which is Arbor code or a path, and
+        returns its tree'''
+        from src.lexer import read_source
+        with self.phase('read'):
+            text = read_source(source)
+            pass
+        with self.phase('lex'):
+            toks = self.session.lexer.lex(text)
+            pass
+        counts = collections.Counter(tok.type for tok in toks)
+        for hook in self.hooks:
+            hook.tokens(counts)
+            pass
+        with self.phase('parse'):
+            return self.session.parse_ast(toks, reraise)
+        pass
+
+    def parse_recover(self, source, max_errors=MAX_ERRORS):
+        '''Like parse_ast, but goes on past errors the way
+        src.parser.Parser.parse_recover does, returning the tree and the
+        list of Diagnostics'''
+        from src.lexer import read_source
+        diagnostics = []
+        with self.phase('read'):
+            text = read_source(source)
+            pass
+        with self.phase('lex'):
+            toks = self.session.lexer.lex(text, diagnostics)
+            pass
+        counts = collections.Counter(tok.type for tok in toks)
+        for hook in self.hooks:
+            hook.tokens(counts)
+            pass
+        with self.phase('parse'):
+            return self.session.parse_recover(toks, max_errors, text, diagnostics)
+        pass
+    pass
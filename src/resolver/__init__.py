@@ -0,0 +1,245 @@
+'''Static scope resolution.
+
+Every Arbor variable is declared with let or const before it is used, so
+where each name lives is known before the program runs. Resolver walks a
+tree from src.parser with a scope for the top level, one for the
+parameters and body of every function, and one for the body of every if,
+else if and else, and:
+
+    gives every Decl the slot it is stored in,
+    rewrites every Usage into an ast.Ref and every FuncUse into an
+    ast.FuncRef, holding the (depth, slot) of the variable they name,
+    reports names that are not declared and assignments to a const.
+
+A slot indexes the frame of one function call, or of the top level;
+blocks inside a function take further slots of the same frame. depth is how
+many functions out the frame is, 0 being the function the name appears in.
+Names declared nowhere but given in builtins resolve to depth None.
+
+Statements see the names declared before them. The body of a function is
+resolved once the block around it ends, so a function can call itself and
+functions declared after it. src.vm fails a call that reads one of those
+before it is assigned.
+'''
+from src import ast
+from src.diagnostics import Diagnostic
+from src.lexer.lines import LineIndex
+
+class ResolveError(Exception):
+    '''Raised with the Diagnostics of a tree that does not resolve'''
+    def __init__(self, diagnostics):
+        Exception.__init__(self, "\n".join(str(d) for d in diagnostics))
+        self.diagnostics = diagnostics
+        pass
+    pass
+
+class Frame(object):
+    '''The slots of one function, or of the top level'''
+    __slots__ = ('size',)
+
+    def __init__(self):
+        self.size = 0
+        pass
+
+    def allocate(self):
+        self.size += 1
+        return self.size - 1
+    pass
+
+class Scope(object):
+    '''The names one block declares, name -> slot of frame'''
+    __slots__ = ('names', 'consts', 'frame', 'parent')
+
+    def __init__(self, frame, parent=None):
+        self.names = {}
+        self.consts = set()
+        self.frame = frame
+        self.parent = parent
+        pass
+
+    def declare(self, name, const=False):
+        slot = self.names[name] = self.frame.allocate()
+        if const:
+            self.consts.add(name)
+            pass
+        return slot
+    pass
+
+class Resolver(ast.NodeVisitor):
+    '''Resolves trees, collecting a src.diagnostics.Diagnostic for each
+    error. builtins are the names that resolve when nothing declares them,
+    source the text the trees were parsed from, for error positions.'''
+
+    def __init__(self, builtins=(), source=None):
+        self.builtins = frozenset(builtins)
+        self.index = LineIndex(source) if source is not None else None
+        self.diagnostics = []
+        self.scope = None
+        # the functions whose bodies are resolved when the block ends
+        self.pending = []
+        # the Scope of the top level of the last tree
+        self.top = None
+        pass
+
+    def resolve(self, tree):
+        '''Resolves a Statements tree in place, returning the Frame of its
+        top level. Raises ResolveError when a name does not resolve.'''
+        frame = Frame()
+        self.top = Scope(frame)
+        tree.body = self.block(tree.body, self.top)
+        if self.diagnostics:
+            raise ResolveError(self.diagnostics)
+        return frame
+
+    def error(self, message, node):
+        if self.index is not None:
+            span = node.span(self.index)
+            where = "{0}:{1}".format(*span)
+        else:
+            span = (node.lineno, None)
+            where = "line {0}".format(node.lineno)
+            pass
+        self.diagnostics.append(Diagnostic('resolve', "{0} at {1}".format(message, where),
+                                           span, node.lexpos, node.name))
+        pass
+
+    def lookup(self, name):
+        '''Returns the (depth, slot, scope) name refers to, None when it is
+        not declared'''
+        scope = self.scope
+        frame = scope.frame
+        depth = 0
+        while scope is not None:
+            if scope.frame is not frame:
+                frame = scope.frame
+                depth += 1
+                pass
+            slot = scope.names.get(name)
+            if slot is not None:
+                return depth, slot, scope
+            scope = scope.parent
+            pass
+        return None
+
+    def reference(self, node):
+        '''Returns the (depth, slot) of the variable a Usage or FuncUse
+        names, (None, None) for a builtin or when it is not declared'''
+        found = self.lookup(node.name)
+        if found is not None:
+            return found[:2]
+        if node.name not in self.builtins:
+            self.error("Undeclared name '{0}'".format(node.name), node)
+            pass
+        return None, None
+
+    def block(self, body, scope):
+        '''Resolves a list of statements in scope, then the bodies of the
+        functions they hold'''
+        outer, outer_pending = self.scope, self.pending
+        self.scope, self.pending = scope, []
+        try:
+            body = [self.visit(statement) if statement is not None else None
+                    for statement in body]
+            for node, inner in self.pending:
+                node.body.body = self.block(node.body.body, inner)
+                pass
+        finally:
+            self.scope, self.pending = outer, outer_pending
+            pass
+        return body
+
+    def generic_visit(self, node):
+        for field in node._fields:
+            value = getattr(node, field)
+            if isinstance(value, ast.Node):
+                setattr(node, field, self.visit(value))
+            elif isinstance(value, list):
+                setattr(node, field, [self.visit(item) if isinstance(item, ast.Node) else item
+                                      for item in value])
+                pass
+            pass
+        return node
+
+    def visit_Constant(self, node):
+        return node
+
+    def visit_Usage(self, node):
+        depth, slot = self.reference(node)
+        return ast.Ref(node.name, depth, slot, node.lineno, node.lexpos)
+
+    def visit_FuncUse(self, node):
+        depth, slot = self.reference(node)
+        args = [self.visit(arg) if arg is not None else None for arg in node.args]
+        return ast.FuncRef(node.name, args, depth, slot, node.lineno, node.lexpos)
+
+    def visit_Decl(self, node):
+        if node.name in self.scope.names:
+            self.error("'{0}' is already declared".format(node.name), node)
+            pass
+        node.slot = self.scope.declare(node.name, isinstance(node, ast.DeclConst))
+        return node
+
+    def visit_Assign(self, node):
+        # the value cannot see a variable it declares
+        node.value = self.visit(node.value)
+        target = node.target
+        if isinstance(target, ast.Decl):
+            node.target = self.visit(target)
+            return node
+        found = self.lookup(target.name)
+        if found is None:
+            if target.name in self.builtins:
+                self.error("Assignment to builtin '{0}'".format(target.name), target)
+            else:
+                self.error("Undeclared name '{0}'".format(target.name), target)
+                pass
+            node.target = ast.Ref(target.name, None, None, target.lineno, target.lexpos)
+            return node
+        depth, slot, scope = found
+        if target.name in scope.consts:
+            self.error("Assignment to constant '{0}'".format(target.name), target)
+            pass
+        node.target = ast.Ref(target.name, depth, slot, target.lineno, target.lexpos)
+        return node
+
+    def visit_Func(self, node):
+        scope = Scope(Frame(), self.scope)
+        params = node.params.params if node.params is not None else []
+        for param in params:
+            if isinstance(param, ast.Default):
+                param = param.param
+                pass
+            if param.name in scope.names:
+                self.error("Repeated parameter '{0}'".format(param.name), param)
+                pass
+            scope.declare(param.name)
+            pass
+        self.pending.append((node, scope))
+        return node
+
+    def visit_If(self, node):
+        node.cond = self.visit(node.cond)
+        node.body = self.body(node.body)
+        return node
+
+    def visit_IfElse(self, node):
+        node.cond = self.visit(node.cond)
+        node.body = self.body(node.body)
+        if node.orelse is not None:
+            node.orelse = self.visit(node.orelse)
+            pass
+        return node
+
+    def visit_Else(self, node):
+        node.body = self.body(node.body)
+        return node
+
+    def body(self, body):
+        '''Resolves the statements of an if or else in a scope of their own'''
+        return self.block(body, Scope(self.scope.frame, self.scope))
+    pass
+
+def resolve(tree, builtins=(), source=None):
+    '''Resolves a Statements tree in place, returning the Frame of its top
+    level; raises ResolveError when names do not resolve'''
+    return Resolver(builtins, source).resolve(tree)
@@ -0,0 +1,270 @@
+'''The arbor compile daemon.
+
+    arbor serve [--socket PATH] [-j JOBS] [--cache-dir DIR] [--stop]
+
+The daemon listens on a Unix domain socket and keeps a pool of worker
+processes with the lexer and parser tables loaded, so a request only pays
+for the work itself. Clients send one JSON object per line,
+
+    {"id": 1, "method": "compile", "params": {"files": [[path, name], ...]}}
+
+and get one back per request, {"id": 1, "result": ...} or
+{"id": 1, "error": "..."}. The methods are:
+
+    ping      returns "pong"
+    compile   compiles files, params.files holds [path, name] pairs where
+              name is what diagnostics call the file; returns a list of
+              {"path", "ok", "diagnostics", "cached"} in the same order
+    parse     parses params.source; returns {"ok", "tree", "diagnostics"}
+              with the tree in the nested list form of src.parser.parse
+    stats     returns the request and cache counters
+    shutdown  stops the daemon after replying
+
+Many clients are served at once; requests on one connection are answered
+in order. src.cli.client has a blocking client.
+'''
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import time
+
+from src.cli import compile_file, warm
+from src.cli.client import default_socket
+
+# the longest request line the daemon accepts
+LIMIT = 64 * 1024 * 1024
+# how often the daemon trims its cache, in seconds
+PRUNE_INTERVAL = 60
+
+def parse_source(source):
+    '''Parses source in a worker and returns the reply to a parse request'''
+    from src import ast
+    from src.lexer import iter_tokens, LexerError
+    from src.parser import parse_ast, ParserError
+    out = io.StringIO()
+    tree = None
+    with contextlib.redirect_stdout(out):
+        try:
+            tree = ast.to_list(parse_ast(iter_tokens(source), True))
+        except (LexerError, ParserError, ValueError):
+            pass
+        pass
+    return {'ok': tree is not None, 'tree': tree, 'diagnostics': out.getvalue().splitlines()}
+
+class ProtocolError(Exception):
+    pass
+
+class Server(object):
+    '''Serves compile and parse requests on the Unix socket at path. Set
+    ready to a threading.Event to learn when it is listening.'''
+
+    def __init__(self, path=None, jobs=None, cache=None):
+        self.path = path or default_socket()
+        self.jobs = jobs or os.cpu_count() or 1
+        self.cache = cache
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+        self.clients = 0
+        self.pool = None
+        self.ready = None
+        self._stop = None
+        self._pruned = time.monotonic()
+        pass
+
+    def _claim(self):
+        '''Removes a socket file left behind by a daemon that is gone'''
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.remove(self.path)
+            return
+        finally:
+            probe.close()
+            pass
+        raise RuntimeError("a daemon is already listening on {0}".format(self.path))
+
+    async def serve(self):
+        '''Runs until a shutdown request or stop()'''
+        from concurrent.futures import ProcessPoolExecutor
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._claim()
+        # load the tables before forking so the workers inherit them
+        warm()
+        self.pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=warm)
+        # the socket is only ever 0600, even while it starts listening
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self.handle, self.path, limit=LIMIT)
+        finally:
+            os.umask(umask)
+            pass
+        try:
+            if self.ready is not None:
+                self.ready.set()
+                pass
+            await self._stop.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            with contextlib.suppress(OSError):
+                os.remove(self.path)
+                pass
+            pass
+        pass
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+            pass
+        pass
+
+    async def handle(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    # a line over LIMIT or a client that went away
+                    break
+                if not line:
+                    break
+                reply = await self.respond(line)
+                writer.write(json.dumps(reply).encode() + b'\n')
+                await writer.drain()
+                if reply.get('result') == 'bye':
+                    self.stop()
+                    break
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+                pass
+            pass
+        pass
+
+    async def respond(self, line):
+        ident = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ProtocolError("a request must be a JSON object")
+            ident = request.get('id')
+            method = getattr(self, 'do_' + str(request.get('method')), None)
+            if method is None:
+                raise ProtocolError("unknown method {0!r}".format(request.get('method')))
+            params = request.get('params') or {}
+            self.requests += 1
+            return {'id': ident, 'result': await method(**params)}
+        except Exception as e:
+            # a bad request, or a worker that failed, only fails the request
+            return {'id': ident, 'error': '{0}: {1}'.format(type(e).__name__, e)}
+
+    async def do_ping(self):
+        return 'pong'
+
+    async def do_compile(self, files):
+        loop = asyncio.get_running_loop()
+        work = [loop.run_in_executor(self.pool, functools.partial(
+            compile_file, path, self.cache, name)) for path, name in files]
+        results = await asyncio.gather(*work)
+        for result in results:
+            if result.cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+                pass
+            pass
+        self._prune(loop)
+        return [{'path': result.path, 'ok': result.ok,
+                 'diagnostics': result.diagnostics, 'cached': result.cached}
+                for result in results]
+
+    async def do_parse(self, source):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, parse_source, source)
+
+    async def do_stats(self):
+        return {'requests': self.requests, 'clients': self.clients,
+                'hits': self.hits, 'misses': self.misses, 'jobs': self.jobs}
+
+    async def do_shutdown(self):
+        return 'bye'
+
+    def _prune(self, loop):
+        '''Trims the cache in the background, at most every PRUNE_INTERVAL'''
+        now = time.monotonic()
+        if self.cache is None or now - self._pruned < PRUNE_INTERVAL:
+            return
+        self._pruned = now
+        loop.run_in_executor(None, self.cache.prune)
+        pass
+    pass
+
+def arguments():
+    parser = argparse.ArgumentParser(prog='arbor serve', description='Runs the arbor compile daemon.')
+    parser.add_argument('--socket', default=None,
+                        help='socket to listen on (default: $ARBOR_SOCKET or a per-user path)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of worker processes (default: one per core)')
+    parser.add_argument('--cache-dir', default=None,
+                        help='where to cache parsed files (default: $ARBOR_CACHE_DIR or ~/.cache/arbor)')
+    parser.add_argument('--cache-size', type=int, default=None, metavar='MB',
+                        help='evict least recently used entries past this size')
+    parser.add_argument('--no-cache', action='store_true', help='parse every file')
+    parser.add_argument('--stop', action='store_true', help='stop the daemon on the socket')
+    return parser
+
+def main(argv=None):
+    '''Runs `arbor serve`, returning the exit status'''
+    args = arguments().parse_args(argv)
+    path = args.socket or default_socket()
+    if args.stop:
+        from src.cli.client import Client
+        try:
+            with Client(path) as client:
+                client.shutdown()
+                pass
+        except OSError as e:
+            print('arbor: no daemon on {0}: {1}'.format(path, e), file=sys.stderr)
+            return 1
+        return 0
+    cache = None
+    if not args.no_cache:
+        from src.cache import Cache, DEFAULT_SIZE
+        size = DEFAULT_SIZE if args.cache_size is None else args.cache_size * 1024 * 1024
+        cache = Cache(args.cache_dir, size)
+        pass
+    server = Server(path, args.jobs, cache)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, server.stop)
+            pass
+        await server.serve()
+        pass
+
+    try:
+        asyncio.run(run())
+    except RuntimeError as e:
+        print('arbor: {0}'.format(e), file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,596 @@
+'''A bytecode virtual machine for Arbor.
+
+src.vm.compiler turns a tree from src.parser into Code objects and VM runs
+them. An instruction is one word of an array('I'): the opcode in the low 8
+bits and its argument above them. Each Code has a constant pool, a table of
+the builtin names it uses, and a line number per instruction for errors.
+
+The machine is a stack machine. Every call gets a frame whose locals are a
+list of slots, the parameters first, with the environment of the function
+in the last slot. A function's environment is the locals list of the frame
+that created it, so a nested function reaches the variables of the
+functions around it through a chain of those lists, addressed by (depth,
+slot). The top level has a frame of its own, so its variables are slots
+too, given by src.resolver when compiling; only builtins are looked up by
+name. Calls do not recurse in Python; the caller's state goes on a list of
+frames.
+
+Arbor has no loops, so iteration is recursion, and a call whose value is
+returned straight away, `return f(x);` wherever it appears, compiles to
+TAIL_CALL. It replaces the calling frame instead of stacking a new one, so
+a function that calls itself, or another function that calls it back, in
+tail position runs in constant space however deep it recurses. The callee
+still gets a new locals list, since a closure may hold on to the old one.
+
+The compiler marks a function pure when it only reads its own locals and
+variables that are bound once, and only calls or creates pure functions.
+A VM asked to memoize gives each such function value an LRU cache from
+src.vm.memo: a call with arguments seen before returns the stored result,
+and the result of any other call is stored when its frame returns. Which
+functions are memoized comes from `// pragma memoize [NAME, ...]` comments
+in the source and from the VM's memoize argument.
+
+Values are Python ints, floats and strs, Char for char literals, and
+Function. Arithmetic on a Char uses its code point. Comparisons and the
+logical operators give booleans, which are ints, and `/` truncates when
+both operands are ints.
+
+    arbor run [-O [--opt-stats]] [--memoize | --memoize-only NAME] [--memo-size N]
+              [--memo-stats] FILE
+                      runs FILE and prints what it returns; -O optimizes it
+                      with src.optimize first
+'''
+import pathlib
+import sys
+import weakref
+from collections import deque
+
+from src.vm.memo import COUNTS, LRUCache, MEMO_SIZE, key as memo_key
+
+# opcodes, with the argument each takes
+LOAD_CONST = 1      # index into the constant pool
+LOAD_LOCAL = 2      # slot
+STORE_LOCAL = 3     # slot, pops the value
+LOAD_DEREF = 4      # depth << 16 | slot of an enclosing function's variable
+STORE_DEREF = 5     # depth << 16 | slot
+LOAD_BUILTIN = 6    # index into the names table
+POP = 7
+DUP = 8
+ADD = 9
+SUB = 10
+MUL = 11
+DIV = 12
+EQ = 13
+NE = 14
+LT = 15
+LE = 16
+GT = 17
+GE = 18
+NOT = 19
+JUMP = 20           # target instruction
+JUMP_IF_FALSE = 21  # target instruction, pops the condition
+JUMP_IF_TRUE = 22   # target instruction, pops the condition
+MAKE_FUNCTION = 23  # index of the Code in the constant pool
+CALL = 24           # argument count
+RETURN = 25
+TAIL_CALL = 26      # argument count, calls and returns what the call returns
+
+OPNAMES = dict((value, name) for name, value in list(globals().items())
+               if name.isupper() and isinstance(value, int))
+
+# the opcodes that use their argument
+HAS_ARG = frozenset([LOAD_CONST, LOAD_LOCAL, STORE_LOCAL, LOAD_DEREF, STORE_DEREF,
+                     LOAD_BUILTIN, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, MAKE_FUNCTION, CALL,
+                     TAIL_CALL])
+
+# bits of an instruction word holding the opcode
+OPBITS = 8
+# the most frames a program may have at once
+MAX_DEPTH = 100000
+
+class ArborError(Exception):
+    '''An error while running a program, at 1-based line lineno'''
+    def __init__(self, message, lineno=None):
+        Exception.__init__(self, message if lineno is None else
+                           "line {0}: {1}".format(lineno, message))
+        self.message = message
+        self.lineno = lineno
+        pass
+
+class Char(int):
+    '''A char value, an int holding its code point'''
+    __slots__ = ()
+
+    def __repr__(self):
+        return repr(chr(self))
+
+    def __str__(self):
+        return chr(self)
+
+# the default of a parameter that has none
+MISSING = object()
+
+class Empty(object):
+    '''The value of an argument left empty, as in f(a, , c)'''
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<empty>'
+    pass
+
+EMPTY = Empty()
+
+# what the slot of a variable holds until it is assigned
+UNASSIGNED = object()
+
+class Code(object):
+    '''The bytecode of a function, or of the top level of a program'''
+    __slots__ = ('name', 'code', 'consts', 'names', 'lines', 'nparams', 'nlocals',
+                 'defaults', 'padding', 'pure', 'memoize', 'variables', 'varnames')
+
+    def __init__(self, name, code, consts, names, lines, nparams=0, nlocals=0, defaults=(),
+                 pure=False, memoize=False, variables=None, varnames=None):
+        self.name = name
+        self.code = code
+        self.consts = consts
+        self.names = names
+        self.lines = lines
+        self.nparams = nparams
+        self.nlocals = nlocals
+        self.defaults = defaults
+        # the slots after the parameters, copied onto every frame
+        self.padding = [UNASSIGNED] * (nlocals - nparams)
+        # whether calls can be memoized, and whether a pragma asked for it
+        self.pure = pure
+        self.memoize = memoize
+        # of the top level, the slot of each variable it declares, by name
+        self.variables = variables if variables is not None else {}
+        # the name each LOAD_LOCAL and LOAD_DEREF word reads, for errors
+        self.varnames = varnames if varnames is not None else {}
+        pass
+
+    def __repr__(self):
+        return "<code {0}, {1} instructions>".format(self.name, len(self.code))
+    pass
+
+class Function(object):
+    '''A function value, its Code, the environment it was created in and
+    its src.vm.memo.LRUCache when memoized'''
+    __slots__ = ('code', 'env', 'cache')
+
+    def __init__(self, code, env, cache=None):
+        self.code = code
+        self.env = env
+        self.cache = cache
+        pass
+
+    def __repr__(self):
+        return "<function {0}>".format(self.code.name)
+    pass
+
+def divide(a, b):
+    '''Divides like the `/` of Arbor, truncating when both are ints'''
+    if type(a) is float or type(b) is float:
+        return a / b
+    quotient = a // b
+    if quotient < 0 and quotient * b != a:
+        # truncate toward zero
+        quotient += 1
+        pass
+    return quotient
+
+def _bind(code, args):
+    '''Returns the locals of a call to code with args, filling in defaults
+    for missing and EMPTY arguments'''
+    if len(args) > code.nparams:
+        raise ArborError("{0} takes {1} arguments, got {2}".format(
+            code.name, code.nparams, len(args)))
+    args = args + [EMPTY] * (code.nparams - len(args))
+    for ndx, default in enumerate(code.defaults):
+        if args[ndx] is EMPTY:
+            if default is MISSING:
+                raise ArborError("{0} is missing argument {1}".format(code.name, ndx + 1))
+            args[ndx] = default
+            pass
+        pass
+    return args
+
+def _unassigned(code, word):
+    return "variable {0!r} is read before it is assigned".format(
+        code.varnames.get(word, '?'))
+
+def _builtin_args(args):
+    '''Returns args for a builtin, which gets None for an EMPTY argument'''
+    if EMPTY in args:
+        return [None if arg is EMPTY else arg for arg in args]
+    return args
+
+def _print(*args):
+    print(*args)
+    pass
+
+BUILTINS = {
+    'print': _print,
+}
+
+class VM(object):
+    '''Runs Code. globals holds the top level variables of the last run by
+    name; builtins are Python callables that programs can call by name.
+
+    memoize is None to memoize the functions pragmas ask for, True to
+    memoize every pure function, or a collection of function names to
+    memoize along with those; memo_size bounds each function's cache.'''
+
+    def __init__(self, builtins=None, max_depth=MAX_DEPTH, memoize=None, memo_size=MEMO_SIZE):
+        self.globals = {}
+        self.builtins = dict(BUILTINS if builtins is None else builtins)
+        self.max_depth = max_depth
+        self.memoize = memoize
+        self.memo_size = memo_size
+        # the caches of the memoized function values still alive, and the
+        # counts of those that are gone, by name
+        self.caches = weakref.WeakSet()
+        self.retired = {}
+        pass
+
+    def cache(self, code):
+        '''Returns a new cache for a function value of code, None when it is
+        not memoized'''
+        if not code.pure:
+            return None
+        memoize = self.memoize
+        if code.memoize or memoize is True or (memoize and code.name in memoize):
+            cache = LRUCache(code.name, self.memo_size, self.retired)
+            self.caches.add(cache)
+            return cache
+        return None
+
+    def memo_stats(self):
+        '''Returns the cache statistics of every memoized function by name,
+        adding up the caches of functions of the same name. The size and
+        maxsize are those of the caches still alive.'''
+        stats = {}
+        for name, counts in self.retired.items():
+            stats[name] = dict(counts, size=0, maxsize=0)
+            pass
+        for cache in list(self.caches):
+            total = stats.setdefault(cache.name, dict.fromkeys(
+                COUNTS + ('size', 'maxsize'), 0))
+            for name, value in cache.stats().items():
+                total[name] += value
+                pass
+            pass
+        return stats
+
+    def run(self, code):
+        '''Runs the top level Code and returns what it returns, None when
+        it ends without a return'''
+        builtins = self.builtins
+        max_depth = self.max_depth
+        memo_size = self.memo_size
+        frames = []
+        current = code
+        words = code.code
+        consts = code.consts
+        names = code.names
+        locals_ = module = [UNASSIGNED] * code.nlocals + [None]
+        # the (cache, key) pairs the current frame's result is stored under
+        memo = None
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        try:
+            while True:
+                word = words[pc]
+                pc += 1
+                op = word & 255
+                if op == LOAD_LOCAL:
+                    value = locals_[word >> 8]
+                    if value is UNASSIGNED:
+                        raise ArborError(_unassigned(current, word))
+                    push(value)
+                elif op == LOAD_CONST:
+                    push(consts[word >> 8])
+                elif op == STORE_LOCAL:
+                    locals_[word >> 8] = pop()
+                elif op == ADD:
+                    right = pop()
+                    stack[-1] = stack[-1] + right
+                elif op == SUB:
+                    right = pop()
+                    stack[-1] = stack[-1] - right
+                elif op == MUL:
+                    right = pop()
+                    stack[-1] = stack[-1] * right
+                elif op == LT:
+                    right = pop()
+                    stack[-1] = stack[-1] < right
+                elif op == JUMP_IF_FALSE:
+                    if not pop():
+                        pc = word >> 8
+                        pass
+                elif op == LOAD_DEREF:
+                    # most often a variable of the function around this one
+                    env = locals_[-1]
+                    depth = word >> 24
+                    while depth > 1:
+                        env = env[-1]
+                        depth -= 1
+                        pass
+                    value = env[(word >> 8) & 0xffff]
+                    if value is UNASSIGNED:
+                        raise ArborError(_unassigned(current, word))
+                    push(value)
+                elif op == LOAD_BUILTIN:
+                    name = names[word >> 8]
+                    value = builtins.get(name, MISSING)
+                    if value is MISSING:
+                        raise ArborError("name {0!r} is not defined".format(name))
+                    push(value)
+                elif op == CALL:
+                    count = word >> 8
+                    base = len(stack) - count
+                    func = stack[base - 1]
+                    if type(func) is Function:
+                        fcode = func.code
+                        args = stack[base:]
+                        del stack[base - 1:]
+                        if count != fcode.nparams or EMPTY in args:
+                            args = _bind(fcode, args)
+                            pass
+                        cache = func.cache
+                        if cache is not None:
+                            key = memo_key(args)
+                            value = cache.get(key, MISSING)
+                            if value is not MISSING:
+                                push(value)
+                                continue
+                            pending = [(cache, key)]
+                        else:
+                            pending = None
+                            pass
+                        if len(frames) >= max_depth:
+                            raise ArborError("maximum recursion depth exceeded")
+                        frames.append((current, pc, stack, locals_, memo))
+                        memo = pending
+                        args.extend(fcode.padding)
+                        args.append(func.env)
+                        locals_ = args
+                        current = fcode
+                        words = fcode.code
+                        consts = fcode.consts
+                        names = fcode.names
+                        stack = []
+                        push = stack.append
+                        pop = stack.pop
+                        pc = 0
+                    elif callable(func):
+                        args = stack[base:]
+                        del stack[base - 1:]
+                        push(func(*_builtin_args(args)))
+                    else:
+                        raise ArborError("{0!r} is not a function".format(func))
+                elif op == TAIL_CALL:
+                    count = word >> 8
+                    base = len(stack) - count
+                    func = stack[base - 1]
+                    if type(func) is Function:
+                        fcode = func.code
+                        args = stack[base:]
+                        del stack[base - 1:]
+                        if count != fcode.nparams or EMPTY in args:
+                            args = _bind(fcode, args)
+                            pass
+                        cache = func.cache
+                        if cache is not None:
+                            key = memo_key(args)
+                            value = cache.get(key, MISSING)
+                            if value is not MISSING:
+                                # return it with the RETURN every Code ends in
+                                push(value)
+                                pc = len(words) - 1
+                                continue
+                            if type(memo) is not deque:
+                                # a chain of tail calls keeps the keys of its
+                                # last memo_size calls, as many as a cache holds
+                                memo = deque(memo or (), memo_size)
+                                pass
+                            memo.append((cache, key))
+                            pass
+                        args.extend(fcode.padding)
+                        args.append(func.env)
+                        locals_ = args
+                        current = fcode
+                        words = fcode.code
+                        consts = fcode.consts
+                        names = fcode.names
+                        pc = 0
+                        continue
+                    if not callable(func):
+                        raise ArborError("{0!r} is not a function".format(func))
+                    args = stack[base:]
+                    del stack[base - 1:]
+                    push(func(*_builtin_args(args)))
+                    pc = len(words) - 1
+                elif op == RETURN:
+                    value = pop()
+                    if memo is not None:
+                        for cache, key in memo:
+                            cache.put(key, value)
+                            pass
+                        pass
+                    if not frames:
+                        return value
+                    current, pc, stack, locals_, memo = frames.pop()
+                    words = current.code
+                    consts = current.consts
+                    names = current.names
+                    push = stack.append
+                    pop = stack.pop
+                    push(value)
+                elif op == EQ:
+                    right = pop()
+                    stack[-1] = stack[-1] == right
+                elif op == NE:
+                    right = pop()
+                    stack[-1] = stack[-1] != right
+                elif op == LE:
+                    right = pop()
+                    stack[-1] = stack[-1] <= right
+                elif op == GT:
+                    right = pop()
+                    stack[-1] = stack[-1] > right
+                elif op == GE:
+                    right = pop()
+                    stack[-1] = stack[-1] >= right
+                elif op == DIV:
+                    right = pop()
+                    stack[-1] = divide(stack[-1], right)
+                elif op == JUMP:
+                    pc = word >> 8
+                elif op == JUMP_IF_TRUE:
+                    if pop():
+                        pc = word >> 8
+                        pass
+                elif op == NOT:
+                    stack[-1] = not stack[-1]
+                elif op == STORE_DEREF:
+                    env = locals_
+                    for _ in range(word >> 24):
+                        env = env[-1]
+                        pass
+                    env[(word >> 8) & 0xffff] = pop()
+                elif op == POP:
+                    pop()
+                elif op == DUP:
+                    push(stack[-1])
+                elif op == MAKE_FUNCTION:
+                    fcode = consts[word >> 8]
+                    push(Function(fcode, locals_, self.cache(fcode) if fcode.pure else None))
+                else:
+                    raise ArborError("bad opcode {0}".format(op))
+                pass
+        except ArborError as e:
+            if e.lineno is None:
+                raise ArborError(e.message, current.lines[pc - 1]) from None
+            raise
+        except (TypeError, ZeroDivisionError, ValueError, OverflowError) as e:
+            raise ArborError(str(e), current.lines[pc - 1]) from None
+        finally:
+            self.globals = dict((name, module[slot]) for name, slot in code.variables.items()
+                                if module[slot] is not UNASSIGNED)
+            pass
+        pass
+    pass
+
+def dis(code, out=None):
+    '''Returns the disassembly of code and the functions in its constant
+    pool as text'''
+    lines = [] if out is None else out
+    lines.append("{0}: {1} params, {2} locals{3}".format(
+        code.name, code.nparams, code.nlocals, ", pure" if code.pure else ""))
+    nested = []
+    for ndx, word in enumerate(code.code):
+        op, arg = word & 255, word >> 8
+        name = OPNAMES.get(op, str(op))
+        text = ""
+        if op in (LOAD_CONST, MAKE_FUNCTION):
+            text = repr(code.consts[arg])
+            if op == MAKE_FUNCTION:
+                nested.append(code.consts[arg])
+                pass
+        elif op == LOAD_BUILTIN:
+            text = code.names[arg]
+        elif op in (LOAD_DEREF, STORE_DEREF):
+            text = "depth {0} slot {1}".format(arg >> 16, arg & 0xffff)
+            pass
+        lines.append("{0:>5} {1:>4} {2:<14} {3:>5} {4}".format(
+            code.lines[ndx], ndx, name, arg if op in HAS_ARG else '', text).rstrip())
+        pass
+    for func in nested:
+        lines.append("")
+        dis(func, lines)
+        pass
+    return "\n".join(lines) if out is None else None
+
+def functions(code):
+    '''Yields the Code of every function nested in code'''
+    for const in code.consts:
+        if type(const) is Code:
+            yield const
+            yield from functions(const)
+            pass
+        pass
+    pass
+
+def run(source, vm=None):
+    '''Compiles and runs Arbor source, returning what its top level returns'''
+    from src.vm.compiler import compile_source
+    vm = vm or VM()
+    return vm.run(compile_source(source, builtins=vm.builtins))
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='arbor run', description='Runs an Arbor program.')
+    parser.add_argument('path', help='the program to run')
+    parser.add_argument('--dis', action='store_true', help='print the bytecode instead')
+    parser.add_argument('-O', '--optimize', action='store_true',
+                        help='fold constants and prune dead branches before compiling')
+    parser.add_argument('--opt-stats', action='store_true',
+                        help='report how many nodes optimizing eliminated on stderr')
+    parser.add_argument('--memoize', action='store_true',
+                        help='memoize every pure function')
+    parser.add_argument('--memoize-only', action='append', default=[], metavar='NAME',
+                        help='memoize the pure function NAME, can be repeated')
+    parser.add_argument('--memo-size', type=int, default=MEMO_SIZE, metavar='N',
+                        help='keep the last N results of each memoized function'
+                        ' (default: {0})'.format(MEMO_SIZE))
+    parser.add_argument('--memo-stats', action='store_true',
+                        help='report memoization hits, misses and evictions on stderr')
+    args = parser.parse_args(argv)
+    if args.memo_size < 1:
+        parser.error('--memo-size must be at least 1')
+    from src.lexer import LexerError, read_source
+    from src.parser import ParserError
+    from src.vm.compiler import compile_source, CompileError
+    optimizer = None
+    if args.optimize:
+        from src.optimize import Optimizer
+        optimizer = Optimizer()
+        pass
+    try:
+        code = compile_source(read_source(pathlib.Path(args.path)), optimizer)
+        if optimizer is not None and args.opt_stats:
+            print('optimize: {0}'.format(optimizer.report), file=sys.stderr)
+            pass
+        if args.dis:
+            print(dis(code))
+            return 0
+        for name in args.memoize_only:
+            if not any(func.pure for func in functions(code) if func.name == name):
+                print('arbor: cannot memoize {0}, it is not a pure function'.format(name),
+                      file=sys.stderr)
+                pass
+            pass
+        vm = VM(memoize=True if args.memoize else set(args.memoize_only),
+                memo_size=args.memo_size)
+        try:
+            result = vm.run(code)
+        finally:
+            if args.memo_stats:
+                for name, stats in sorted(vm.memo_stats().items()):
+                    print('{0}: {hits} hits, {misses} misses, {evictions} evictions,'
+                          ' {size}/{maxsize} entries'.format(name, **stats), file=sys.stderr)
+                    pass
+                pass
+            pass
+    except (LexerError, ParserError):
+        return 1
+    except (CompileError, ArborError, OSError) as e:
+        print('arbor: {0}'.format(e), file=sys.stderr)
+        return 1
+    if result is not None:
+        print(result)
+        pass
+    return 0
@@ -0,0 +1,482 @@
+'''Compiles src.ast trees to src.vm bytecode.
+
+Each function, and the top level, becomes a Code. Trees go through
+src.resolver first, so every variable is already a slot of the frame of
+the function, or the top level, declaring it: a name is a local when that
+is the function using it, a (depth, slot) pair through the environment
+chain otherwise, and only builtins are looked up by name. Nested functions
+are compiled into the constant pool of the Code around them.
+
+While compiling, the compiler notes what each function reads, stores,
+calls and creates, and afterwards marks the functions whose results only
+depend on their arguments as pure: they store to nothing but their own
+locals, read no variable that is bound more than once, and call and create
+only pure functions, found by the variable they are bound to. A comment
+
+    // pragma memoize            memoizes every pure function
+    // pragma memoize fib, tak   memoizes the functions named
+
+asks the VM to memoize them, see src.vm.
+'''
+import re
+from array import array
+
+from src import ast
+from src.lexer.symbols import SymbolTable
+from src.resolver import Resolver, ResolveError
+from src.vm import (
+    BUILTINS, Char, Code, EMPTY, MISSING, OPBITS,
+    LOAD_CONST, LOAD_LOCAL, STORE_LOCAL, LOAD_DEREF, STORE_DEREF, LOAD_BUILTIN,
+    POP, DUP, ADD, SUB, MUL, DIV, EQ, NE, LT, LE, GT, GE, NOT,
+    JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, MAKE_FUNCTION, CALL, RETURN, TAIL_CALL,
+)
+
+BINARY = {'+': ADD, '-': SUB, '*': MUL, '/': DIV}
+COMPARE = {'==': EQ, '!=': NE, '<': LT, '<=': LE, '>': GT, '>=': GE}
+
+# the largest argument an instruction word holds
+MAX_ARG = (1 << (32 - OPBITS)) - 1
+
+PRAGMA = re.compile(r'^[ \t]*//[ \t]*pragma[ \t]+memoize\b(.*)$', re.MULTILINE)
+
+class CompileError(Exception):
+    pass
+
+def pragmas(source):
+    '''Returns the functions memoize pragmas in source ask for: True for
+    all of them, else a set of names'''
+    names = set()
+    for match in PRAGMA.finditer(source):
+        listed = match.group(1).replace(',', ' ').split()
+        if not listed:
+            return True
+        names.update(listed)
+        pass
+    return names
+
+class Effects(object):
+    '''What one function's body does besides computing with its locals.
+    Variables are keys of Compiler.variable.'''
+    __slots__ = ('impure', 'reads', 'calls', 'makes')
+
+    def __init__(self):
+        self.impure = False
+        self.reads = set()
+        self.calls = set()
+        self.makes = []
+        pass
+    pass
+
+class Assembler(object):
+    '''Collects the instructions, constants and names of one Code'''
+
+    def __init__(self, symbols):
+        self.code = array('I')
+        self.lines = array('I')
+        self.consts = []
+        self._consts = {}
+        self.names = []
+        self._names = {}
+        self.varnames = {}
+        self.symbols = symbols
+        self.lineno = 0
+        pass
+
+    def emit(self, op, arg=0):
+        if arg > MAX_ARG:
+            raise CompileError("instruction argument {0} out of range".format(arg))
+        self.code.append(arg << OPBITS | op)
+        self.lines.append(self.lineno)
+        return len(self.code) - 1
+
+    def load(self, op, arg, name):
+        '''Emits a load of the variable name'''
+        ndx = self.emit(op, arg)
+        self.varnames[self.code[ndx]] = name
+        return ndx
+
+    def patch(self, ndx, target):
+        '''Points the jump at ndx to target'''
+        self.code[ndx] = target << OPBITS | (self.code[ndx] & 255)
+        pass
+
+    def here(self):
+        return len(self.code)
+
+    def const(self, value):
+        key = (type(value), value)
+        ndx = self._consts.get(key)
+        if ndx is None:
+            ndx = self._consts[key] = len(self.consts)
+            self.consts.append(value)
+            pass
+        return ndx
+
+    def function(self, code):
+        self.consts.append(code)
+        return len(self.consts) - 1
+
+    def name(self, name):
+        ndx = self._names.get(name)
+        if ndx is None:
+            ndx = self._names[name] = len(self.names)
+            self.names.append(name)
+            pass
+        return ndx
+    pass
+
+class Compiler(ast.NodeVisitor):
+    '''Compiles one tree. Literal values are read through symbols, a
+    src.lexer.symbols.SymbolTable, so each distinct literal is parsed once.
+    builtins are the names the VM provides and source the text the tree was
+    parsed from, for the positions of resolution errors.'''
+
+    def __init__(self, symbols=None, memoize=(), builtins=(), source=None):
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.builtins = builtins
+        self.source = source
+        self.asm = None
+        # the Assembler of every function being compiled, innermost last
+        self.frames = []
+        # the most slots the function being compiled uses
+        self.nlocals = 0
+        # the target of the assignment whose value is being compiled
+        self.naming = None
+        # True or the names of the functions to memoize, from pragmas
+        self.memoize = memoize
+        # the Effects of the function being compiled and of every function
+        self.effects = None
+        self.functions = {}
+        # variable -> how many times it is stored to, the Code bound to it
+        self.stores = {}
+        self.bound = {}
+        pass
+
+    def compile(self, tree, name='<module>'):
+        '''Resolves and returns the Code of a Statements tree'''
+        resolver = Resolver(self.builtins, self.source)
+        try:
+            frame = resolver.resolve(tree)
+        except ResolveError as e:
+            raise CompileError(str(e)) from None
+        self.asm = Assembler(self.symbols)
+        self.frames = [self.asm]
+        self.statements(tree.body)
+        self.asm.emit(LOAD_CONST, self.asm.const(None))
+        self.asm.emit(RETURN)
+        code = self.finish(name, 0, frame.size, ())
+        code.variables = dict(resolver.top.names)
+        self.purity()
+        return code
+
+    def purity(self):
+        '''Marks the pure functions, assuming every function is until shown
+        otherwise so recursive ones can be'''
+        stores = self.stores
+        pure = set(self.functions)
+        changed = True
+        while changed:
+            changed = False
+            for code in list(pure):
+                effects = self.functions[code]
+                if (effects.impure
+                        or any(stores.get(var, 0) > 1 for var in effects.reads)
+                        or any(stores.get(var, 0) > 1 or self.bound.get(var) not in pure
+                               for var in effects.calls)
+                        or any(made not in pure for made in effects.makes)):
+                    pure.discard(code)
+                    changed = True
+                    pass
+                pass
+            pass
+        for code in self.functions:
+            code.pure = code in pure
+            if self.memoize is True or code.name in self.memoize:
+                if not code.pure and self.memoize is not True:
+                    raise CompileError("cannot memoize {0}, it is not pure".format(code.name))
+                code.memoize = code.pure
+                pass
+            pass
+        pass
+
+    def finish(self, name, nparams, nlocals, defaults):
+        asm = self.asm
+        return Code(name, asm.code, asm.consts, asm.names, asm.lines,
+                    nparams, nlocals, defaults, varnames=asm.varnames)
+
+    def statements(self, body):
+        for node in body:
+            if node is None:
+                continue
+            self.asm.lineno = node.lineno
+            self.statement(node)
+            pass
+        pass
+
+    def statement(self, node):
+        '''Compiles node for its effect, leaving nothing on the stack'''
+        self.naming = None
+        if isinstance(node, ast.Assign):
+            self.naming = node.target
+            self.visit(node.value)
+            self.asm.lineno = node.lineno
+            self.store(node.target)
+        elif isinstance(node, (ast.If, ast.IfElse, ast.Return)):
+            self.visit(node)
+        elif isinstance(node, ast.Decl):
+            # binds None, so a later assignment makes it stored twice
+            self.asm.emit(LOAD_CONST, self.asm.const(None))
+            self.store(node)
+        else:
+            self.visit(node)
+            self.asm.emit(POP)
+            pass
+        pass
+
+    def variable(self, node):
+        '''Returns the variable a Ref or Decl names, as the Assembler of the
+        function whose frame holds it and the slot, or None and the name of
+        a builtin'''
+        if isinstance(node, ast.Decl):
+            return self.asm, node.slot
+        if node.depth is None:
+            return None, node.name
+        return self.frames[-1 - node.depth], node.slot
+
+    def local(self, slot):
+        self.nlocals = max(self.nlocals, slot + 1)
+        return slot
+
+    def deref(self, node):
+        if node.slot > 0xffff or node.depth > 0xff:
+            raise CompileError("line {0}: {1!r} is too far out to reach".format(
+                node.lineno, node.name))
+        return node.depth << 16 | node.slot
+
+    def store(self, target):
+        var = self.variable(target)
+        self.stores[var] = self.stores.get(var, 0) + 1
+        if isinstance(target, ast.Decl):
+            self.asm.emit(STORE_LOCAL, self.local(target.slot))
+        elif target.depth == 0:
+            self.asm.emit(STORE_LOCAL, target.slot)
+        else:
+            if self.effects is not None:
+                self.effects.impure = True
+                pass
+            self.asm.emit(STORE_DEREF, self.deref(target))
+            pass
+        pass
+
+    def visit_Constant(self, node):
+        self.asm.emit(LOAD_CONST, self.asm.const(node.value))
+        pass
+
+    def visit_Int(self, node):
+        self.asm.emit(LOAD_CONST, self.asm.const(self.symbols.number(node.value, 'int')))
+        pass
+
+    def visit_Float(self, node):
+        self.asm.emit(LOAD_CONST, self.asm.const(self.symbols.number(node.value, 'float')))
+        pass
+
+    def visit_Char(self, node):
+        self.asm.emit(LOAD_CONST, self.asm.const(Char(ord(node.value))))
+        pass
+
+    def visit_Boolean(self, node):
+        self.asm.emit(LOAD_CONST, self.asm.const(node.value == 'true'))
+        pass
+
+    def visit_Usage(self, node):
+        # every Usage is an ast.Ref once resolved
+        if node.depth == 0:
+            self.asm.load(LOAD_LOCAL, node.slot, node.name)
+            return
+        if self.effects is not None:
+            self.effects.reads.add(self.variable(node))
+            pass
+        if node.depth is None:
+            self.asm.emit(LOAD_BUILTIN, self.asm.name(node.name))
+        else:
+            self.asm.load(LOAD_DEREF, self.deref(node), node.name)
+            pass
+        pass
+
+    def visit_Decl(self, node):
+        # a declaration used as a value, e.g. the target of a nested assign
+        self.asm.emit(LOAD_CONST, self.asm.const(None))
+        self.asm.emit(DUP)
+        self.store(node)
+        pass
+
+    def visit_Assign(self, node):
+        self.naming = node.target
+        self.visit(node.value)
+        self.asm.emit(DUP)
+        self.store(node.target)
+        pass
+
+    def visit_BinOp(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+        self.asm.lineno = node.lineno
+        self.asm.emit(BINARY[node.op])
+        pass
+
+    def visit_Comps(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+        self.asm.lineno = node.lineno
+        self.asm.emit(COMPARE[node.op])
+        pass
+
+    def visit_Bool(self, node):
+        # && and || short circuit and give a boolean
+        asm = self.asm
+        jump = JUMP_IF_FALSE if node.op == '&&' else JUMP_IF_TRUE
+        self.visit(node.left)
+        first = asm.emit(jump)
+        self.visit(node.right)
+        second = asm.emit(jump)
+        asm.emit(LOAD_CONST, asm.const(node.op == '&&'))
+        done = asm.emit(JUMP)
+        asm.patch(first, asm.here())
+        asm.patch(second, asm.here())
+        asm.emit(LOAD_CONST, asm.const(node.op != '&&'))
+        asm.patch(done, asm.here())
+        pass
+
+    def visit_Not(self, node):
+        self.visit(node.operand)
+        self.asm.emit(NOT)
+        pass
+
+    def visit_Return(self, node):
+        if isinstance(node.value, ast.FuncUse):
+            # a call in tail position replaces the frame it returns from
+            self.call(node.value, TAIL_CALL)
+            return
+        self.visit(node.value)
+        self.asm.lineno = node.lineno
+        self.asm.emit(RETURN)
+        pass
+
+    def visit_FuncUse(self, node):
+        self.call(node, CALL)
+        pass
+
+    def call(self, node, op):
+        self.visit_Usage(node)
+        if self.effects is not None:
+            self.effects.calls.add(self.variable(node))
+            pass
+        for arg in node.args:
+            if arg is None:
+                self.asm.emit(LOAD_CONST, self.asm.const(EMPTY))
+            else:
+                self.visit(arg)
+                pass
+            pass
+        self.asm.lineno = node.lineno
+        self.asm.emit(op, len(node.args))
+        pass
+
+    def visit_If(self, node):
+        self.visit(node.cond)
+        skip = self.asm.emit(JUMP_IF_FALSE)
+        self.statements(node.body)
+        self.asm.patch(skip, self.asm.here())
+        pass
+
+    def visit_IfElse(self, node):
+        asm = self.asm
+        ends = []
+        while isinstance(node, ast.IfElse):
+            self.visit(node.cond)
+            skip = asm.emit(JUMP_IF_FALSE)
+            self.statements(node.body)
+            if node.orelse is not None:
+                ends.append(asm.emit(JUMP))
+                pass
+            asm.patch(skip, asm.here())
+            node = node.orelse
+            pass
+        if node is not None:
+            self.statements(node.body)
+            pass
+        for ndx in ends:
+            asm.patch(ndx, asm.here())
+            pass
+        pass
+
+    def visit_Func(self, node):
+        target, self.naming = self.naming, None
+        params = node.params.params if node.params is not None else []
+        defaults = tuple(self.default(param) for param in params)
+        outer_asm, outer_nlocals, outer_effects = self.asm, self.nlocals, self.effects
+        self.asm = Assembler(self.symbols)
+        self.asm.lineno = node.lineno
+        self.frames.append(self.asm)
+        self.nlocals = len(params)
+        effects = self.effects = Effects()
+        try:
+            self.statements(node.body.body)
+            self.asm.emit(LOAD_CONST, self.asm.const(None))
+            self.asm.emit(RETURN)
+            name = target.name if target is not None else None
+            code = self.finish(name or "<function line {0}>".format(node.lineno),
+                               len(params), self.nlocals, defaults)
+        finally:
+            self.frames.pop()
+            self.asm, self.nlocals, self.effects = outer_asm, outer_nlocals, outer_effects
+            pass
+        self.functions[code] = effects
+        if target is not None:
+            self.bound[self.variable(target)] = code
+            pass
+        if outer_effects is not None:
+            outer_effects.makes.append(code)
+            pass
+        self.asm.emit(MAKE_FUNCTION, self.asm.function(code))
+        pass
+
+    def default(self, param):
+        if not isinstance(param, ast.Default):
+            return MISSING
+        value = param.value
+        if isinstance(value, ast.Int):
+            return self.symbols.number(value.value, 'int')
+        if isinstance(value, ast.Float):
+            return self.symbols.number(value.value, 'float')
+        if isinstance(value, ast.Char):
+            return Char(ord(value.value))
+        return value.value
+
+    def generic_visit(self, node):
+        raise CompileError("line {0}: cannot compile {1}".format(
+            node.lineno, type(node).__name__))
+    pass
+
+def compile_tree(tree, symbols=None, memoize=(), builtins=(), source=None):
+    '''Returns the Code of a Statements tree, with the functions named in
+    memoize, or all when it is True, asking to be memoized. Names that are
+    not declared must be in builtins.'''
+    return Compiler(symbols, memoize, builtins, source).compile(tree)
+
+def compile_source(source, optimizer=None, builtins=None):
+    '''Parses and compiles Arbor source, raising LexerError or ParserError
+    when it does not parse and CompileError when it uses a name that is
+    neither declared nor in builtins, by default the names of
+    src.vm.BUILTINS. With a src.optimize.Optimizer, the tree goes through
+    it first.'''
+    from src.parser import Parser
+    session = Parser()
+    tree = session.parse_ast(source, True)
+    if optimizer is not None:
+        tree = optimizer.optimize(tree)
+        pass
+    if builtins is None:
+        builtins = BUILTINS
+        pass
+    return compile_tree(tree, session.symbols, pragmas(source), builtins, source)
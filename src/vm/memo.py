@@ -0,0 +1,81 @@
+'''Bounded caches for memoized Arbor functions.
+
+When memoizing, each pure function value gets its own LRUCache, keyed by
+its arguments after defaults are filled in. A key holds the type of every
+argument along with its value, since 1, 1.0 and the char with code point 1
+compare equal but do not behave the same.
+
+A closure created over and over gets a new cache each time, so caches go
+away with their function values: a VM only keeps weak references to them,
+and a cache adds its counts to the VM's totals when it is collected.
+'''
+from collections import OrderedDict
+
+# the most results a function keeps by default
+MEMO_SIZE = 1024
+
+# the counts a cache keeps adding up after it is gone
+COUNTS = ('hits', 'misses', 'evictions')
+
+def key(args):
+    '''Returns the cache key of a call with the list args'''
+    return tuple(args), tuple(map(type, args))
+
+class LRUCache(object):
+    '''Keeps the maxsize most recently used results, counting hits, misses
+    and evictions. When the cache is collected, its counts are added to
+    retired, a dict of COUNTS dicts by name, if given.'''
+    __slots__ = ('name', 'entries', 'maxsize', 'hits', 'misses', 'evictions', 'retired',
+                 '__weakref__')
+
+    def __init__(self, name, maxsize=MEMO_SIZE, retired=None):
+        self.name = name
+        self.entries = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.retired = retired
+        pass
+
+    def __del__(self):
+        if self.retired is not None:
+            total = self.retired.setdefault(self.name, dict.fromkeys(COUNTS, 0))
+            for name in COUNTS:
+                total[name] += getattr(self, name)
+                pass
+            pass
+        pass
+
+    def get(self, key, default=None):
+        '''Returns the result stored for key, default on a miss or when key
+        does not hash'''
+        entries = self.entries
+        try:
+            value = entries[key]
+        except (KeyError, TypeError):
+            self.misses += 1
+            return default
+        entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        entries = self.entries
+        try:
+            entries[key] = value
+        except TypeError:
+            return
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+            pass
+        pass
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self.entries), 'maxsize': self.maxsize}
+    pass
@@ -0,0 +1,73 @@
+import unittest
+
+from src import ast
+from src.parser import parse, parse_ast
+
+CODE = '''let a = 1;
+const foo = (b:int, c = 'x') ->
+    return b + a;
+done;
+if (a > 2) ->
+    foo(a, 3);
+else if (a) ->
+    !a;
+else ->
+    "s";
+done;
+'''
+
+class Counter(ast.NodeVisitor):
+    def __init__(self):
+        self.binops = 0
+        self.names = []
+        pass
+
+    def visit_BinOp(self, node):
+        self.binops += 1
+        self.generic_visit(node)
+        pass
+
+    def visit_Usage(self, node):
+        self.names.append(node.name)
+        pass
+
+class AstTest(unittest.TestCase):
+    def test_slots(self):
+        tree = parse_ast(CODE, True)
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            self.assertFalse(hasattr(node, '__dict__'), type(node).__name__)
+            stack.extend(node.children())
+            pass
+        pass
+
+    def test_toList(self):
+        tree = parse_ast(CODE, True)
+        self.assertEquals(ast.to_list(tree), parse(CODE, True))
+        decl, func, ifelse = tree.body
+        self.assertEquals(ast.to_list(func.value.params), [
+            'params', [['paramtype', 'b', 'int'], ['default', 'c', ['char', 'x']]]])
+        self.assertEquals(ast.to_list(ifelse.orelse)[0::3], ['elseif', 'else'])
+        pass
+
+    def test_positions(self):
+        tree = parse_ast(CODE, True)
+        decl, func, ifelse = tree.body
+        self.assertEquals((decl.lineno, decl.lexpos), (1, 0))
+        self.assertEquals((func.value.lineno, func.value.lexpos), (2, CODE.index('(b:')))
+        self.assertEquals(func.value.body.lexpos, CODE.index('->'))
+        ret = func.value.body.body[0]
+        self.assertEquals((ret.lineno, ret.lexpos), (3, CODE.index('return')))
+        self.assertEquals(ret.value.right.lexpos, CODE.index('a;'))
+        self.assertEquals((ifelse.orelse.lineno, ifelse.orelse.lexpos), (7, CODE.index('else if')))
+        pass
+
+    def test_visitor(self):
+        counter = Counter()
+        counter.visit(parse_ast(CODE, True))
+        # Comps is a BinOp, so it is counted by visit_BinOp
+        self.assertEquals(counter.binops, 2)
+        self.assertEquals(counter.names, ['b', 'a', 'a', 'a', 'a', 'a'])
+        self.assertIn(ast.Comps, Counter._dispatch)
+        pass
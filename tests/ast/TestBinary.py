@@ -0,0 +1,121 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from src import ast
+from src.ast import binary
+from src.lexer import iter_tokens
+from src.parser import parse, parse_ast
+from benchmarks.corpus import generate
+
+CODE = '''let a = 1;
+const foo = (b:int, c = 'x', d = 2.5) ->
+    return b + a * 0x1f;
+done;
+if (a > 2) ->
+    foo(a, 3, );
+else if (a) ->
+    !a;
+else if (a <= 10) ->
+    foo();
+else ->
+    let s = "tab\\té";
+done;
+'''
+
+def tree_of(source):
+    return parse_ast(iter_tokens(source), True)
+
+def dump(node):
+    '''Returns the list form of a tree with every node's class and position'''
+    if isinstance(node, ast.Node):
+        return [type(node).__name__, node.lineno, node.lexpos] + [
+            dump(getattr(node, field)) for field in node._fields]
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    return node
+
+class BinaryTest(unittest.TestCase):
+    def roundTrip(self, source):
+        tree = tree_of(source)
+        data = binary.dumps(tree)
+        self.assertEquals(ast.to_list(binary.loads(data)), parse(source))
+        self.assertEquals(dump(binary.loads(data)), dump(tree))
+        return data
+
+    def test_roundTrip(self):
+        self.roundTrip(CODE)
+        self.roundTrip(generate(500))
+        self.roundTrip("")
+        pass
+
+    def test_everyKind(self):
+        tree = tree_of(CODE + generate(50))
+        kinds = set()
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            kinds.add(type(node))
+            stack.extend(node.children())
+            pass
+        # Statements of the list form have no single-statement node, and
+        # only src.optimize makes Booleans
+        self.assertEquals(set(binary.KINDS) - kinds - {ast.Boolean}, set())
+        pass
+
+    def test_smallerThanPickle(self):
+        source = generate(2000)
+        data = self.roundTrip(source)
+        tree = tree_of(source)
+        self.assertLess(len(data), len(pickle.dumps(tree, pickle.HIGHEST_PROTOCOL)) / 2)
+        pass
+
+    def test_lazy(self):
+        reader = binary.Reader(self.roundTrip(CODE))
+        root = reader.lazy()
+        self.assertEquals(root.cls, ast.Statements)
+        func = root.body[1].value
+        self.assertEquals(func.cls, ast.Func)
+        self.assertEquals((func.lineno, func.lexpos), (2, CODE.index('(b:int')))
+        self.assertEquals(func.params.params[1].value.value, 'x')
+        self.assertEquals(ast.to_list(func.node()), parse(CODE)[1][1][2])
+        self.assertEquals(root.body[2].orelse.orelse.orelse.body[0].value.value, 'tab\té')
+        self.assertRaises(AttributeError, getattr, root, 'name')
+        # only the records that were touched were decoded
+        self.assertLess(sum(1 for s in reader.strings if s is not None), len(reader.strings))
+        pass
+
+    def test_deepTree(self):
+        source = "a" + " + a" * 20000 + ";"
+        tree = binary.loads(binary.dumps(tree_of(source)))
+        depth = 0
+        node = tree.body[0]
+        while isinstance(node, ast.BinOp):
+            node = node.left
+            depth += 1
+            pass
+        self.assertEquals(depth, 20000)
+        pass
+
+    def test_loadMapped(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'tree.arbt')
+            binary.dump(tree_of(CODE), path)
+            with binary.load(path) as reader:
+                self.assertEquals(ast.to_list(reader.node()), parse(CODE))
+                self.assertEquals(reader.lazy().body[0].target.name, 'a')
+                pass
+        finally:
+            shutil.rmtree(directory)
+            pass
+        pass
+
+    def test_badData(self):
+        data = binary.dumps(tree_of(CODE))
+        self.assertRaises(binary.FormatError, binary.Reader, b'ARB')
+        self.assertRaises(binary.FormatError, binary.Reader, b'XXXX' + data[4:])
+        self.assertRaises(binary.FormatError, binary.Reader, data[:4] + b'\x09' + data[5:])
+        pass
@@ -0,0 +1,44 @@
+import unittest
+
+from src import ast
+from src.ast import binary
+from src.lexer import tokens, iter_tokens
+from src.parser import parse, parse_ast
+from benchmarks.corpus import program
+
+class CorpusTest(unittest.TestCase):
+    def test_seeded(self):
+        self.assertEquals(program(50, seed=3), program(50, seed=3))
+        self.assertNotEqual(program(50, seed=3), program(50, seed=4))
+        pass
+
+    def test_everyToken(self):
+        source = program(300)
+        seen = set(tok.type for tok in iter_tokens(source))
+        self.assertEquals(set(tokens) - seen, set())
+        self.assertIn('//', source)
+        self.assertIn('/*', source)
+        pass
+
+    def test_everyNode(self):
+        tree = parse_ast(iter_tokens(program(300)), True)
+        seen = set()
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            seen.add(type(node))
+            stack.extend(node.children())
+            pass
+        # only src.optimize makes Booleans
+        self.assertEquals(set(binary.KINDS) - seen - {ast.Boolean}, set())
+        pass
+
+    def test_backendsAgree(self):
+        for seed in range(5):
+            source = program(100, seed=seed)
+            self.assertEquals(parse(source, True, backend='pratt'), parse(source, True))
+            self.assertEquals(
+                [(t.type, t.value, t.lineno, t.lexpos) for t in iter_tokens(source, 'fast')],
+                [(t.type, t.value, t.lineno, t.lexpos) for t in iter_tokens(source, 'ply')])
+            pass
+        pass
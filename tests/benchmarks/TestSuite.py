@@ -0,0 +1,31 @@
+import unittest
+
+from benchmarks import suite
+
+def report(calibration, lex_s, peak_mb):
+    return {'calibration_s': calibration, 'results': [
+        {'size': 10, 'lex_s': lex_s, 'lex_fast_s': 1.0, 'parse_s': 1.0, 'total_s': 1.0,
+         'peak_mb': peak_mb}]}
+
+class SuiteTest(unittest.TestCase):
+    def test_measure(self):
+        result = suite.run([5], 1)
+        entry = result['results'][0]
+        self.assertEquals(entry['size'], 5)
+        for key in suite.COMPARED + ('tokens', 'bytes', 'tokens_per_s'):
+            self.assertGreater(entry[key], 0)
+            pass
+        pass
+
+    def test_compare(self):
+        base = report(1.0, 1.0, 10.0)
+        self.assertFalse(suite.compare(report(1.0, 1.2, 10.0), base, 0.25)[1])
+        self.assertTrue(suite.compare(report(1.0, 1.3, 10.0), base, 0.25)[1])
+        # twice as slow on a machine that is twice as slow is no regression
+        self.assertFalse(suite.compare(report(2.0, 2.0, 10.0), base, 0.25)[1])
+        # memory is not scaled by machine speed
+        self.assertTrue(suite.compare(report(2.0, 1.0, 20.0), base, 0.25)[1])
+        lines, regressed = suite.compare(report(1.0, 1.3, 10.0), base, 0.25)
+        self.assertEquals(len(lines), len(suite.COMPARED))
+        self.assertIn('REGRESSION', lines[0])
+        pass
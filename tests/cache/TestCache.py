@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+
+from src import ast, cache
+from src.cache import Cache
+from src.parser import parse_ast
+from benchmarks.corpus import generate
+
+SOURCE = generate(30).encode()
+
+def store(directory):
+    '''Writes and reads back the same entry from another process'''
+    entries = Cache(directory)
+    key = entries.key(SOURCE)
+    for _ in range(20):
+        entries.put(key, parse_ast(str(SOURCE, 'utf-8'), True))
+        assert entries.get(key) is not None
+        pass
+    return entries.hits
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = Cache(self.directory)
+        pass
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        pass
+
+    def test_roundTrip(self):
+        key = self.cache.key(SOURCE)
+        self.assertIsNone(self.cache.get(key))
+        tree = parse_ast(str(SOURCE, 'utf-8'), True)
+        self.cache.put(key, tree)
+        cached = self.cache.get(key)
+        self.assertEquals(ast.to_list(cached), ast.to_list(tree))
+        self.assertEquals(cached.body[3].lineno, tree.body[3].lineno)
+        self.assertEquals(self.cache.stats(), {'hits': 1, 'misses': 1, 'writes': 1, 'evictions': 0})
+        pass
+
+    def test_contains(self):
+        key = self.cache.key(SOURCE)
+        self.assertFalse(self.cache.contains(key))
+        self.cache.put(key, parse_ast(str(SOURCE, 'utf-8'), True))
+        os.utime(self.cache.path(key), (1, 1))
+        # a hit is not decoded, only touched
+        with mock.patch('src.ast.binary.loads', side_effect=AssertionError):
+            self.assertTrue(self.cache.contains(key))
+            pass
+        self.assertTrue(os.stat(self.cache.path(key)).st_mtime > 1)
+        self.assertEquals(self.cache.stats(), {'hits': 1, 'misses': 1, 'writes': 1, 'evictions': 0})
+        pass
+
+    def test_keys(self):
+        key = self.cache.key(SOURCE)
+        self.assertEquals(key, Cache(self.directory).key(SOURCE))
+        self.assertNotEqual(key, self.cache.key(SOURCE + b' '))
+        saved = cache._version
+        try:
+            cache._version = b'another grammar'
+            self.assertNotEqual(key, self.cache.key(SOURCE))
+        finally:
+            cache._version = saved
+            pass
+        pass
+
+    def test_corruptEntry(self):
+        key = self.cache.key(SOURCE)
+        self.cache.put(key, ast.Statements([]))
+        with open(self.cache.path(key), 'wb') as fo:
+            fo.write(b'\x80\x05garbage')
+            pass
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse(os.path.exists(self.cache.path(key)))
+        pass
+
+    def test_pruneLeastRecentlyUsed(self):
+        keys = [self.cache.key(str(ndx).encode()) for ndx in range(5)]
+        for ndx, key in enumerate(keys):
+            self.cache.put(key, ast.Statements([ast.Int(str(ndx))]))
+            os.utime(self.cache.path(key), (ndx, ndx))
+            pass
+        self.cache.get(keys[0])
+        size = os.path.getsize(self.cache.path(keys[0]))
+        self.assertEquals(self.cache.prune(size * 3), 2)
+        self.assertEquals([self.cache.get(key) is not None for key in keys],
+                          [True, False, False, True, True])
+        self.assertEquals(self.cache.clear(), 3)
+        self.assertEquals(self.cache.entries(), [])
+        pass
+
+    def test_concurrentWriters(self):
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            hits = list(pool.map(store, [self.directory] * 4))
+            pass
+        self.assertEquals(hits, [20] * 4)
+        self.assertEquals(len(self.cache.entries()), 1)
+        self.assertEquals([name for sub in os.listdir(self.directory)
+                           for name in os.listdir(os.path.join(self.directory, sub))
+                           if name.endswith('.tmp')], [])
+        pass
@@ -0,0 +1,114 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src.cache import Cache
+from src.cli import collect, compile_files, main
+
+FILES = {
+    'a.ab': "let a = 1;\n",
+    'b.ab': "let b = ;\n",
+    'lib/c.ab': "let f = (x, y) ->\n    return x;\ndone;\n",
+    'lib/deep/d.ab': "d $ 1;\n",
+    'lib/notes.txt': "not arbor",
+}
+
+class CliTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name, text in FILES.items():
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as fo:
+                fo.write(text)
+                pass
+            pass
+        pass
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        pass
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def run_main(self, argv):
+        out = io.StringIO()
+        err = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            status = main(['--cache-dir', self.path('.cache')] + argv)
+            pass
+        return status, out.getvalue()
+
+    def test_collect(self):
+        self.assertEquals(collect([self.root]),
+                          [self.path('a.ab'), self.path('b.ab'),
+                           self.path('lib/c.ab'), self.path('lib/deep/d.ab')])
+        self.assertEquals(collect([self.path('lib/**/*.ab')]),
+                          [self.path('lib/c.ab'), self.path('lib/deep/d.ab')])
+        self.assertEquals(collect([self.path('b.ab'), self.path('*.ab')]),
+                          [self.path('b.ab'), self.path('a.ab')])
+        pass
+
+    def test_diagnostics(self):
+        results = compile_files(collect([self.root]), jobs=1)
+        self.assertEquals([r.ok for r in results], [True, False, True, False])
+        self.assertEquals(results[1].diagnostics,
+                          [self.path('b.ab') + ': Syntax error 1:9: ;'])
+        self.assertEquals(results[3].diagnostics,
+                          [self.path('lib/deep/d.ab') + ": Illegal character '$' at 1:3"])
+        pass
+
+    def test_everyError(self):
+        with open(self.path('e.ab'), 'w') as fo:
+            fo.write("let a = ;\nb;\nlet c = );\n")
+            pass
+        status, out = self.run_main([self.path('e.ab')])
+        self.assertEquals(status, 1)
+        self.assertEquals(out.splitlines(),
+                          [self.path('e.ab') + ': Syntax error 1:9: ;',
+                           self.path('e.ab') + ': Syntax error 3:9: )'])
+        status, out = self.run_main(['--max-errors', '1', self.path('e.ab')])
+        self.assertEquals(out.splitlines(),
+                          [self.path('e.ab') + ': Syntax error 1:9: ;',
+                           self.path('e.ab') + ': Too many errors, giving up'])
+        # profiling reports the same errors
+        for argv in (['--stats'], ['--stats', '--max-errors', '1']):
+            self.assertEquals(self.run_main(argv + [self.path('e.ab')]),
+                              self.run_main(argv[1:] + [self.path('e.ab')]))
+            pass
+        pass
+
+    def test_parallelMatchesSerial(self):
+        serial = self.run_main(['-j', '1', self.root])
+        parallel = self.run_main(['-j', '3', self.root])
+        self.assertEquals(serial, parallel)
+        self.assertEquals(serial[0], 1)
+        pass
+
+    def test_exitStatus(self):
+        self.assertEquals(self.run_main([self.path('a.ab'), self.path('lib/*.ab')])[0], 0)
+        self.assertEquals(self.run_main([self.path('missing/*.ab')])[0], 2)
+        pass
+
+    def test_cache(self):
+        '''a second run takes unchanged files that parsed from the cache'''
+        first = self.run_main(['--cache-stats', self.root])
+        # a hit is neither parsed nor decoded
+        with mock.patch('src.parser.parse_ast', side_effect=AssertionError), \
+                mock.patch('src.ast.binary.loads', side_effect=AssertionError):
+            results = compile_files([self.path('a.ab'), self.path('lib/c.ab')], 1,
+                                    Cache(self.path('.cache')))
+            pass
+        self.assertEquals([r.cached for r in results], [True, True])
+        self.assertEquals(self.run_main(['-j', '2', self.root]), first)
+        with open(self.path('a.ab'), 'a') as fo:
+            fo.write("let z = 2;\n")
+            pass
+        results = compile_files([self.path('a.ab')], 1, Cache(self.path('.cache')))
+        self.assertEquals([r.cached for r in results], [False])
+        pass
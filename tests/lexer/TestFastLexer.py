@@ -0,0 +1,84 @@
+import random
+import unittest
+
+from src.lexer import iter_tokens, lex, reserved
+from src.lexer import fast
+
+# the inputs exercised by TestLexer, plus a few mixed programs
+CASES = [
+    " \t\n",
+    "// This is a comment with key words. All of this will get ignored: if else done",
+    "/*\n this is a big comment block\n if else done return */",
+    "if else done return const let int float char function",
+    "1431", "11", "11.34", "011", "0x11AeFF", "-32111", "11 123 55312 4391 2434",
+    ".33", "0.33", "-0.33",
+    "this", "yoseph", "12tiemyshoe",
+    "'a'", '"abcdef"', r'"a\"b" "c\\" "\n\t"',
+    '''
+    const test = 1;
+    let foo = (a, b, c) ->
+        if (a > b) ->
+            return c;
+        else if (a < b) ->
+            return b;
+        else ->
+            return a;
+        done;
+    ''',
+    "a /* never closed",
+    '"no end\nx;"',
+    "a == b != c <= d >= e && f || !g -> h: i, j; k = 1 + 2 - 3 * 4 / 5;",
+]
+
+FRAGMENTS = [
+    "a", "foo", "_x1", "12", "-7", "0x1f", "0X1", "017", "08", "1.5", ".25", "-0.5",
+    "'c'", "'", '"s"', '"e\\"s"', '"', "/* c */", "/* \n */", "/*", "// c\n",
+    "+", "-", "*", "/", "(", ")", ":", ",", ";", "->", "=", "==", "!=", "!",
+    "<", ">", "<=", ">=", "&&", "||", "&", "|", "@", "#",
+    " ", "\t", "\n", "\n\n",
+] + list(reserved)
+
+def stream(func):
+    '''Returns the tokens func produces, or the type of error it raised'''
+    try:
+        return [(t.type, t.value, t.lineno, t.lexpos, t.column) for t in func()]
+    except Exception as e:
+        return type(e)
+
+class FastLexerTest(unittest.TestCase):
+    def assertSameTokens(self, code):
+        ply = stream(lambda: iter_tokens(code, backend='ply'))
+        hand = stream(lambda: fast.iter_tokens(code))
+        self.assertEquals(ply, hand, repr(code))
+        pass
+
+    def test_cases(self):
+        for code in CASES:
+            self.assertSameTokens(code)
+            pass
+        pass
+
+    def test_random(self):
+        rnd = random.Random(1234)
+        for _ in range(2000):
+            code = "".join(rnd.choice(FRAGMENTS) for _ in range(rnd.randrange(1, 30)))
+            self.assertSameTokens(code)
+            pass
+        pass
+
+    def test_randomCharacters(self):
+        rnd = random.Random(4321)
+        alphabet = "ab01x9._-+*/<>=!&|(),;:'\"\\ \t\n"
+        for _ in range(2000):
+            self.assertSameTokens("".join(rnd.choice(alphabet) for _ in range(rnd.randrange(1, 20))))
+            pass
+        pass
+
+    def test_backendFlag(self):
+        code = "let a = 0x10;"
+        self.assertEquals(
+            [(t.type, t.value) for t in lex(code, backend='fast')],
+            [(t.type, t.value) for t in lex(code, backend='ply')])
+        self.assertEquals(
+            [t.column for t in iter_tokens(code, backend='fast')], [1, 5, 7, 9, 13])
+        pass
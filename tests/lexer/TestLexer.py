@@ -1,6 +1,13 @@
+import io
+import mmap
+import os
+import pathlib
+import tempfile
+import time
+import types
 import unittest
 
-from src.lexer import lex, lexer, LexerError
+from src.lexer import lex, lexer, LexerError, iter_tokens
 
 class LexerTest(unittest.TestCase):
     def test_ignore(self):
@@ -221,3 +228,89 @@ class LexerTest(unittest.TestCase):
             self.assertEquals(expectedToks[ndx], i.type)
             pass
         pass
+
+    def test_iterTokens(self):
+        '''iter_tokens streams the same tokens lex returns'''
+        code = "const test = 1;\nlet foo = (a, b) ->\n  return a + b;\ndone;"
+        stream = iter_tokens(code)
+        self.assertIsInstance(stream, types.GeneratorType)
+        expected = [(t.type, t.value, t.lexpos) for t in lex(code)]
+        self.assertEquals([(t.type, t.value, t.lexpos) for t in stream], expected)
+        pass
+
+    def test_iterTokensPositions(self):
+        code = "a;\n  bc = 1;\n\n    done;"
+        toks = list(iter_tokens(code))
+        self.assertEquals([(t.value, t.lineno, t.column) for t in toks], [
+            ('a', 1, 1), (';', 1, 2),
+            ('bc', 2, 3), ('=', 2, 6), ('1', 2, 8), (';', 2, 9),
+            ('done', 4, 5), (';', 4, 9),
+        ])
+        # line numbers restart with every stream
+        self.assertEquals(list(iter_tokens(code))[-1].lineno, 4)
+        pass
+
+    def test_iterTokensSources(self):
+        '''iter_tokens reads paths, file objects and memory maps'''
+        code = "let foo = 0x1F;\nfoo;"
+        expected = [(t.type, t.value) for t in lex(code)]
+        fd, path = tempfile.mkstemp(suffix='.ab')
+        try:
+            with os.fdopen(fd, 'w') as fi:
+                fi.write(code)
+            kinds = lambda src: [(t.type, t.value) for t in iter_tokens(src)]
+            self.assertEquals(kinds(pathlib.Path(path)), expected)
+            self.assertEquals(kinds(io.StringIO(code)), expected)
+            with open(path, 'rb') as fi:
+                self.assertEquals(kinds(fi), expected)
+                with mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    self.assertEquals(kinds(mm), expected)
+        finally:
+            os.remove(path)
+        pass
+
+    def test_commentEndsAtFirstTerminator(self):
+        toks = lex("/* a */ x; /* b\n\n */ y;")
+        self.assertEquals([t.value for t in toks], ['x', ';', 'y', ';'])
+        toks = list(iter_tokens("/* a\n b */\n  y;"))
+        self.assertEquals((toks[0].lineno, toks[0].column), (3, 3))
+        self.assertRaises(LexerError, lex, "a; /* never closed")
+        pass
+
+    def test_stringEscapes(self):
+        toks = lex(r'"a\"b" "c\\" "\n\t"')
+        self.assertEquals([t.value for t in toks], ['a"b', 'c\\', '\n\t'])
+        toks = lex('"one" x "two"')
+        self.assertEquals([t.type for t in toks], ['STRING', 'NAME', 'STRING'])
+        self.assertRaises(LexerError, lex, '"no end\nx;"')
+        pass
+
+    def assertFast(self, limit, func, *args):
+        start = time.perf_counter()
+        func(*args)
+        self.assertLess(time.perf_counter() - start, limit)
+        pass
+
+    def test_pathologicalComments(self):
+        '''comment scanning stays linear on 10 MB inputs'''
+        size = 10 * 1024 * 1024
+        nested = "/* " * (size // 3) + "*/"
+        self.assertFast(2, lambda: self.assertEquals(lex(nested), []))
+        stars = "/*" + "*" * size + "x"
+        self.assertFast(2, self.assertRaises, LexerError, lex, stars)
+        many = "/* a * b */\n" * (size // 120)
+        self.assertFast(2, lambda: self.assertEquals(lex(many), []))
+        unclosed = "/*" + " * / " * (size // 5)
+        self.assertFast(2, self.assertRaises, LexerError, lex, unclosed)
+        pass
+
+    def test_pathologicalStrings(self):
+        '''string scanning stays linear on 10 MB inputs'''
+        size = 10 * 1024 * 1024
+        unterminated = '"' + "a" * size
+        self.assertFast(3, self.assertRaises, LexerError, lex, unterminated)
+        escapes = '"' + "\\a" * (size // 2)
+        self.assertFast(3, self.assertRaises, LexerError, lex, escapes)
+        lines = ('"abc\\"' + "\n") * (size // 7)
+        self.assertFast(3, self.assertRaises, LexerError, lex, lines)
+        pass
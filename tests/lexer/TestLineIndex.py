@@ -0,0 +1,126 @@
+import contextlib
+import io
+import random
+import unittest
+
+from benchmarks.corpus import program
+from src import ast
+from src.lexer import iter_tokens, lex, LexerError
+from src.lexer.lines import LineIndex
+from src.parser import parse_ast, find_column, ParserError
+from src.parser.incremental import Document
+
+def nodes(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.children())
+        pass
+    pass
+
+class LineIndexTest(unittest.TestCase):
+    def assertPositions(self, source):
+        index = LineIndex(source)
+        for offset in range(len(source) + 1):
+            line = source.count('\n', 0, offset) + 1
+            column = offset - (source.rfind('\n', 0, offset) + 1) + 1
+            self.assertEquals(index.position(offset), (line, column))
+            self.assertEquals(index.line(offset), line)
+            self.assertEquals(index.column(offset), column)
+            self.assertEquals(index.offset(line, column), offset)
+            pass
+        pass
+
+    def test_positions(self):
+        self.assertPositions("")
+        self.assertPositions("a;")
+        self.assertPositions("a;\n")
+        self.assertPositions("\n\nlet a = 1;\n  b;\n\n")
+        pass
+
+    def test_lines(self):
+        index = LineIndex("let a = 1;\n\n  b;")
+        self.assertEquals(len(index), 3)
+        self.assertEquals(index.line_range(1), (0, 10))
+        self.assertEquals(index.line_range(2), (11, 11))
+        self.assertEquals(index.line_range(3), (12, 16))
+        self.assertRaises(IndexError, index.offset, 4)
+        self.assertRaises(IndexError, index.offset, 0)
+        pass
+
+    def test_matchesTokens(self):
+        source = program(200, seed=3)
+        index = LineIndex(source)
+        for tok in iter_tokens(source):
+            self.assertEquals(index.span(tok), (tok.lineno, tok.column))
+            self.assertEquals(find_column(source, tok), tok.column)
+            pass
+        pass
+
+    def test_nodeSpans(self):
+        source = program(200, seed=4)
+        index = LineIndex(source)
+        starts = dict((tok.lexpos, (tok.lineno, tok.column)) for tok in iter_tokens(source))
+        tree = parse_ast(source, True)
+        count = 0
+        for node in nodes(tree):
+            if node is tree:
+                continue
+            self.assertEquals(node.span(index), starts[node.lexpos])
+            self.assertEquals(node.span(index)[0], node.lineno)
+            count += 1
+            pass
+        self.assertTrue(count > 200)
+        pass
+
+    def test_documentLines(self):
+        doc = Document("let a = 1;\nlet b = 2;\n")
+        self.assertEquals(doc.lines.position(15), (2, 5))
+        doc.edit(0, 0, "\n\n")
+        self.assertEquals(doc.lines.position(17), (4, 5))
+        decl = doc.tree.body[1].target
+        self.assertEquals(decl.span(doc.lines), (4, 1))
+        pass
+    pass
+
+class DiagnosticSpanTest(unittest.TestCase):
+    def raised(self, func, *args):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            try:
+                func(*args)
+            except (LexerError, ParserError) as e:
+                return e, out.getvalue().strip()
+            pass
+        self.fail("no error")
+
+    def test_lexer(self):
+        for backend in ('ply', 'fast'):
+            e, message = self.raised(lex, "a;\n  b $ c;", backend)
+            self.assertEquals(e.span, (2, 5))
+            self.assertEquals(message, "Illegal character '$' at 2:5")
+            e, message = self.raised(lex, "a;\n  /* never", backend)
+            self.assertEquals(e.span, (2, 3))
+            self.assertEquals(message, "Unterminated comment at 2:3")
+            pass
+        pass
+
+    def test_parser(self):
+        e, message = self.raised(parse_ast, "let a = 1;\n  let b = ;", True)
+        self.assertEquals(e.span, (2, 11))
+        self.assertEquals(message, "Syntax error 2:11: ;")
+        e, message = self.raised(parse_ast, "let a = 1;\nlet b = 1", True)
+        self.assertEquals(e.span, (2, 10))
+        self.assertEquals(message, "Syntax error 2:10: EOF")
+        pass
+
+    def test_incremental(self):
+        doc = Document("let a = 1;\nlet b = 2;\n")
+        e, message = self.raised(doc.edit, 19, 19, " $")
+        self.assertEquals(e.span, (2, 10))
+        pass
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+from src.lexer import Lexer, lex
+from src.lexer.symbols import SymbolTable
+from src.parser import Parser
+
+CODE = '''
+let count = 0x1F;
+let total = count + 017 + 1.5;
+count = total(count, 12);
+'''
+
+class SymbolTableTest(unittest.TestCase):
+    def test_table(self):
+        table = SymbolTable()
+        name = ''.join(['co', 'unt'])
+        self.assertTrue(table.symbol(name) is name)
+        self.assertTrue(table.symbol(''.join(['cou', 'nt'])) is name)
+        self.assertEquals(table.id('count'), 0)
+        self.assertEquals(table.intern('total'), 1)
+        self.assertEquals(table.id('missing'), None)
+        self.assertEquals(table[1], 'total')
+        self.assertEquals(len(table), 2)
+        pass
+
+    def test_numbers(self):
+        table = SymbolTable()
+        self.assertEquals(table.convert('0x1F', 16), '31')
+        self.assertEquals(table.numbers, {'31': 31})
+        self.assertEquals(table.number('31'), 31)
+        self.assertEquals(table.number('1.5', 'FLOAT'), 1.5)
+        self.assertEquals(table.number('12', 'int'), 12)
+        self.assertEquals(table.numbers, {'31': 31, '1.5': 1.5, '12': 12})
+        pass
+
+    def test_lexerInterns(self):
+        for backend in ('ply', 'fast'):
+            lexer = Lexer(backend)
+            toks = lexer.lex(CODE)
+            names = [tok.value for tok in toks if tok.type == 'NAME']
+            self.assertEquals(names, ['count', 'total', 'count', 'count', 'total', 'count'])
+            self.assertTrue(all(name is lexer.symbols.symbol(name) for name in names))
+            self.assertEquals(list(lexer.symbols.strings), ['count', 'total'])
+            self.assertEquals(lexer.symbols.numbers, {'31': 31, '15': 15})
+            self.assertEquals([tok.value for tok in toks], [tok.value for tok in lex(CODE)])
+            first = lexer.symbols
+            lexer.lex("a;")
+            self.assertFalse(lexer.symbols is first)
+            self.assertEquals(list(lexer.symbols.strings), ['a'])
+            pass
+        pass
+
+    def test_noIntern(self):
+        lexer = Lexer(intern=False)
+        toks = lexer.lex(CODE)
+        self.assertEquals(lexer.symbols, None)
+        self.assertEquals([tok.value for tok in toks], [tok.value for tok in lex(CODE)])
+        pass
+
+    def test_treeNames(self):
+        session = Parser()
+        tree = session.parse_ast(CODE, True)
+        assign = tree.body[2]
+        self.assertTrue(assign.target.name is session.symbols.symbol('count'))
+        self.assertTrue(assign.value.args[0].name is assign.target.name)
+        self.assertEquals(session.symbols.id(assign.value.name), 1)
+        pass
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from src.lexer import lex
+from src.lexer.buffer import TokenBuffer, KINDS
+from src.parser import parse
+
+CODE = '''
+const test = 0x1F;
+let foo = (a, b:int, c = 'c') ->
+    return a + test;
+done;
+foo(test, test);
+'''
+
+class TokenBufferTest(unittest.TestCase):
+    def test_matchesLex(self):
+        buf = TokenBuffer.from_source(CODE)
+        toks = lex(CODE)
+        self.assertEquals(len(buf), len(toks))
+        self.assertEquals(
+            [(t.type, t.value, t.lexpos) for t in buf],
+            [(t.type, t.value, t.lexpos) for t in toks])
+        pass
+
+    def test_view(self):
+        buf = TokenBuffer.from_source(CODE)
+        view = buf.view()
+        self.assertEquals(len(view), len(buf))
+        self.assertEquals(view.type(0), 'CONST')
+        self.assertEquals(view.value(1), 'test')
+        self.assertEquals(view.value(3), '31')
+        self.assertEquals(KINDS[view.kinds[1]], 'NAME')
+        self.assertEquals((view.linenos[5], view.columns[5]), (3, 1))
+        self.assertEquals(view.lexposes[0], CODE.index('const'))
+        view.release()
+        pass
+
+    def test_interning(self):
+        buf = TokenBuffer.from_source(CODE)
+        names = [buf.values[ndx] for ndx in range(len(buf)) if buf.view().value(ndx) == 'test']
+        self.assertEquals(len(names), 4)
+        self.assertEquals(len(set(names)), 1)
+        self.assertEquals(len(buf.strings), len(set(t.value for t in lex(CODE))))
+        pass
+
+    def test_parse(self):
+        '''the parser consumes a buffer directly'''
+        self.assertEquals(parse(TokenBuffer.from_source(CODE), True), parse(CODE, True))
+        pass
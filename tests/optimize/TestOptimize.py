@@ -0,0 +1,233 @@
+import unittest
+
+from src import ast
+from src.ast import binary
+from src.optimize import Optimizer, count, optimize
+from src.parser import parse_ast
+from src.vm import ArborError, VM
+from src.vm.compiler import compile_source
+
+def optimized(source):
+    tree, report = optimize(parse_ast(source, True))
+    return ast.to_list(tree)[1], report
+
+def value(expression):
+    '''The list form of what `let v = expression;` assigns once optimized'''
+    body, report = optimized("let v = {0};".format(expression))
+    return body[0][2]
+
+class FoldTest(unittest.TestCase):
+    def test_arithmetic(self):
+        self.assertEquals(value("2 + 4 * 8"), ['int', '34'])
+        self.assertEquals(value("1.5 * 2"), ['float', '3.0'])
+        self.assertEquals(value("2 - 7"), ['int', '-5'])
+        pass
+
+    def test_hexAndOctal(self):
+        self.assertEquals(value("0x10 + 010 * 2"), ['int', '32'])
+        pass
+
+    def test_divisionTruncatesLikeTheVM(self):
+        self.assertEquals(value("7 / 2"), ['int', '3'])
+        self.assertEquals(value("-7 / 2"), ['int', '-3'])
+        self.assertEquals(value("7.0 / 2"), ['float', '3.5'])
+        pass
+
+    def test_divisionByZeroLeftAlone(self):
+        self.assertEquals(value("1 / 00"), ['binop', ['int', '1'], '/', ['int', '0']])
+        pass
+
+    def test_chars(self):
+        self.assertEquals(value("'a' + 1"), ['int', '98'])
+        self.assertEquals(value("'a' < 'b'"), ['boolean', 'true'])
+        pass
+
+    def test_comparisonsAndLogic(self):
+        self.assertEquals(value("1 < 2 && 3 > 4"), ['boolean', 'false'])
+        self.assertEquals(value("1 == 1.0 || x"), ['boolean', 'true'])
+        self.assertEquals(value("!(2 >= 3)"), ['boolean', 'true'])
+        pass
+
+    def test_shortCircuitKeepsUnknown(self):
+        self.assertEquals(value("1 > 2 && x"), ['boolean', 'false'])
+        self.assertEquals(value("1 < 2 && x > 1"), ['comps', ['usage', 'x'], '>', ['int', '1']])
+        # x is not known to be a boolean
+        self.assertEquals(value("1 < 2 && x"),
+                          ['bool', ['boolean', 'true'], '&&', ['usage', 'x']])
+        pass
+
+    def test_nestedInFunctions(self):
+        body, report = optimized("let f = (a, b) ->\n    return a + 2 * 3;\ndone;")
+        self.assertEquals(body[0][2][2][1], [['return', ['binop', ['usage', 'a'], '+', ['int', '6']]]])
+        pass
+    pass
+
+class SimplifyTest(unittest.TestCase):
+    def test_identities(self):
+        # x is declared once with an int, f with a float
+        numbers = "let x = 5;\nconst f = x * 1.5;\nlet v = {0};"
+        for expression in ("x * 1", "1 * x", "x + 0x0", "00 + x", "x - 00", "x / 1",
+                           "x * (3 - 2) + (2 - 2)"):
+            body, report = optimized(numbers.format(expression))
+            self.assertEquals(body[2][2], ['usage', 'x'], expression)
+            pass
+        body, report = optimized(numbers.format("(x - 2) * 1"))
+        self.assertEquals(body[2][2], ['binop', ['usage', 'x'], '-', ['int', '2']])
+        self.assertEquals(report.simplified, 1)
+        for expression in ("f * 1", "f - 00", "f / 1"):
+            body, report = optimized(numbers.format(expression))
+            self.assertEquals(body[2][2], ['usage', 'f'], expression)
+            pass
+        # a division by zero is left for the program, but is still a number
+        self.assertEquals(value("(1 / 00) * 1"), ['binop', ['int', '1'], '/', ['int', '0']])
+        pass
+
+    def test_unknownVariables(self):
+        sources = [
+            # nothing is known of a variable declared without a number
+            "let x = 'c';\nlet v = x * 1;",
+            "let x;\nlet v = x * 1;",
+            # or assigned again
+            "let x = 5;\nx = 'c';\nlet v = x * 1;",
+            # or whose name is declared twice
+            "let x = 5;\nif (x > 1) ->\n    let x = 'c';\ndone;\nlet v = x * 1;",
+            # the VM does not check the type of a parameter
+            "let g = (x:int, y:int) ->\n    return x * 1;\ndone;\nlet v = 1;",
+        ]
+        for source in sources:
+            body, report = optimized(source)
+            self.assertEquals(report.simplified, 0, source)
+            pass
+        pass
+
+    def test_notIdentities(self):
+        numbers = "let x = 5;\nconst f = x * 1.5;\nlet v = {0};"
+        for expression in ("00 - x", "1 / x", "x * 1.0", "f + 00", "00 + f"):
+            body, report = optimized(numbers.format(expression))
+            self.assertEquals(body[2][2][0], 'binop', expression)
+            pass
+        # -0.0 + 0 is 0.0
+        self.assertEquals(value("(1.5 / 00) + 00")[0], 'binop')
+        # a boolean plus 0 is an int
+        self.assertEquals(value("(x < 1) + 00"),
+                          ['binop', ['comps', ['usage', 'x'], '<', ['int', '1']], '+', ['int', '0']])
+        pass
+
+    def test_doubleNot(self):
+        self.assertEquals(value("!!(x < 1)"), ['comps', ['usage', 'x'], '<', ['int', '1']])
+        self.assertEquals(value("!!x"), ['not', ['not', ['usage', 'x']]])
+        pass
+    pass
+
+class PruneTest(unittest.TestCase):
+    def test_falseIf(self):
+        body, report = optimized("if (1 > 2) ->\n    a = 1;\ndone;\nb = 2;")
+        self.assertEquals(body, [['assign', ['usage', 'b'], ['int', '2']]])
+        self.assertEquals(report.pruned, 1)
+        pass
+
+    def test_trueIf(self):
+        body, report = optimized("if (1 < 2) ->\n    a = 1;\n    b = 2;\ndone;")
+        self.assertEquals(body, [['assign', ['usage', 'a'], ['int', '1']],
+                                 ['assign', ['usage', 'b'], ['int', '2']]])
+        pass
+
+    def test_trueIfWithDeclarationsKeepsBlock(self):
+        body, report = optimized("if (1 < 2) ->\n    let a = 1;\ndone;")
+        self.assertEquals(body, [['if', ['boolean', 'true'], [['assign', ['decl', 'a'], ['int', '1']]]]])
+        pass
+
+    def test_chain(self):
+        source = '''if (x) ->
+    a = 1;
+else if (1 < 2) ->
+    a = 2;
+else if (y) ->
+    a = 3;
+else ->
+    a = 4;
+done;'''
+        body, report = optimized(source)
+        self.assertEquals(body, [['ifelse', ['usage', 'x'], [['assign', ['usage', 'a'], ['int', '1']]],
+                                  ['else', [['assign', ['usage', 'a'], ['int', '2']]]]]])
+        self.assertEquals(report.pruned, 2)
+        pass
+
+    def test_chainFirstFalse(self):
+        source = "if (1 > 2) ->\n    a = 1;\nelse if (x) ->\n    a = 2;\ndone;"
+        body, report = optimized(source)
+        self.assertEquals(body, [['if', ['usage', 'x'], [['assign', ['usage', 'a'], ['int', '2']]]]])
+        body, report = optimized("if (1 > 2) ->\n    a = 1;\nelse ->\n    a = 4;\ndone;")
+        self.assertEquals(body, [['assign', ['usage', 'a'], ['int', '4']]])
+        pass
+
+    def test_chainUnchanged(self):
+        source = "if (x) ->\n    a = 1 + 1;\nelse ->\n    a = 4;\ndone;"
+        body, report = optimized(source)
+        self.assertEquals(body, [['ifelse', ['usage', 'x'], [['assign', ['usage', 'a'], ['int', '2']]],
+                                  ['else', [['assign', ['usage', 'a'], ['int', '4']]]]]])
+        self.assertEquals(report.pruned, 0)
+        pass
+    pass
+
+class ReportTest(unittest.TestCase):
+    def test_counts(self):
+        tree = parse_ast("let fool = 2 + 4 * 8;\nlet baz1 = 2 + 6;", True)
+        self.assertEquals(count(tree), 13)
+        optimizer = Optimizer()
+        optimizer.optimize(tree)
+        report = optimizer.report
+        self.assertEquals((report.before, report.after, report.eliminated), (13, 7, 6))
+        self.assertEquals(str(report),
+                          "eliminated 6 of 13 nodes: 3 folded, 0 simplified, 0 branches pruned")
+        self.assertEquals(report.to_dict()['folded'], 3)
+        pass
+
+    def test_accumulates(self):
+        optimizer = Optimizer()
+        optimizer.optimize(parse_ast("let a = 1 + 1;", True))
+        optimizer.optimize(parse_ast("let b = 1 + 1;", True))
+        self.assertEquals(optimizer.report.folded, 2)
+        pass
+    pass
+
+class SemanticsTest(unittest.TestCase):
+    PROGRAMS = [
+        "return 2 + 4 * 8 - 7 / 2;",
+        "return 'a' + 1 * 2;",
+        "return 1 < 2 && 3 > 2 || 1 > 5;",
+        "let x = 5;\nreturn x * 1 + 00 - (3 - 3);",
+        "let x = 'c';\nif (1 > 2) ->\n    return 1;\nelse if (2 > 1) ->\n    return x + 1;\ndone;",
+        "let f = (n, m) ->\n    if (!(1 > 2)) ->\n        return n / 1 + m * 1.0;\n    done;\ndone;\nreturn f(7, 2);",
+        "let c = 'a';\nreturn c + 0x0;",
+        "let t = (a, b) ->\n    return a < b;\ndone;\nreturn t(1, 2) + 0x0;",
+        "let s = \"ab\";\nreturn s - 0x0;",
+        "let x = 3;\nreturn (x - 2) * 1;",
+        "let x = 7;\nconst f = x / 2.0;\nreturn (x / 1 + 00) * (f - 00) / 1;",
+        "let x = -0.0;\nreturn 00 + x;",
+        "let x = 5;\nlet g = (a, b) ->\n    return x * 1;\ndone;\nx = 'c';\nreturn g(1, 2);",
+    ]
+
+    def result(self, source, optimizer=None):
+        '''The type and value of what source returns, or the error it fails
+        with'''
+        try:
+            value = VM().run(compile_source(source, optimizer))
+        except ArborError as e:
+            return ArborError, str(e)
+        return type(value), value
+
+    def test_sameResults(self):
+        for source in self.PROGRAMS:
+            self.assertEquals(self.result(source, Optimizer()), self.result(source), source)
+            pass
+        pass
+    pass
+
+class BooleanTest(unittest.TestCase):
+    def test_binaryRoundTrip(self):
+        tree, report = optimize(parse_ast("let v = 1 < 2;", True))
+        data = binary.dumps(tree)
+        self.assertEquals(ast.to_list(binary.loads(data)), ast.to_list(tree))
+        pass
+    pass
@@ -0,0 +1,137 @@
+import contextlib
+import io
+import sys
+import threading
+import unittest
+
+from src import ast
+from src.lexer import lex, Lexer
+from src.parser import parse, parse_ast, Parser, ParserPool, ParserError
+from benchmarks.corpus import generate
+
+THREADS = 12
+ROUNDS = 6
+
+def dump(node):
+    '''Returns the list form of a tree with every node's position'''
+    if isinstance(node, ast.Node):
+        return [type(node).__name__, node.lineno, node.lexpos] + [
+            dump(getattr(node, field)) for field in node._fields]
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    return node
+
+# a different program for every thread, plus one that fails half way
+PROGRAMS = [generate(40 + ndx, seed=ndx) for ndx in range(THREADS)]
+BROKEN = generate(20) + "let = ;\n" + generate(20)
+
+class ConcurrencyTest(unittest.TestCase):
+    def setUp(self):
+        self.interval = sys.getswitchinterval()
+        # switch threads as often as possible so parses interleave
+        sys.setswitchinterval(1e-6)
+        pass
+
+    def tearDown(self):
+        sys.setswitchinterval(self.interval)
+        pass
+
+    def hammer(self, work):
+        '''Runs work(ndx) in THREADS threads started together, ROUNDS times
+        each, and returns what every call returned in order'''
+        barrier = threading.Barrier(THREADS)
+        results = [[] for _ in range(THREADS)]
+        errors = []
+
+        def run(ndx):
+            try:
+                barrier.wait()
+                for _ in range(ROUNDS):
+                    results[ndx].append(work(ndx))
+                    pass
+            except Exception as e:
+                errors.append(e)
+                pass
+            pass
+
+        threads = [threading.Thread(target=run, args=(ndx,)) for ndx in range(THREADS)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            for thread in threads:
+                thread.start()
+                pass
+            for thread in threads:
+                thread.join()
+                pass
+            pass
+        self.assertEquals(errors, [])
+        return results
+
+    def expected(self):
+        return [dump(parse_ast(program, True)) for program in PROGRAMS]
+
+    def test_moduleParse(self):
+        '''parse_ast() from many threads at once'''
+        expected = self.expected()
+        results = self.hammer(lambda ndx: dump(parse_ast(PROGRAMS[ndx], True)))
+        for ndx, trees in enumerate(results):
+            self.assertEquals(trees, [expected[ndx]] * ROUNDS)
+            pass
+        pass
+
+    def test_sessions(self):
+        '''a session per thread, reused for every round'''
+        expected = self.expected()
+        sessions = [Parser() for _ in range(THREADS)]
+        results = self.hammer(lambda ndx: dump(sessions[ndx].parse_ast(PROGRAMS[ndx], True)))
+        for ndx, trees in enumerate(results):
+            self.assertEquals(trees, [expected[ndx]] * ROUNDS)
+            pass
+        pass
+
+    def test_pool(self):
+        '''a small pool shared by every thread, with failing parses mixed in'''
+        expected = self.expected()
+        pool = ParserPool(size=3)
+
+        def work(ndx):
+            if ndx % 4 == 0:
+                try:
+                    pool.parse_ast(BROKEN, True)
+                except ParserError as e:
+                    return (e.p.lineno, e.p.value)
+                return None
+            return dump(pool.parse_ast(PROGRAMS[ndx], True))
+
+        results = self.hammer(work)
+        broken = BROKEN.count('\n', 0, BROKEN.index('let = ;')) + 1
+        for ndx, trees in enumerate(results):
+            if ndx % 4 == 0:
+                self.assertEquals(trees, [(broken, '=')] * ROUNDS)
+            else:
+                self.assertEquals(trees, [expected[ndx]] * ROUNDS)
+                pass
+            pass
+        self.assertLessEqual(len(pool._idle), 3)
+        pass
+
+    def test_lexSessions(self):
+        '''tokens and line numbers from many threads lexing at once'''
+        expected = [[(t.type, t.value, t.lineno, t.lexpos, t.column) for t in lex(program)]
+                    for program in PROGRAMS]
+        lexers = [Lexer() for _ in range(THREADS)]
+        results = self.hammer(lambda ndx: [(t.type, t.value, t.lineno, t.lexpos, t.column)
+                                           for t in lexers[ndx].tokens(PROGRAMS[ndx])])
+        for ndx, tokens in enumerate(results):
+            self.assertEquals(tokens, [expected[ndx]] * ROUNDS)
+            pass
+        pass
+
+    def test_lineNumbersDoNotDrift(self):
+        first = [tok.lineno for tok in lex("a;\nb;\nc;\n")]
+        self.assertEquals(first, [1, 1, 2, 2, 3, 3])
+        self.assertEquals([tok.lineno for tok in lex("a;\nb;\nc;\n")], first)
+        program = "a;\n\nlet b = 1;\n"
+        self.assertEquals(parse_ast(program, True).body[1].lineno, 3)
+        self.assertEquals(parse_ast(program, True).body[1].lineno, 3)
+        self.assertEquals(parse(program), parse(program))
+        pass
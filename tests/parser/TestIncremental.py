@@ -0,0 +1,125 @@
+import random
+import unittest
+
+from src import ast
+from src.lexer import iter_tokens, LexerError
+from src.parser import parse_ast, ParserError
+from src.parser.incremental import Document, reparse
+from benchmarks.corpus import generate
+
+def dump(node):
+    '''Returns the list form of a tree with every node's position'''
+    if isinstance(node, ast.Node):
+        return [type(node).__name__, node.lineno, node.lexpos] + [
+            dump(getattr(node, field)) for field in node._fields]
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    return node
+
+def full(source):
+    '''Returns the tokens and dumped tree of a full parse, or the error type'''
+    try:
+        tokens = list(iter_tokens(source))
+        return ([(t.type, t.value, t.lineno, t.lexpos, t.column) for t in tokens],
+                dump(parse_ast(tokens, True)))
+    except (LexerError, ParserError) as e:
+        return type(e)
+
+def state(doc):
+    return ([(t.type, t.value, t.lineno, t.lexpos, t.column) for t in doc.tokens],
+            dump(doc.tree))
+
+SNIPPETS = [
+    "x", "1", " + 2", ";", "let y = 3;", "\n", "  ", "if (a) -> b; done;",
+    "f(a, 1)", "done;", "else -> c;", "/* c */", "// c\n", "/*", "*/", '"s"', "->",
+    "(a, b) -> return a; done;", "q;\n", "",
+]
+
+class IncrementalTest(unittest.TestCase):
+    def assertMatchesFull(self, doc):
+        self.assertEquals(state(doc), full(doc.source))
+        pass
+
+    def test_editStatement(self):
+        source = "let a = 1;\nlet b = 2;\nif (a) ->\n    b;\ndone;\nlet c = a + b;\n"
+        doc = Document(source)
+        first, second, third, fourth = doc.tree.body
+        pos = source.index('2')
+        doc.edit(pos, pos + 1, '20 * 3')
+        self.assertMatchesFull(doc)
+        self.assertEquals(doc.reparsed, 1)
+        self.assertIs(doc.tree.body[0], first)
+        self.assertIs(doc.tree.body[2], third)
+        self.assertIs(doc.tree.body[3], fourth)
+        self.assertIsNot(doc.tree.body[1], second)
+        pass
+
+    def test_editInsideBlock(self):
+        source = "let a = 1;\nlet f = (x, y) ->\n    return x;\ndone;\nf(a, a);\n"
+        doc = Document(source)
+        pos = doc.source.index('return x') + len('return x')
+        doc.edit(pos, pos, ' + y')
+        self.assertMatchesFull(doc)
+        self.assertEquals(doc.reparsed, 1)
+        pass
+
+    def test_splitAndJoin(self):
+        doc = Document("a; b; c;")
+        doc.edit(1, 2, " + ")
+        self.assertMatchesFull(doc)
+        self.assertEquals(len(doc.tree.body), 2)
+        doc.edit(0, 0, "x; ")
+        self.assertMatchesFull(doc)
+        self.assertEquals(len(doc.tree.body), 3)
+        pass
+
+    def test_openComment(self):
+        doc = Document("a;\nb;\n/* x */ c;\n")
+        before = state(doc)
+        self.assertRaises(LexerError, doc.edit, 14, 14, "/* ")
+        self.assertEquals(state(doc), before)
+        doc.edit(3, 3, "/* ")
+        self.assertMatchesFull(doc)
+        self.assertEquals(len(doc.tree.body), 2)
+        doc.edit(3, 6, "")
+        self.assertMatchesFull(doc)
+        self.assertEquals(len(doc.tree.body), 3)
+        pass
+
+    def test_errorLeavesDocument(self):
+        doc = Document("a;\nb;\n")
+        before = state(doc)
+        self.assertRaises(ParserError, doc.edit, 2, 2, " + ;")
+        self.assertEquals(state(doc), before)
+        self.assertEquals(doc.source, "a;\nb;\n")
+        pass
+
+    def test_reparse(self):
+        source = "let a = 1;\na + 2;\n"
+        tokens = list(iter_tokens(source))
+        tree = parse_ast(tokens, True)
+        source, tokens, tree = reparse(source, tokens, tree, 0, 0, "let z;\n")
+        self.assertEquals(([(t.type, t.value, t.lineno, t.lexpos, t.column) for t in tokens],
+                           dump(tree)), full(source))
+        pass
+
+    def test_randomEdits(self):
+        '''random edits always end up where a full parse would'''
+        rnd = random.Random(5)
+        base = generate(40)
+        for _ in range(300):
+            doc = Document(base)
+            for _ in range(5):
+                start = rnd.randrange(len(doc.source) + 1)
+                end = min(len(doc.source), start + rnd.choice([0, 0, 1, 3, 10, 40]))
+                text = rnd.choice(SNIPPETS)
+                expected = full(doc.source[:start] + text + doc.source[end:])
+                try:
+                    doc.edit(start, end, text)
+                except (LexerError, ParserError) as e:
+                    self.assertEquals(type(e), expected)
+                    break
+                self.assertEquals(state(doc), expected)
+                pass
+            pass
+        pass
@@ -1,5 +1,7 @@
+import time
 import unittest
 
+from src.lexer import iter_tokens
 from src.parser import parse, ParserError
 
 class ParserTest(unittest.TestCase):
@@ -120,9 +122,9 @@ class ParserTest(unittest.TestCase):
             'statements', [
                 ['func', [
                     'params', [
-                        ['param', 'c'], 
+                        ['param', 'a'], 
                         ['param', 'b'], 
-                        ['param', 'a']
+                        ['param', 'c']
                     ]
                 ], [
                     'block', [
@@ -158,10 +160,10 @@ class ParserTest(unittest.TestCase):
             'statements', [
                 ['func', [
                     'params', [
-                        ['paramtype', 'd', 'function'], 
-                        ['paramtype', 'c', 'char'], 
+                        ['paramtype', 'a', 'int'], 
                         ['paramtype', 'b', 'float'], 
-                        ['paramtype', 'a', 'int']
+                        ['paramtype', 'c', 'char'], 
+                        ['paramtype', 'd', 'function']
                     ]
                 ], [
                     'block', [
@@ -197,10 +199,10 @@ class ParserTest(unittest.TestCase):
             'statements', [
                 ['func', [
                     'params', [
-                        ["default", ['paramtype', 'b', 'float'], ['float', '.2']], 
-                        ['default', ['paramtype', 'a', 'int'], ['int', '1']],
-                        ['paramtype', 'd', 'function'], 
                         ['paramtype', 'c', 'char'], 
+                        ['paramtype', 'd', 'function'], 
+                        ['default', ['paramtype', 'a', 'int'], ['int', '1']],
+                        ["default", ['paramtype', 'b', 'float'], ['float', '.2']], 
                     ]
                 ], [
                     'block', [
@@ -438,7 +440,7 @@ class ParserTest(unittest.TestCase):
         string = "foo(a, b, c);"
         parser = parse(string, True)
         print(parser)
-        self.assertEquals(['statements', [['func use', 'foo', ['c', 'b', 'a']]]], parser)
+        self.assertEquals(['statements', [['func use', 'foo', ['a', 'b', 'c']]]], parser)
         string = "foo();"
         parser = parse(string, True)
         print(parser)
@@ -467,3 +469,63 @@ class ParserTest(unittest.TestCase):
 
     
 
+    def test_tablesUpToDate(self):
+        '''the committed parsetab.py must match the grammar'''
+        import ply.yacc as yacc
+        import src.parser
+        from src.parser import parsetab
+        pinfo = yacc.ParserReflect(vars(src.parser))
+        pinfo.get_all()
+        self.assertEquals(pinfo.signature(), parsetab._lr_signature)
+        pass
+
+    def test_parseTokenStream(self):
+        '''parse consumes iter_tokens directly'''
+        string = "let a = 1;\n(b, c) ->\n    return b + c;\ndone;"
+        self.assertEquals(parse(iter_tokens(string), True), parse(string, True))
+        self.assertRaises(ParserError, parse, iter_tokens("let name === 1;"), True)
+        pass
+
+    def test_longLists(self):
+        '''statements, params and arguments keep source order'''
+        names = ['a{0}'.format(ndx) for ndx in range(500)]
+        string = "({0}) -> done; foo({0});".format(", ".join(names))
+        func, call = parse(string, True)[1]
+        self.assertEquals([param[1] for param in func[1][1]], names)
+        self.assertEquals(call[2], names)
+        string = " ".join("{0};".format(name) for name in names)
+        self.assertEquals([stmt[1] for stmt in parse(string, True)[1]], names)
+        pass
+
+    def test_listsScaleLinearly(self):
+        def best(count):
+            string = "foo({0});".format(", ".join(["a"] * count))
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                parse(string, True)
+                timings.append(time.perf_counter() - start)
+                pass
+            return min(timings)
+        small, large = best(2000), best(16000)
+        # 8x the arguments; quadratic list building would be ~64x slower
+        self.assertLess(large / small, 24)
+        pass
+
+    def test_precedence(self):
+        parser = parse("8 - 4 - 2;", True)
+        self.assertEquals(['statements', [
+            ['binop', ['binop', ['int', '8'], '-', ['int', '4']], '-', ['int', '2']]
+        ]], parser)
+        parser = parse("1 + 2 * 3 < 4 && !a || b;", True)
+        self.assertEquals(['statements', [
+            ['bool', 
+                ['bool', 
+                    ['comps', 
+                        ['binop', ['int', '1'], '+', ['binop', ['int', '2'], '*', ['int', '3']]],
+                        '<', ['int', '4']
+                    ], '&&', ['not', ['usage', 'a']]
+                ], '||', ['usage', 'b']
+            ]
+        ]], parser)
+        pass
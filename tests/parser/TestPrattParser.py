@@ -0,0 +1,129 @@
+import os
+import random
+import unittest
+
+from src import ast
+from src.lexer import lex
+from src.parser import parse, parse_ast, ParserError
+from src.parser import pratt
+from benchmarks.corpus import generate
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), 'examples')
+
+CASES = [
+    "", "123; 1.045;", "test;", "test = a;", "1 + 3; 1 - 3; 1 * 3; 1 / 3;",
+    "let test;", "const test;", "let a = 1 + 2;", "a = b = c;", "a + b = c;",
+    "(a, b, c) -> a = a + 1; b = b + a; done;",
+    "(a:int, b:float, c:char, d:function) -> a = a + 1; done;",
+    "(c:char, d:function, a:int = 1, b:float = .2) -> a = a + 1; done;",
+    "() -> a = a + 1; b = b + a; done;",
+    "if (a) -> a; done;", "'a';", '"abcde";', "return a + b;",
+    "if(1) -> a; else -> b; done;",
+    "if(1) -> a; else if(2) -> b; done;",
+    "if(1) -> a; else if(2) -> b; else if(2) -> c; b; else -> z; g; a; done;",
+    "(a + 3) > (4 + 7);", "a && b;", "a || b;", "!a;", "!a && b || c;",
+    "foo(a, b, c);", "foo();", "foo(,);", "foo(a,);", "foo(1, 'c', 2.0, \"s\");",
+    "8 - 4 - 2 * 3 / 6 + 1;", "a < b == c != d >= e <= f > g;",
+    "x = !a == b;", "a * return b + c;", "!return a;", "a * b = c + d;",
+    "foo(a) = 1;", "let f = (a, b = 2) -> return a + b; done;",
+    "(a);", "((a));", "(a + b) * c;", "(let a = 1);", "((a, b) -> done);",
+    "(a, b) -> done + 1;", "if ((a, b) -> done) -> done;",
+    "(a = 1, b) -> done;",
+    # errors
+    "(a) -> done;", "(a = b);", "(a = 1);", ";", "a;;", "return;", "a", "a +;",
+    "let name === 1;", "() -> a + b;", "done;", "else;", "foo(a + b);",
+    "foo(bar(1));", "(a:b) -> done;", "if (a) -> a;", "if a -> done;", "()",
+    "(", ")", "let;", "a = ;", "if (1) -> a; else if (2) -> b; else c;",
+]
+
+def dump(node):
+    '''Returns the list form of a tree with every node's position'''
+    if isinstance(node, ast.Node):
+        return [type(node).__name__, node.lineno, node.lexpos] + [
+            dump(getattr(node, field)) for field in node._fields]
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    return node
+
+def outcome(parser, code):
+    try:
+        return dump(parser(code))
+    except ParserError as e:
+        if e.p is None:
+            return ('error', None)
+        return ('error', e.p.type, e.p.lexpos)
+
+def ply(code):
+    return parse_ast(lex(code, 'fast'), True, 'ply')
+
+def hand(code):
+    return pratt.parse_tokens(lex(code, 'fast'))
+
+FRAGMENTS = [
+    "a", "b", "foo", "1", "2.5", "'c'", '"s"', "0x1f", "+", "-", "*", "/", "&&", "||",
+    "!", "==", "!=", "<", ">", "<=", ">=", "=", "(", ")", ",", ":", ";", "->",
+    "let", "const", "return", "if", "else", "done", "int", "float", "char", "function",
+]
+
+class PrattParserTest(unittest.TestCase):
+    def assertSameParse(self, code):
+        self.assertEquals(outcome(ply, code), outcome(hand, code), repr(code))
+        pass
+
+    def test_cases(self):
+        for code in CASES:
+            self.assertSameParse(code)
+            pass
+        pass
+
+    def test_examples(self):
+        for name in sorted(os.listdir(EXAMPLES)):
+            with open(os.path.join(EXAMPLES, name)) as fi:
+                self.assertSameParse(fi.read())
+                pass
+            pass
+        pass
+
+    def test_corpus(self):
+        self.assertSameParse(generate(300))
+        pass
+
+    def test_random(self):
+        '''random token soup, mostly errors, must fail at the same token'''
+        rnd = random.Random(99)
+        for _ in range(3000):
+            self.assertSameParse(" ".join(
+                rnd.choice(FRAGMENTS) for _ in range(rnd.randrange(1, 14))))
+            pass
+        pass
+
+    def test_randomMutations(self):
+        '''valid statements with one token dropped, doubled or swapped'''
+        rnd = random.Random(7)
+        toks = [" ".join(tok.value if tok.type not in ('STRING', 'CHAR') else '1'
+                         for tok in lex(case, 'fast')).split(" ")
+                for case in CASES[:40]]
+        for _ in range(3000):
+            words = list(rnd.choice(toks))
+            if not words[0]:
+                continue
+            ndx = rnd.randrange(len(words))
+            action = rnd.randrange(3)
+            if action == 0:
+                del words[ndx]
+            elif action == 1:
+                words.insert(ndx, words[ndx])
+            else:
+                words[ndx] = rnd.choice(FRAGMENTS)
+                pass
+            self.assertSameParse(" ".join(words))
+            pass
+        pass
+
+    def test_backendFlag(self):
+        for code in CASES[:20]:
+            self.assertEquals(parse(code, True, 'pratt'), parse(code, True, 'ply'))
+            pass
+        self.assertRaises(ParserError, parse, "(a) -> done;", True, 'pratt')
+        pass
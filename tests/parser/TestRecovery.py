@@ -0,0 +1,151 @@
+import random
+import time
+import unittest
+
+from benchmarks.corpus import program
+from src import ast
+from src.diagnostics import Diagnostic
+from src.lexer import lex
+from src.parser import parse_ast, parse_recover, Parser
+
+SOURCE = '''let a = 1;
+let b = ;
+let f = (x, y) ->
+    x + ;
+    return y;
+done;
+c $ 2;
+let g = 3;
+if (a) -> b; done;
+let h = (1;
+let i
+'''
+
+GOOD = '''let a = 1;
+let g = 3;
+if (a) -> b; done;
+'''
+
+def messages(diagnostics):
+    return [str(d) for d in diagnostics]
+
+class RecoveryTest(unittest.TestCase):
+    def test_everyError(self):
+        tree, diagnostics = parse_recover(SOURCE)
+        self.assertEquals(ast.to_list(tree), ast.to_list(parse_ast(GOOD, True)))
+        self.assertEquals(messages(diagnostics), [
+            "Syntax error 2:9: ;",
+            "Syntax error 4:9: ;",
+            "Illegal character '$' at 7:3",
+            "Syntax error 10:11: ;",
+            "Syntax error 12:1: EOF",
+        ])
+        self.assertEquals([d.phase for d in diagnostics],
+                          ['parse', 'parse', 'lex', 'parse', 'parse'])
+        self.assertEquals(diagnostics[0].span, (2, 9))
+        self.assertEquals(diagnostics[0].text, ';')
+        self.assertEquals(diagnostics[2].text, '$')
+        self.assertEquals(diagnostics[4].text, None)
+        self.assertEquals(diagnostics[1].to_dict()['span'], [4, 9])
+        pass
+
+    def test_backends(self):
+        for lexer in ('ply', 'fast'):
+            for backend in ('ply', 'pratt'):
+                tree, diagnostics = Parser(backend, lexer).parse_recover(SOURCE)
+                self.assertEquals(ast.to_list(tree), ast.to_list(parse_ast(GOOD, True)))
+                self.assertEquals(len(diagnostics), 5)
+                pass
+            pass
+        pass
+
+    def test_clean(self):
+        source = program(100, seed=1)
+        tree, diagnostics = parse_recover(source)
+        self.assertEquals(diagnostics, [])
+        self.assertEquals(ast.to_list(tree), ast.to_list(parse_ast(source, True)))
+        tree, diagnostics = parse_recover("")
+        self.assertEquals((tree.body, diagnostics), ([], []))
+        pass
+
+    def test_tokens(self):
+        tree, diagnostics = parse_recover(lex("a;\nb = ;\nc;"))
+        self.assertEquals(ast.to_list(tree), ['statements', [['usage', 'a'], ['usage', 'c']]])
+        self.assertEquals(messages(diagnostics), ["Syntax error 2:5: ;"])
+        pass
+
+    def test_block(self):
+        # an error inside a block skips to its done;
+        source = "let f = (x, y) ->\n    if (x) -> = ; done;\n    return y;\ndone;\nz;\n"
+        tree, diagnostics = parse_recover(source)
+        self.assertEquals(ast.to_list(tree), ['statements', [['usage', 'z']]])
+        self.assertEquals(messages(diagnostics), ["Syntax error 2:15: ="])
+        pass
+
+    def test_unterminatedComment(self):
+        tree, diagnostics = parse_recover("a;\nb /* never")
+        self.assertEquals(ast.to_list(tree), ['statements', [['usage', 'a']]])
+        self.assertEquals(messages(diagnostics), ["Unterminated comment at 2:3"])
+        pass
+
+    def test_maxErrors(self):
+        source = "a = ;\n" * 50 + "b;\n"
+        tree, diagnostics = parse_recover(source, 10)
+        self.assertEquals(len(diagnostics), 11)
+        self.assertEquals(str(diagnostics[-1]), "Too many errors, giving up")
+        self.assertEquals(diagnostics[-1].span, (11, 1))
+        tree, diagnostics = parse_recover("$" * 50, 10)
+        self.assertEquals(len(diagnostics), 10)
+        tree, diagnostics = parse_recover(source)
+        self.assertEquals(len(diagnostics), 50)
+        self.assertEquals(ast.to_list(tree), ['statements', [['usage', 'b']]])
+        pass
+
+    def test_fuzz(self):
+        rng = random.Random(7)
+        source = program(40, seed=2)
+        junk = [';', '=', '(', ')', '->', 'done', '$', 'let', ',', '/*']
+        for _ in range(60):
+            text = source
+            for _ in range(rng.randrange(1, 6)):
+                at = rng.randrange(len(text))
+                text = text[:at] + ' ' + rng.choice(junk) + ' ' + text[at:]
+                pass
+            tree, diagnostics = parse_recover(text)
+            self.assertTrue(isinstance(tree, ast.Statements))
+            for d in diagnostics:
+                self.assertTrue(isinstance(d, Diagnostic))
+                self.assertTrue(d.span is not None)
+                pass
+            pass
+        pass
+
+    def test_parseTime(self):
+        source = program(400, seed=5)
+        lines = source.split('\n')
+        rng = random.Random(3)
+        for ndx in rng.sample(range(len(lines)), 40):
+            lines[ndx] += ' = ;'
+            pass
+        broken = '\n'.join(lines)
+
+        def best(func):
+            elapsed = None
+            for _ in range(3):
+                start = time.perf_counter()
+                func()
+                took = time.perf_counter() - start
+                elapsed = took if elapsed is None else min(elapsed, took)
+                pass
+            return elapsed
+
+        clean = best(lambda: parse_ast(source, True))
+        recovering = best(lambda: parse_recover(broken))
+        tree, diagnostics = parse_recover(broken)
+        self.assertTrue(len(diagnostics) >= 10)
+        self.assertTrue(recovering < 4 * clean, (recovering, clean))
+        pass
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import collections
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.cli import main
+from src.lexer import lex
+from src.parser import Parser
+from src.profiler import Hooks, PHASES, Profiler
+
+SOURCE = "let a = 1;\nlet b = 2;\nlet f = (x, y) ->\n    return x;\ndone;\n"
+
+class Recorder(Hooks):
+    def __init__(self):
+        self.events = []
+        pass
+
+    def phase(self, name, seconds, allocated=None, peak=None):
+        self.events.append(('phase', name))
+        pass
+
+    def tokens(self, counts):
+        self.events.append(('tokens', sum(counts.values())))
+        pass
+
+    def reduction(self, rule, seconds):
+        self.events.append(('reduction', rule))
+        pass
+    pass
+
+class ProfilerTest(unittest.TestCase):
+    def test_phases(self):
+        profiler = Profiler()
+        tree = profiler.parse_ast(SOURCE)
+        self.assertEquals(type(tree).__name__, 'Statements')
+        report = profiler.stats.report()
+        self.assertEquals(report['inputs'], 1)
+        self.assertEquals(list(report['phases']), list(PHASES))
+        for entry in report['phases'].values():
+            self.assertTrue(entry['seconds'] >= 0)
+            self.assertTrue(entry['peak'] is not None)
+            pass
+        pass
+
+    def test_without_memory(self):
+        profiler = Profiler(memory=False)
+        profiler.parse_ast(SOURCE)
+        for entry in profiler.stats.report()['phases'].values():
+            self.assertEquals(entry['allocated'], None)
+            self.assertEquals(entry['peak'], None)
+            pass
+        pass
+
+    def test_tokens(self):
+        profiler = Profiler(memory=False)
+        profiler.parse_ast(SOURCE)
+        profiler.parse_ast(SOURCE)
+        counts = collections.Counter(tok.type for tok in lex(SOURCE))
+        report = profiler.stats.report()
+        self.assertEquals(report['inputs'], 2)
+        self.assertEquals(report['tokens'], dict((k, 2 * v) for k, v in counts.items()))
+        self.assertEquals(report['token_total'], 2 * sum(counts.values()))
+        pass
+
+    def test_rules(self):
+        profiler = Profiler(memory=False)
+        profiler.parse_ast(SOURCE)
+        report = profiler.stats.report()
+        self.assertEquals(report['rules']['p_decl']['count'], 3)
+        self.assertEquals(report['rules']['p_functionDef']['count'], 1)
+        self.assertEquals(report['rules']['p_start']['count'], 1)
+        self.assertEquals(report['reductions'],
+                          sum(entry['count'] for entry in report['rules'].values()))
+        self.assertTrue(all(name.startswith('p_') for name in report['rules']))
+        pass
+
+    def test_hooks(self):
+        recorder = Recorder()
+        profiler = Profiler(hooks=[recorder], memory=False)
+        profiler.parse_ast(SOURCE)
+        phases = [name for kind, name in recorder.events if kind == 'phase']
+        self.assertEquals(phases, list(PHASES))
+        self.assertEquals(recorder.events[2], ('tokens', len(lex(SOURCE))))
+        reductions = [name for kind, name in recorder.events if kind == 'reduction']
+        self.assertEquals(len(reductions), profiler.stats.report()['reductions'])
+        self.assertEquals(reductions[-1], 'p_start')
+        pass
+
+    def test_other_sessions(self):
+        profiler = Profiler(memory=False)
+        Parser().parse_ast(SOURCE)
+        self.assertEquals(profiler.stats.report()['reductions'], 0)
+        profiler.parse_ast(SOURCE)
+        before = profiler.stats.report()['reductions']
+        Parser().parse_ast(SOURCE)
+        self.assertEquals(profiler.stats.report()['reductions'], before)
+        pass
+
+    def test_pratt(self):
+        profiler = Profiler(memory=False, backend='pratt')
+        profiler.parse_ast(SOURCE)
+        report = profiler.stats.report()
+        self.assertEquals(report['rules'], {})
+        self.assertTrue(report['token_total'] > 0)
+        pass
+
+    def test_json(self):
+        profiler = Profiler()
+        profiler.parse_ast(SOURCE)
+        report = json.loads(profiler.stats.to_json())
+        self.assertEquals(report, json.loads(json.dumps(profiler.stats.report())))
+        self.assertEquals(report['rules']['p_decl']['count'], 3)
+        pass
+
+    def test_cli(self):
+        root = tempfile.mkdtemp()
+        try:
+            path = os.path.join(root, 'a.ab')
+            with open(path, 'w') as fo:
+                fo.write(SOURCE)
+                pass
+            output = os.path.join(root, 'stats.json')
+            out = io.StringIO()
+            err = io.StringIO()
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                status = main(['--stats', '--stats-json', output, path])
+                pass
+            self.assertEquals(status, 0)
+            self.assertTrue('p_decl' in err.getvalue())
+            with open(output) as fi:
+                report = json.load(fi)
+                pass
+            self.assertEquals(report['inputs'], 1)
+            self.assertEquals(report['rules']['p_decl']['count'], 3)
+        finally:
+            shutil.rmtree(root)
+            pass
+        pass
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
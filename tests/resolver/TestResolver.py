@@ -0,0 +1,166 @@
+import unittest
+
+from src import ast
+from src.parser import parse_ast
+from src.resolver import ResolveError, Resolver, resolve
+
+def resolved(source, builtins=()):
+    tree = parse_ast(source, True)
+    frame = resolve(tree, builtins, source)
+    return tree, frame
+
+def refs(tree):
+    '''The (name, depth, slot) of every Ref and FuncRef in tree, in order'''
+    found = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Ref, ast.FuncRef)):
+            found.append((node.name, node.depth, node.slot))
+            pass
+        stack.extend(reversed(list(node.children())))
+        pass
+    return found
+
+def errors(source, builtins=()):
+    '''The messages of the ResolveError resolving source raises'''
+    try:
+        resolved(source, builtins)
+    except ResolveError as e:
+        return [str(d) for d in e.diagnostics]
+    raise AssertionError("no ResolveError raised")
+
+class SlotTest(unittest.TestCase):
+    def test_topLevelSlots(self):
+        tree, frame = resolved("let a = 1;\nconst b = 2;\nreturn a + b;")
+        self.assertEquals(frame.size, 2)
+        self.assertEquals([node.target.slot for node in tree.body[:2]], [0, 1])
+        self.assertEquals(refs(tree), [('a', 0, 0), ('b', 0, 1)])
+        pass
+
+    def test_paramsComeFirst(self):
+        source = "let f = (a, b) ->\n    let c = a;\n    return c + b;\ndone;"
+        tree, frame = resolved(source)
+        self.assertEquals(frame.size, 1)
+        self.assertEquals(refs(tree), [('a', 0, 0), ('c', 0, 2), ('b', 0, 1)])
+        pass
+
+    def test_depths(self):
+        source = ("let x = 1;\nlet f = (a, b) ->\n    let g = (c, d) ->\n"
+                  "        return a + x;\n    done;\n    return g(a, b);\ndone;")
+        tree, frame = resolved(source)
+        self.assertEquals(refs(tree), [('a', 1, 0), ('x', 2, 0), ('g', 0, 2), ('a', 0, 0),
+                                       ('b', 0, 1)])
+        pass
+
+    def test_assignTarget(self):
+        tree, frame = resolved("let a = 1;\nlet f = (n:int) ->\n    a = n;\ndone;")
+        body = tree.body[1].value.body.body
+        self.assertEquals((body[0].target.depth, body[0].target.slot), (1, 0))
+        pass
+
+    def test_builtins(self):
+        tree, frame = resolved("print(1);", ['print'])
+        self.assertEquals(refs(tree), [('print', None, None)])
+        pass
+
+    def test_defaultAndTypedParams(self):
+        tree, frame = resolved("let f = (a:int, b = 2) ->\n    return a + b;\ndone;")
+        self.assertEquals(refs(tree), [('a', 0, 0), ('b', 0, 1)])
+        pass
+    pass
+
+class ScopeTest(unittest.TestCase):
+    def test_blockScopes(self):
+        source = ("let a = 1;\nif (a > 1) ->\n    let b = a;\nelse ->\n"
+                  "    let b = 2;\ndone;\nreturn a;")
+        tree, frame = resolved(source)
+        # each branch has a b of its own, in the same frame
+        self.assertEquals(frame.size, 3)
+        pass
+
+    def test_blockVariableNotVisibleAfter(self):
+        source = "if (1 > 2) ->\n    let b = 1;\ndone;\nreturn b;"
+        self.assertEquals(errors(source), ["Undeclared name 'b' at 4:8"])
+        pass
+
+    def test_shadowing(self):
+        source = "let x = 1;\nif (x > 00) ->\n    let x = 2;\n    return x;\ndone;\nreturn x;"
+        tree, frame = resolved(source)
+        self.assertEquals(refs(tree), [('x', 0, 0), ('x', 0, 1), ('x', 0, 0)])
+        pass
+
+    def test_valueCannotSeeItsDeclaration(self):
+        self.assertEquals(errors("let x = x + 1;"), ["Undeclared name 'x' at 1:9"])
+        pass
+
+    def test_recursion(self):
+        source = "let f = (n:int) ->\n    return f(n);\ndone;"
+        tree, frame = resolved(source)
+        self.assertEquals(refs(tree), [('f', 1, 0), ('n', 0, 0)])
+        pass
+
+    def test_mutualRecursion(self):
+        # g is declared after f but before f runs
+        source = ("let f = (n:int) ->\n    return g(n);\ndone;\n"
+                  "let g = (n:int) ->\n    return f(n);\ndone;")
+        tree, frame = resolved(source)
+        self.assertEquals(refs(tree), [('g', 1, 1), ('n', 0, 0), ('f', 1, 0), ('n', 0, 0)])
+        pass
+    pass
+
+class ErrorTest(unittest.TestCase):
+    def test_undeclared(self):
+        self.assertEquals(errors("let a = 1;\nreturn b;"), ["Undeclared name 'b' at 2:8"])
+        pass
+
+    def test_allErrorsReported(self):
+        self.assertEquals(errors("let a = b;\nreturn c;"),
+                          ["Undeclared name 'b' at 1:9", "Undeclared name 'c' at 2:8"])
+        pass
+
+    def test_undeclaredInFunction(self):
+        source = "let f = (n:int) ->\n    return m;\ndone;"
+        self.assertEquals(errors(source), ["Undeclared name 'm' at 2:12"])
+        pass
+
+    def test_assignUndeclared(self):
+        self.assertEquals(errors("a = 1;"), ["Undeclared name 'a' at 1:1"])
+        pass
+
+    def test_constAssignment(self):
+        self.assertEquals(errors("const a = 1;\na = 2;"), ["Assignment to constant 'a' at 2:1"])
+        pass
+
+    def test_builtinAssignment(self):
+        self.assertEquals(errors("print = 2;", ['print']), ["Assignment to builtin 'print' at 1:1"])
+        pass
+
+    def test_redeclaration(self):
+        self.assertEquals(errors("let a = 1;\nlet a = 2;"), ["'a' is already declared at 2:1"])
+        pass
+
+    def test_repeatedParameter(self):
+        source = "let f = (a, a) ->\n    return a;\ndone;"
+        self.assertEquals(errors(source), ["Repeated parameter 'a' at 1:13"])
+        pass
+
+    def test_diagnostics(self):
+        with self.assertRaises(ResolveError) as caught:
+            resolved("let a = 1;\nreturn b;")
+            pass
+        diagnostic = caught.exception.diagnostics[0]
+        self.assertEquals((diagnostic.phase, diagnostic.span, diagnostic.text),
+                          ('resolve', (2, 8), 'b'))
+        pass
+
+    def test_withoutSource(self):
+        with self.assertRaises(ResolveError) as caught:
+            Resolver().resolve(parse_ast("return b;", True))
+            pass
+        self.assertEquals(str(caught.exception), "Undeclared name 'b' at line 1")
+        pass
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import asyncio
+import contextlib
+import io
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from src.cache import Cache
+from src.cli import main, compile_files, collect
+from src.cli.client import Client, ServerError
+from src.parser import parse
+from src.server import Server
+from benchmarks.corpus import generate
+
+FILES = {
+    'a.ab': "let a = 1;\n",
+    'b.ab': "let b = ;\n",
+    'c.ab': "c # 1;\n",
+    'd.ab': generate(30),
+}
+
+class ServerTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name, text in FILES.items():
+            with open(os.path.join(self.root, name), 'w') as fo:
+                fo.write(text)
+                pass
+            pass
+        self.path = os.path.join(self.root, 'arbor.sock')
+        self.server = self.start()
+        pass
+
+    def start(self):
+        server = Server(self.path, jobs=2, cache=Cache(os.path.join(self.root, 'cache')))
+        server.ready = threading.Event()
+        thread = threading.Thread(target=asyncio.run, args=(server.serve(),))
+        thread.start()
+        self.assertTrue(server.ready.wait(10))
+        server.thread = thread
+        return server
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            with Client(self.path) as client:
+                client.shutdown()
+                pass
+            pass
+        self.server.thread.join(10)
+        shutil.rmtree(self.root)
+        pass
+
+    def run_main(self, argv):
+        out = io.StringIO()
+        err = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            status = main(argv)
+            pass
+        return status, out.getvalue(), err.getvalue()
+
+    def test_requests(self):
+        with Client(self.path) as client:
+            self.assertEquals(client.ping(), 'pong')
+            reply = client.parse(FILES['d.ab'])
+            self.assertEquals((reply['ok'], reply['tree']), (True, parse(FILES['d.ab'])))
+            reply = client.parse("let = 2;")
+            self.assertEquals(reply, {'ok': False, 'tree': None,
+                                      'diagnostics': ['Syntax error 1:5: =']})
+            self.assertRaises(ServerError, client.request, 'nothing')
+            self.assertRaises(ServerError, client.request, 'parse', text='a;')
+            self.assertEquals(client.stats()['requests'], 5)
+            pass
+        pass
+
+    def test_compileMatchesLocal(self):
+        files = collect([self.root])
+        local = compile_files(files, 1)
+        with Client(self.path) as client:
+            first = client.compile(files)
+            second = client.compile(files)
+            pass
+        self.assertEquals([(r['path'], r['ok'], r['diagnostics']) for r in first],
+                          [(r.path, r.ok, r.diagnostics) for r in local])
+        self.assertEquals([r['cached'] for r in first], [False] * 4)
+        self.assertEquals([r['cached'] for r in second], [True, False, False, True])
+        pass
+
+    def test_cliClient(self):
+        name = os.path.join(self.root, '*.ab')
+        local = self.run_main(['--no-cache', name])
+        remote = self.run_main(['--socket', self.path, name])
+        self.assertEquals(remote[:2], local[:2])
+        self.assertEquals(remote[0], 1)
+        missing = self.run_main(['--socket', self.path + '.none', '--no-cache', name])
+        self.assertEquals(missing[:2], local[:2])
+        self.assertIn('no daemon', missing[2])
+        pass
+
+    def stub(self, reply):
+        '''Serves one connection on a socket of its own, answering every
+        request with the line reply, and returns the socket path'''
+        path = os.path.join(self.root, 'stub.sock')
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen(1)
+
+        def answer():
+            conn, _ = listener.accept()
+            with conn, conn.makefile('rwb') as stream:
+                while stream.readline():
+                    stream.write(reply + b'\n')
+                    stream.flush()
+                    pass
+                pass
+            listener.close()
+            os.remove(path)
+            pass
+
+        thread = threading.Thread(target=answer)
+        thread.start()
+        self.addCleanup(thread.join, 10)
+        return path
+
+    def test_cliDaemonFails(self):
+        name = os.path.join(self.root, '*.ab')
+        local = self.run_main(['--no-cache', name])
+        for reply in (b'{"id": 1, "error": "BrokenProcessPool: a worker died"}',
+                      b'not json', b'{"id": 1, "result": [{"path": "a.ab"}]}'):
+            failed = self.run_main(['--socket', self.stub(reply), '--no-cache', name])
+            self.assertEquals(failed[:2], local[:2])
+            self.assertIn('failed', failed[2])
+            self.assertIn('compiling here', failed[2])
+            pass
+        pass
+
+    def test_concurrentClients(self):
+        programs = [generate(10 + ndx, seed=ndx) for ndx in range(16)]
+        replies = [None] * len(programs)
+
+        def run(ndx):
+            with Client(self.path) as client:
+                replies[ndx] = [client.parse(programs[ndx])['tree'] for _ in range(3)]
+                pass
+            pass
+
+        threads = [threading.Thread(target=run, args=(ndx,)) for ndx in range(len(programs))]
+        for thread in threads:
+            thread.start()
+            pass
+        for thread in threads:
+            thread.join()
+            pass
+        for ndx, trees in enumerate(replies):
+            self.assertEquals(trees, [parse(programs[ndx])] * 3)
+            pass
+        pass
+
+    def test_socketFile(self):
+        self.assertEquals(os.stat(self.path).st_mode & 0o777, 0o600)
+        # a second daemon on the same socket refuses to start
+        other = Server(self.path, jobs=1)
+        self.assertRaises(RuntimeError, asyncio.run, other.serve())
+        with Client(self.path) as client:
+            client.shutdown()
+            pass
+        self.server.thread.join(10)
+        self.assertFalse(os.path.exists(self.path))
+        # a socket file nobody listens on is taken over
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+        self.server = self.start()
+        with Client(self.path) as client:
+            self.assertEquals(client.ping(), 'pong')
+            pass
+        pass
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Generous wall clock budget for `import src` in a fresh interpreter. The
+# module checks below are what actually keep the cost from creeping back.
+IMPORT_BUDGET = 0.25
+
+PROBE = '''
+import sys, time
+start = time.perf_counter()
+import src
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(" ".join(sorted(m for m in sys.modules if m.startswith("ply") or m.startswith("src"))))
+'''
+
+class StartupTest(unittest.TestCase):
+    def probe(self):
+        out = subprocess.check_output([sys.executable, '-c', PROBE], cwd=ROOT)
+        elapsed, modules = out.decode().splitlines()
+        return float(elapsed), modules.split()
+
+    def test_importBuildsNothing(self):
+        '''importing src must not build the lexer or load the parser tables'''
+        elapsed, modules = self.probe()
+        self.assertNotIn('ply.lex', modules)
+        self.assertNotIn('ply.yacc', modules)
+        self.assertNotIn('src.parser.parsetab', modules)
+        pass
+
+    def test_importBudget(self):
+        elapsed, modules = min(self.probe() for _ in range(3))
+        self.assertLess(elapsed, IMPORT_BUDGET)
+        pass
+
+    def test_firstUseBuilds(self):
+        import src.lexer
+        import src.parser
+        self.assertEquals(src.parse("a;", True), ["statements", [["usage", "a"]]])
+        self.assertIs(src.lexer.lexer, src.lexer.get_lexer())
+        self.assertIs(src.parser.parser, src.parser.get_parser())
+        pass
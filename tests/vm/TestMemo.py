@@ -0,0 +1,308 @@
+import contextlib
+import gc
+import io
+import os
+import tempfile
+import unittest
+
+from src.cli import main
+from src.vm import VM, functions
+from src.vm.compiler import CompileError, compile_source, pragmas
+from src.vm.memo import LRUCache, key
+
+FIB = '''
+let fib = (n:int) ->
+    if (n < 2) ->
+        return n;
+    done;
+    let a = n - 1;
+    let b = n - 2;
+    return fib(a) + fib(b);
+done;
+return fib({0});
+'''
+
+IMPURE = '''
+let count = 1;
+let bump = (n:int) ->
+    count = count + n;
+    return count;
+done;
+let peek = (n:int) ->
+    return count;
+done;
+let say = (n:int) ->
+    return print(n);
+done;
+let apply = (g, n:int) ->
+    return g(n);
+done;
+let limit = 10;
+let capped = (n:int) ->
+    if (n > limit) ->
+        return limit;
+    done;
+    return n;
+done;
+let outer = (n:int) ->
+    let helper = (m:int) ->
+        return m * 2;
+    done;
+    return helper(n);
+done;
+'''
+
+def purity(source):
+    return dict((code.name, code.pure) for code in functions(compile_source(source)))
+
+class PurityTest(unittest.TestCase):
+    def test_recursiveIsPure(self):
+        self.assertEquals(purity(FIB.format(3)), {'fib': True})
+        pass
+
+    def test_impure(self):
+        self.assertEquals(purity(IMPURE), {
+            'bump': False, 'peek': False, 'say': False, 'apply': False,
+            'capped': True, 'outer': True, 'helper': True,
+        })
+        pass
+
+    def test_mutualRecursion(self):
+        source = '''
+let even = (n:int) ->
+    if (n == 1) ->
+        return 'o';
+    done;
+    let m = n - 1;
+    return odd(m);
+done;
+let odd = (n:int) ->
+    if (n == 1) ->
+        return 'e';
+    done;
+    let m = n - 1;
+    return even(m);
+done;
+let noisy = (n:int) ->
+    let m = n - 1;
+    let a = even(m);
+    return print(a);
+done;
+'''
+        self.assertEquals(purity(source), {'even': True, 'odd': True, 'noisy': False})
+        pass
+    pass
+
+class PragmaTest(unittest.TestCase):
+    def test_pragmas(self):
+        self.assertEquals(pragmas("let a = 1;"), set())
+        self.assertEquals(pragmas("// pragma memoize\nlet a = 1;"), True)
+        self.assertEquals(pragmas("// pragma memoize fib, tak\n  //pragma memoize ack"),
+                          {'fib', 'tak', 'ack'})
+        self.assertEquals(pragmas("let a = 1; // pragma memoize"), set())
+        pass
+
+    def test_pragmaMarksFunction(self):
+        code = compile_source("// pragma memoize fib\n" + FIB.format(3))
+        self.assertEquals([func.memoize for func in functions(code)], [True])
+        pass
+
+    def test_pragmaOnImpureFunction(self):
+        with self.assertRaises(CompileError):
+            compile_source("// pragma memoize bump\n" + IMPURE)
+            pass
+        pass
+
+    def test_pragmaAllSkipsImpure(self):
+        code = compile_source("// pragma memoize\n" + IMPURE)
+        memoized = sorted(func.name for func in functions(code) if func.memoize)
+        self.assertEquals(memoized, ['capped', 'helper', 'outer'])
+        pass
+    pass
+
+class MemoTest(unittest.TestCase):
+    def test_offByDefault(self):
+        vm = VM()
+        self.assertEquals(vm.run(compile_source(FIB.format(15))), 610)
+        self.assertEquals(vm.memo_stats(), {})
+        pass
+
+    def test_memoizeAll(self):
+        vm = VM(memoize=True)
+        self.assertEquals(vm.run(compile_source(FIB.format(90))), 2880067194370816120)
+        self.assertEquals(vm.memo_stats(), {'fib': {
+            'hits': 88, 'misses': 91, 'evictions': 0, 'size': 91, 'maxsize': 1024}})
+        pass
+
+    def test_memoizeByName(self):
+        vm = VM(memoize={'fib'})
+        self.assertEquals(vm.run(compile_source(FIB.format(40))), 102334155)
+        vm = VM(memoize={'other'})
+        vm.run(compile_source(FIB.format(5)))
+        self.assertEquals(vm.memo_stats(), {})
+        pass
+
+    def test_pragma(self):
+        vm = VM()
+        self.assertEquals(vm.run(compile_source("// pragma memoize fib\n" + FIB.format(50))),
+                          12586269025)
+        self.assertEquals(list(vm.memo_stats()), ['fib'])
+        pass
+
+    def test_bounded(self):
+        vm = VM(memoize=True, memo_size=4)
+        self.assertEquals(vm.run(compile_source(FIB.format(15))), 610)
+        stats = vm.memo_stats()['fib']
+        self.assertEquals(stats['size'], 4)
+        self.assertEquals(stats['misses'] - stats['evictions'], 4)
+        self.assertTrue(stats['evictions'] > 0)
+        pass
+
+    def test_bareDeclarationThenAssigned(self):
+        # x is bound to None, then to 5, so f is not pure
+        source = """// pragma memoize
+let x;
+let f = (n:int) ->
+    return x;
+done;
+let a = f(1);
+x = 5;
+return f(1);
+"""
+        self.assertEquals(purity(source), {'f': False})
+        self.assertEquals(VM().run(compile_source(source)), 5)
+        self.assertEquals(VM(memoize=True).run(compile_source(source)), 5)
+        pass
+
+    def test_closuresInALoop(self):
+        # every pass creates a new memoized sq, whose cache goes with it
+        source = '''
+let loop = (n, z) ->
+    if (n < 1) ->
+        return z;
+    done;
+    let sq = (a, b) ->
+        return a * b;
+    done;
+    let m = n - 1;
+    let y = sq(n, n);
+    return loop(m, y);
+done;
+return loop({0}, 00);
+'''
+        vm = VM(memoize=True, max_depth=1)
+        self.assertEquals(vm.run(compile_source(source.format(2000))), 1)
+        gc.collect()
+        self.assertTrue(len(vm.caches) <= 2)
+        stats = vm.memo_stats()
+        self.assertEquals((stats['sq']['misses'], stats['loop']['misses']), (2000, 2001))
+        self.assertTrue(stats['sq']['size'] <= 1)
+        pass
+
+    def test_typesKeptApart(self):
+        source = '''
+let divide = (n, d) ->
+    return n / d;
+done;
+let a = divide(7, 2);
+let b = divide(7.0, 2);
+return b;
+'''
+        vm = VM(memoize=True)
+        self.assertEquals(vm.run(compile_source(source)), 3.5)
+        self.assertEquals(vm.globals['a'], 3)
+        pass
+
+    def test_defaultsInKey(self):
+        source = '''
+let add = (a, b = 10) ->
+    return a + b;
+done;
+let x = add(1);
+let y = add(1, 10);
+return y;
+'''
+        vm = VM(memoize=True)
+        self.assertEquals(vm.run(compile_source(source)), 11)
+        self.assertEquals(vm.memo_stats()['add']['hits'], 1)
+        pass
+
+    def test_tailCallResultStored(self):
+        source = '''
+let count = (n, acc) ->
+    if (n == 1) ->
+        return acc;
+    done;
+    let m = n - 1;
+    let b = acc + 1;
+    return count(m, b);
+done;
+let a = count(50, 1);
+let b = count(50, 1);
+let c = count(49, 2);
+return c;
+'''
+        vm = VM(memoize=True)
+        self.assertEquals(vm.run(compile_source(source)), 50)
+        # every call of the first run is stored, the others are hits
+        self.assertEquals(vm.memo_stats()['count']['misses'], 50)
+        self.assertEquals(vm.memo_stats()['count']['hits'], 2)
+        pass
+
+    def test_impureNotMemoized(self):
+        out = io.StringIO()
+        source = "let say = (n:int) ->\n    return print(n);\ndone;\nlet a = say(1);\nlet b = say(1);"
+        with contextlib.redirect_stdout(out):
+            VM(memoize=True).run(compile_source(source))
+            pass
+        self.assertEquals(out.getvalue(), "1\n1\n")
+        pass
+
+    def test_cli(self):
+        fd, path = tempfile.mkstemp(suffix='.ab')
+        with os.fdopen(fd, 'w') as fo:
+            fo.write(FIB.format(60))
+            pass
+        try:
+            out, err = io.StringIO(), io.StringIO()
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                self.assertEquals(main(['run', '--memoize', '--memo-stats', path]), 0)
+                pass
+            self.assertEquals(out.getvalue(), "1548008755920\n")
+            self.assertEquals(err.getvalue(),
+                              "fib: 58 hits, 61 misses, 0 evictions, 61/1024 entries\n")
+            with open(path, 'w') as fo:
+                fo.write(FIB.format(10))
+                pass
+            err = io.StringIO()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(err):
+                self.assertEquals(main(['run', '--memoize-only', 'fob', path]), 0)
+                pass
+            self.assertEquals(err.getvalue().splitlines()[0],
+                              "arbor: cannot memoize fob, it is not a pure function")
+        finally:
+            os.remove(path)
+            pass
+        pass
+    pass
+
+class LRUCacheTest(unittest.TestCase):
+    def test_lru(self):
+        cache = LRUCache('f', 2)
+        cache.put(key([1]), 'a')
+        cache.put(key([2]), 'b')
+        self.assertEquals(cache.get(key([1])), 'a')
+        cache.put(key([3]), 'c')
+        self.assertEquals(cache.get(key([2])), None)
+        self.assertEquals(cache.get(key([1])), 'a')
+        self.assertEquals(cache.stats(), {'hits': 2, 'misses': 1, 'evictions': 1,
+                                          'size': 2, 'maxsize': 2})
+        pass
+
+    def test_unhashable(self):
+        cache = LRUCache('f')
+        cache.put(key([[1]]), 'a')
+        self.assertEquals(cache.get(key([[1]]), 'missing'), 'missing')
+        self.assertEquals(len(cache), 0)
+        pass
+    pass
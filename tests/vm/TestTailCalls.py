@@ -0,0 +1,147 @@
+import tracemalloc
+import unittest
+
+from src.vm import CALL, TAIL_CALL, OPBITS, ArborError, VM, run
+from src.vm.compiler import compile_source
+
+COUNT = '''
+let count = (n, acc) ->
+    if (n == 1) ->
+        return acc;
+    done;
+    let m = n - 1;
+    let b = acc + 1;
+    return count(m, b);
+done;
+return count({0}, 1);
+'''
+
+# the parity of n as 'e' or 'o', with even and odd calling each other from
+# the last branch of an if chain
+PARITY = '''
+let even = (n:int) ->
+    if (n == 1) ->
+        return 'o';
+    else ->
+        let m = n - 1;
+        return odd(m);
+    done;
+done;
+let odd = (n:int) ->
+    if (n == 1) ->
+        return 'e';
+    else if (n == 2) ->
+        return 'o';
+    else ->
+        let m = n - 1;
+        return even(m);
+    done;
+done;
+return even({0});
+'''
+
+def opcodes(code):
+    return [word & ((1 << OPBITS) - 1) for word in code.code]
+
+class TailCallTest(unittest.TestCase):
+    def test_returnedCallIsTailCall(self):
+        code = compile_source(COUNT.format(5)).consts[0]
+        self.assertEquals(opcodes(code).count(TAIL_CALL), 1)
+        self.assertEquals(opcodes(code).count(CALL), 0)
+        pass
+
+    def test_callInExpressionIsNot(self):
+        source = "let f = (n:int) ->\n    let m = n - 1;\n    return f(m) + 1;\ndone;"
+        code = compile_source(source).consts[0]
+        self.assertEquals(opcodes(code).count(TAIL_CALL), 0)
+        self.assertEquals(opcodes(code).count(CALL), 1)
+        pass
+
+    def test_millionDeep(self):
+        # one frame is all it ever needs
+        self.assertEquals(VM(max_depth=1).run(compile_source(COUNT.format(1000000))), 1000000)
+        pass
+
+    def test_mutualRecursionMillionDeep(self):
+        self.assertEquals(str(VM(max_depth=1).run(compile_source(PARITY.format(1000000)))), 'e')
+        self.assertEquals(str(VM(max_depth=1).run(compile_source(PARITY.format(7)))), 'o')
+        pass
+
+    def test_boundedMemory(self):
+        vm = VM()
+        small = compile_source(COUNT.format(1000))
+        large = compile_source(COUNT.format(20000))
+        tracemalloc.start()
+        try:
+            vm.run(small)
+            small_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+            vm.run(large)
+            large_peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            pass
+        self.assertLess(large_peak, small_peak * 2)
+        pass
+
+    def test_memoizedBoundedMemory(self):
+        # the keys a chain of memoized tail calls stores its result under
+        # are bounded too
+        vm = VM(memoize=True, memo_size=4)
+        small = compile_source(COUNT.format(1000))
+        large = compile_source(COUNT.format(50000))
+        tracemalloc.start()
+        try:
+            vm.run(small)
+            small_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+            self.assertEquals(vm.run(large), 50000)
+            large_peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            pass
+        self.assertLess(large_peak, small_peak * 2)
+        self.assertTrue(all(len(cache) <= 4 for cache in vm.caches))
+        pass
+
+    def test_nonTailRecursionStillLimited(self):
+        source = "let f = (n:int) ->\n    let m = n - 1;\n    return f(m) + 1;\ndone;\nreturn f(5);"
+        with self.assertRaises(ArborError):
+            VM(max_depth=100).run(compile_source(source))
+            pass
+        pass
+
+    def test_closureKeepsItsFrame(self):
+        # the tail call gets fresh locals, the closure still sees the old ones
+        source = '''
+let make = (v:int) ->
+    let get = (x, y) ->
+        return v;
+    done;
+    return get;
+done;
+let apply = (g, n:int) ->
+    return g(n, n);
+done;
+let g = make(3);
+return apply(g, 9);
+'''
+        self.assertEquals(run(source), 3)
+        pass
+
+    def test_tailCallBuiltin(self):
+        calls = []
+        vm = VM({'record': lambda n: calls.append(n) or n})
+        source = "let f = (n:int) ->\n    return record(n);\ndone;\nlet a = f(4);\nreturn a;"
+        self.assertEquals(vm.run(compile_source(source, builtins=vm.builtins)), 4)
+        self.assertEquals(calls, [4])
+        pass
+
+    def test_tailCallErrorLine(self):
+        source = "let f = (a, b) ->\n    return a;\ndone;\nlet g = (n:int) ->\n    return f(n);\ndone;\nreturn g(1);"
+        with self.assertRaises(ArborError) as caught:
+            run(source)
+            pass
+        self.assertEquals(caught.exception.lineno, 5)
+        pass
+    pass
@@ -0,0 +1,266 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from src.cli import main
+from src.vm import ArborError, Char, VM, dis, run
+from src.vm.compiler import CompileError, compile_source
+
+FIB = '''
+let fib = (n:int) ->
+    if (n < 2) ->
+        return n;
+    done;
+    let a = n - 1;
+    let b = n - 2;
+    return fib(a) + fib(b);
+done;
+return fib(15);
+'''
+
+class VMTest(unittest.TestCase):
+    def test_arithmetic(self):
+        self.assertEquals(run("return 2 + 4 * 8;"), 34)
+        self.assertEquals(run("return 1.5 * 2;"), 3.0)
+        self.assertEquals(run("return 0x10 + 010;"), 24)
+        pass
+
+    def test_divisionTruncates(self):
+        self.assertEquals(run("return 7 / 2;"), 3)
+        self.assertEquals(run("return -7 / 2;"), -3)
+        self.assertEquals(run("return 7.0 / 2;"), 3.5)
+        pass
+
+    def test_divisionByZero(self):
+        with self.assertRaises(ArborError) as caught:
+            run("let a = 1;\nlet b = a - 1;\nreturn a / b;")
+            pass
+        self.assertEquals(caught.exception.lineno, 3)
+        pass
+
+    def test_comparisonsAndBool(self):
+        self.assertEquals(run("return 1 < 2;"), True)
+        self.assertEquals(run("return 2 <= 1;"), False)
+        self.assertEquals(run("return 1 < 2 && 2 > 3;"), False)
+        self.assertEquals(run("return 1 > 2 || 2 != 3;"), True)
+        self.assertEquals(run("return !(1 == 1);"), False)
+        pass
+
+    def test_shortCircuit(self):
+        # the right side would fail dividing by zero
+        boom = "let boom = (a, b) ->\n    return a / 00;\ndone;\n"
+        self.assertEquals(run(boom + "return 1 > 2 && boom(1, 2);"), False)
+        self.assertEquals(run(boom + "return 1 < 2 || boom(1, 2);"), True)
+        pass
+
+    def test_chars(self):
+        value = run("return 'a';")
+        self.assertEquals(type(value), Char)
+        self.assertEquals(str(value), 'a')
+        self.assertEquals(run("return 'a' + 1;"), 98)
+        pass
+
+    def test_ifElse(self):
+        source = '''
+let sign = (n:int) ->
+    if (n < 1) ->
+        return 'n';
+    else if (n == 1) ->
+        return 'o';
+    else ->
+        return 'p';
+    done;
+done;
+let a = sign(-7);
+let b = sign(1);
+let c = sign(9);
+return c;
+'''
+        vm = VM()
+        self.assertEquals(str(vm.run(compile_source(source))), 'p')
+        self.assertEquals(str(vm.globals['a']), 'n')
+        self.assertEquals(str(vm.globals['b']), 'o')
+        pass
+
+    def test_recursion(self):
+        self.assertEquals(run(FIB), 610)
+        pass
+
+    def test_closures(self):
+        source = '''
+let counter = (start:int) ->
+    let count = start;
+    let step = (by:int) ->
+        count = count + by;
+        return count;
+    done;
+    return step;
+done;
+let c = counter(10);
+let a = c(1);
+let b = c(5);
+return b;
+'''
+        self.assertEquals(run(source), 16)
+        pass
+
+    def test_defaults(self):
+        source = '''
+let add = (a, b = 10) ->
+    return a + b;
+done;
+let x = add(1);
+let y = add(1, 2);
+let z = add(5, );
+return x + y + z;
+'''
+        self.assertEquals(run(source), 11 + 3 + 15)
+        pass
+
+    def test_noneArgument(self):
+        # the None a function without a return gives is an argument, not an
+        # empty one
+        source = '''
+let g = (a, b) ->
+    let c = a;
+done;
+let f = (a = 7, b = 3) ->
+    return a;
+done;
+let h = (a, b) ->
+    return b;
+done;
+let n = g(1, 2);
+return {0};
+'''
+        self.assertEquals(run(source.format("f(n, 3)")), None)
+        self.assertEquals(run(source.format("h(1, n)")), None)
+        self.assertEquals(run(source.format("f(, n)")), 7)
+        pass
+
+    def test_missingArgument(self):
+        source = "let f = (a, b) ->\n    return a;\ndone;\nreturn f(1);"
+        with self.assertRaises(ArborError) as caught:
+            run(source)
+            pass
+        self.assertEquals(caught.exception.message, "f is missing argument 2")
+        self.assertEquals(caught.exception.lineno, 4)
+        pass
+
+    def test_undefinedName(self):
+        with self.assertRaises(CompileError) as caught:
+            run("let a = 1;\nreturn b;")
+            pass
+        self.assertEquals(str(caught.exception), "Undeclared name 'b' at 2:8")
+        pass
+
+    def test_readBeforeAssignment(self):
+        # f may name x, declared after it, but not run before x is assigned
+        source = "let f = (a, b) ->\n    return x;\ndone;\n{0}let x = 5;\nreturn {1};"
+        with self.assertRaises(ArborError) as caught:
+            run(source.format("let r = f(1, 2);\n", "r"))
+            pass
+        self.assertEquals(str(caught.exception),
+                          "line 2: variable 'x' is read before it is assigned")
+        self.assertEquals(run(source.format("", "f(1, 2)")), 5)
+        # a declaration without a value is None
+        self.assertEquals(run("let y;\nreturn y;"), None)
+        pass
+
+    def test_missingBuiltin(self):
+        # compiled against builtins the VM running it does not have
+        code = compile_source("return record(1);", builtins=['record'])
+        with self.assertRaises(ArborError) as caught:
+            VM().run(code)
+            pass
+        self.assertEquals(str(caught.exception), "line 1: name 'record' is not defined")
+        pass
+
+    def test_notAFunction(self):
+        with self.assertRaises(ArborError):
+            run("let a = 1;\nreturn a(2);")
+            pass
+        pass
+
+    def test_maxDepth(self):
+        source = "let f = (n:int) ->\n    return f(n) + 1;\ndone;\nreturn f(1);"
+        with self.assertRaises(ArborError) as caught:
+            VM(max_depth=50).run(compile_source(source))
+            pass
+        self.assertEquals(caught.exception.message, "maximum recursion depth exceeded")
+        pass
+
+    def test_deepRecursionNeedsNoPythonStack(self):
+        source = '''
+let down = (n:int) ->
+    if (n == 1) ->
+        return 1;
+    done;
+    let m = n - 1;
+    return down(m) + 1;
+done;
+return down(20000);
+'''
+        self.assertEquals(run(source), 20000)
+        pass
+
+    def test_builtins(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEquals(run("let a = 'x';\nprint(a, 2);"), None)
+            pass
+        self.assertEquals(out.getvalue(), "x 2\n")
+        pass
+
+    def test_globals(self):
+        vm = VM()
+        vm.run(compile_source("let a = 4;\nif (a > 1) ->\n    let b = 2;\ndone;\nlet c = a * 2;"))
+        # block scoped variables are not globals
+        self.assertEquals(vm.globals, {'a': 4, 'c': 8})
+        with self.assertRaises(CompileError):
+            vm.run(compile_source("return a * 2;"))
+            pass
+        pass
+
+    def test_constantPool(self):
+        code = compile_source("let a = 1;\nlet b = 1;\nlet c = 1.0;")
+        self.assertEquals([type(c) for c in code.consts if c == 1], [int, float])
+        pass
+
+    def test_dis(self):
+        text = dis(compile_source("let a = 1 + 2;"))
+        self.assertEquals(text.splitlines(), [
+            "<module>: 0 params, 1 locals",
+            "    1    0 LOAD_CONST         0 1",
+            "    1    1 LOAD_CONST         1 2",
+            "    1    2 ADD",
+            "    1    3 STORE_LOCAL        0",
+            "    1    4 LOAD_CONST         2 None",
+            "    1    5 RETURN",
+        ])
+        pass
+
+    def test_repeatedParameter(self):
+        with self.assertRaises(CompileError):
+            compile_source("let f = (a, a) ->\n    return a;\ndone;")
+            pass
+        pass
+
+    def test_cliRun(self):
+        fd, path = tempfile.mkstemp(suffix='.ab')
+        with os.fdopen(fd, 'w') as fo:
+            fo.write(FIB)
+            pass
+        try:
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                self.assertEquals(main(['run', path]), 0)
+                pass
+            self.assertEquals(out.getvalue(), "610\n")
+        finally:
+            os.remove(path)
+            pass
+        pass
+    pass